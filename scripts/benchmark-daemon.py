@@ -0,0 +1,78 @@
+"""
+Compares the wall time of a seCureLI command run from a cold interpreter, as `secureli` runs
+it, with the same command run by a warm daemon through `secureli-client`.
+
+A daemon is started for the given repository and stopped once measuring is done. Both paths
+spawn pre-commit in the same way, so the difference between them is the start up the daemon
+saves: Python's imports, the container and reading seCureLI's configuration. A bare
+interpreter (running `python -m this`) is timed too, as the floor for the client's own start up.
+
+Usage: python scripts/benchmark-daemon.py [--runs 10] [--repo .] [-- scan --mode staged-only]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def time_command(module: str, args: list[str], cwd: str, runs: int) -> list[float]:
+    """Runs a seCureLI module with the given arguments in fresh interpreters, timing each"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", module, *args],
+            cwd=cwd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    print(
+        f"{label:<24} median {statistics.median(timings) * 1000:7.1f}ms"
+        f"   min {min(timings) * 1000:7.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("command", nargs="*", default=["scan"])
+    args = parser.parse_args()
+
+    daemon = subprocess.Popen(
+        [sys.executable, "-m", "secureli.main", "daemon"],
+        cwd=args.repo,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        socket_path = os.path.join(args.repo, ".secureli", "daemon.sock")
+        while not os.path.exists(socket_path):
+            time.sleep(0.05)
+
+        # The daemon's first command loads whatever its start up didn't
+        time_command("secureli.client", args.command, args.repo, 1)
+
+        report("python -m this", time_command("this", [], args.repo, args.runs))
+        report(
+            "secureli (cold)",
+            time_command("secureli.main", args.command, args.repo, args.runs),
+        )
+        report(
+            "secureli-client (warm)",
+            time_command("secureli.client", args.command, args.repo, args.runs),
+        )
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compares the per-file cost of matching repository paths against ignore patterns, before and
+after precompiling the combined pattern into an IgnoreMatcher.
+
+Before: the combined pattern is rebuilt and matched with re.findall for every file, as
+RepoFilesRepository used to do. After: IgnoreMatcher compiles the combined pattern once.
+
+The "before" approach is orders of magnitude slower at large pattern counts, so it is timed
+over a sample of the paths and reported per file.
+
+Usage: python scripts/benchmark-ignore-matcher.py [--patterns 10000] [--paths 100000]
+"""
+import argparse
+import random
+import re
+import time
+
+from secureli.utilities.patterns import (
+    IgnoreMatcher,
+    combine_patterns,
+    git_wild_match_patterns,
+)
+
+
+def generate_ignore_lines(count: int) -> list[str]:
+    """Generates a mix of folder, extension and file name gitignore entries"""
+    kinds = [
+        lambda i: f"generated_{i}/",
+        lambda i: f"*.ext{i}",
+        lambda i: f"cache/file_{i}.tmp",
+    ]
+    return [kinds[i % len(kinds)](i) for i in range(count)]
+
+
+def generate_paths(count: int, pattern_count: int) -> list[str]:
+    """Generates repository-like paths, a small share of which are ignored"""
+    rng = random.Random(42)
+    paths = []
+    for i in range(count):
+        folder = "/".join(f"dir{rng.randint(0, 50)}" for _ in range(rng.randint(1, 5)))
+        if i % 20 == 0:
+            paths.append(f"{folder}/file{i}.ext{rng.randrange(pattern_count)}")
+        else:
+            paths.append(f"{folder}/file{i}.py")
+    return paths
+
+
+def time_before(patterns: list[str], paths: list[str]) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        combined_ignore_pattern = combine_patterns(patterns)
+        not combined_ignore_pattern or not re.findall(combined_ignore_pattern, path)
+    return time.perf_counter() - start
+
+
+def time_after(patterns: list[str], paths: list[str]) -> tuple[float, float]:
+    start = time.perf_counter()
+    ignore_matcher = IgnoreMatcher(patterns)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for path in paths:
+        ignore_matcher.is_ignored(path)
+    return build_seconds, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patterns", type=int, default=10000)
+    parser.add_argument("--paths", type=int, default=100000)
+    parser.add_argument(
+        "--before-sample",
+        type=int,
+        default=100,
+        help="How many paths to time the per-file rebuild approach over",
+    )
+    args = parser.parse_args()
+
+    patterns = git_wild_match_patterns(generate_ignore_lines(args.patterns))
+    paths = generate_paths(args.paths, args.patterns)
+    sample = paths[: args.before_sample]
+
+    before_seconds = time_before(patterns, sample)
+    build_seconds, after_seconds = time_after(patterns, paths)
+
+    before_per_file = before_seconds / len(sample)
+    after_per_file = after_seconds / len(paths)
+
+    print(f"{len(patterns)} patterns x {len(paths)} paths")
+    print(
+        f"before: {before_per_file * 1e6:10.1f} us/file "
+        f"(sampled {len(sample)} paths, ~{before_per_file * len(paths):.1f}s projected)"
+    )
+    print(
+        f"after:  {after_per_file * 1e6:10.1f} us/file "
+        f"({after_seconds:.1f}s total, plus {build_seconds * 1e3:.0f}ms to compile once)"
+    )
+    print(f"speedup: {before_per_file / after_per_file:.1f}x per file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Measures how long the scan history takes to record a scan and to answer `secureli stats
+failures`, once it holds a year of history with millions of failures.
+
+The history is seeded with runs spread evenly over the last year, each failing a random mix
+of hooks across a pool of files, then timed recording further scans and reporting the most
+frequent failures over the last 30 and 365 days. As in real repositories, some files and
+hooks fail far more often than others: both are drawn from a Zipf distribution. Pass
+--uniform to draw them evenly instead, the worst case, where few failures share a hook, file
+and day and the daily counts are little smaller than the failures themselves.
+
+Usage: python scripts/benchmark-scan-history.py [--failures 2000000] [--failures-per-run 200] [--uniform]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from secureli.repositories.scan_history import (
+    SECONDS_PER_DAY,
+    FailureRecord,
+    ScanHistoryRepository,
+)
+
+
+def seed(
+    history: ScanHistoryRepository, failures: int, failures_per_run: int, uniform: bool
+):
+    """Seeds the history with runs over the last year, as if recorded by earlier scans"""
+    hook_ids = [f"hook-{index}" for index in range(40)]
+    files = [f"src/module_{index}.py" for index in range(5000)]
+    hook_weights = [1 if uniform else 1 / rank for rank in range(1, len(hook_ids) + 1)]
+    file_weights = [1 if uniform else 1 / rank for rank in range(1, len(files) + 1)]
+    run_count = failures // failures_per_run
+    now = time.time()
+    history.enabled = True
+    history.history_path.parent.mkdir(parents=True, exist_ok=True)
+
+    connection = history._connect()
+    connection.execute("BEGIN")
+    connection.executemany(
+        "INSERT INTO hooks (id, repo, hook_id) VALUES (?, 'benchmark', ?)",
+        enumerate(hook_ids, start=1),
+    )
+    connection.executemany(
+        "INSERT INTO files (id, path) VALUES (?, ?)", enumerate(files, start=1)
+    )
+    for run_id in range(1, run_count + 1):
+        timestamp = now - 365 * SECONDS_PER_DAY * (1 - run_id / run_count)
+        day = int(timestamp // SECONDS_PER_DAY)
+        pairs = zip(
+            random.choices(
+                range(1, len(hook_ids) + 1), hook_weights, k=failures_per_run
+            ),
+            random.choices(range(1, len(files) + 1), file_weights, k=failures_per_run),
+        )
+        pairs = list(pairs)
+        connection.execute(
+            "INSERT INTO runs (id, timestamp, branch, successful, failure_count)"
+            " VALUES (?, ?, 'main', 0, ?)",
+            (run_id, timestamp, len(pairs)),
+        )
+        connection.executemany(
+            "INSERT INTO failures (run_id, hook_id, file_id) VALUES (?, ?, ?)",
+            [(run_id, hook_id, file_id) for hook_id, file_id in pairs],
+        )
+        connection.executemany(
+            "INSERT INTO daily_failures (hook_id, file_id, day, failures)"
+            " VALUES (?, ?, ?, 1)"
+            " ON CONFLICT (hook_id, file_id, day) DO UPDATE SET failures = failures + 1",
+            [(hook_id, file_id, day) for hook_id, file_id in pairs],
+        )
+        connection.executemany(
+            "INSERT INTO total_failures (hook_id, file_id, failures) VALUES (?, ?, 1)"
+            " ON CONFLICT (hook_id, file_id) DO UPDATE SET failures = failures + 1",
+            pairs,
+        )
+    connection.execute("COMMIT")
+    connection.close()
+
+
+def best_of(repeats: int, function) -> float:
+    """Times a function, returning the fastest of several calls in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--failures", type=int, default=2000000)
+    parser.add_argument("--failures-per-run", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--uniform", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as history_folder:
+        history = ScanHistoryRepository(enabled=True)
+        history.history_path = Path(history_folder) / "history.db"
+
+        start = time.perf_counter()
+        seed(history, args.failures, args.failures_per_run, args.uniform)
+        print(
+            f"seeded {args.failures} failures in {time.perf_counter() - start:.1f}s"
+            f" ({history.history_path.stat().st_size / 1_000_000:.0f}MB)"
+        )
+
+        scan_failures = [
+            FailureRecord(repo="benchmark", hook_id="hook-1", file=f"src/module_{i}.py")
+            for i in range(args.failures_per_run)
+        ]
+        record = best_of(args.repeats, lambda: history.record(False, scan_failures))
+        print(f"record a scan with {len(scan_failures)} failures   {record:8.1f}ms")
+
+        for days in [30, 365]:
+            trends = best_of(args.repeats, lambda: history.failure_trends(days, 20))
+            summary = best_of(args.repeats, lambda: history.run_summary(days))
+            print(f"top 20 failures over {days:3d} days          {trends:8.1f}ms")
+            print(f"run summary over {days:3d} days              {summary:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measures how `secureli scan --mode all-files --jobs N` scales on a synthetic repository, by
+scanning a fresh git repository of many small files of varied sizes with a fake `pre-commit`
+whose hook costs CPU time in proportion to the size of each file it checks.
+
+Each job count is reported with its wall time and speedup over a single job. Speedup should
+stay close to the job count until it reaches the number of CPUs available.
+
+Usage: python scripts/benchmark-scan-sharding.py [--files 50000] [--jobs 1 2 4 8] [--work 20]
+"""
+import argparse
+import os
+import random
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from secureli.abstractions.pre_commit import PreCommitAbstraction
+from secureli.repositories.repo_files import RepoFilesRepository
+from secureli.services.scanner import ScannerService, ScanMode
+from secureli.utilities.patterns import IgnoreMatcher
+
+FAKE_PRE_COMMIT = """#!{python}
+import hashlib
+import subprocess
+import sys
+
+args = sys.argv[1:]
+if "--files" in args:
+    files = args[args.index("--files") + 1 :]
+else:
+    output = subprocess.run(["git", "ls-files", "-z"], stdout=subprocess.PIPE).stdout
+    files = [name.decode() for name in output.split(b"\\0") if name]
+
+for file in files:
+    with open(file, "rb") as f:
+        contents = f.read()
+    for _ in range({work}):
+        contents = hashlib.sha256(contents).digest() + contents[32:]
+print("synthetic hook".ljust(70, ".") + "Passed")
+"""
+
+
+def create_repo(folder: Path, file_count: int, work: int):
+    """Creates a git repository of files of varied sizes, with a fake pre-commit"""
+    random.seed(0)
+    for index in range(file_count):
+        file_path = folder / f"package_{index % 100}" / f"module_{index}.py"
+        file_path.parent.mkdir(exist_ok=True)
+        file_path.write_text("x = 1\n" * random.randint(1, 400))
+
+    (folder / ".pre-commit-config.yaml").write_text(
+        yaml.dump({"repos": [{"repo": "local", "hooks": [{"id": "synthetic-hook"}]}]})
+    )
+    subprocess.run(["git", "init", "-q"], cwd=folder, check=True)
+    subprocess.run(["git", "add", "."], cwd=folder, check=True)
+
+    bin_folder = folder.parent / "bin"
+    bin_folder.mkdir()
+    script_path = bin_folder / "pre-commit"
+    script_path.write_text(FAKE_PRE_COMMIT.format(python=sys.executable, work=work))
+    script_path.chmod(script_path.stat().st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = str(bin_folder) + os.pathsep + os.environ["PATH"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--work", type=int, default=20, help="Hash rounds per file, the hook's cost"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        repo_folder = Path(temp_folder) / "repo"
+        repo_folder.mkdir()
+        create_repo(repo_folder, args.files, args.work)
+        os.chdir(repo_folder)
+
+        scanner = ScannerService(
+            PreCommitAbstraction(command_timeout_seconds=3600),
+            repo_files=RepoFilesRepository(
+                max_file_size=0,
+                ignored_file_extensions=[],
+                ignore_matcher=IgnoreMatcher([]),
+            ),
+        )
+        print(f"{args.files} files, {os.cpu_count()} CPUs")
+        baseline = None
+        for jobs in args.jobs:
+            start = time.perf_counter()
+            scan_result = scanner.scan_repo(ScanMode.ALL_FILES, jobs=jobs)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"--jobs {jobs:<3} {elapsed:8.2f}s   speedup {baseline / elapsed:5.2f}x"
+                f"   {'passed' if scan_result.successful else 'failed'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Compares buffered and streaming scans against a fake `pre-commit` that prints the results of
+many hooks, some failing across many files, pausing between hooks as real hooks would.
+
+For each mode this reports the time until the first line of output could be shown, the total
+time, the number of failures parsed, and the peak Python memory allocated during the scan.
+Buffered scans can only show output once pre-commit has exited; streaming scans show each
+line, and parse each failure, as it arrives.
+
+Usage: python scripts/benchmark-scan-streaming.py [--hooks 50] [--files 2000] [--delay 0.02]
+"""
+import argparse
+import os
+import stat
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import yaml
+
+from secureli.abstractions.pre_commit import PreCommitAbstraction
+from secureli.services.scanner import ScannerService, ScanMode
+
+FAKE_PRE_COMMIT = """#!{python}
+import sys
+import time
+
+hooks, files, delay = {hooks}, {files}, {delay}
+for hook in range(hooks):
+    time.sleep(delay)
+    if hook % 5:
+        print(f"hook {{hook}}".ljust(70, ".") + "Passed", flush=True)
+        continue
+    print(f"hook {{hook}}".ljust(70, ".") + "Failed")
+    print(f"- hook id: hook-{{hook}}")
+    print("- exit code: 1")
+    print()
+    for file in range(files):
+        print(f"src/module_{{file}}.py:1:1: E001 something is wrong")
+    print(flush=True)
+sys.exit(1)
+"""
+
+
+def write_fake_pre_commit(folder: Path, hooks: int, files: int, delay: float):
+    """Writes a fake pre-commit executable and a matching .pre-commit-config.yaml"""
+    script_path = folder / "pre-commit"
+    script_path.write_text(
+        FAKE_PRE_COMMIT.format(
+            python=sys.executable, hooks=hooks, files=files, delay=delay
+        )
+    )
+    script_path.chmod(script_path.stat().st_mode | stat.S_IEXEC)
+
+    config = {
+        "repos": [
+            {
+                "repo": "https://example.com/hooks",
+                "hooks": [{"id": f"hook-{hook}"} for hook in range(hooks)],
+            }
+        ]
+    }
+    (folder / ".pre-commit-config.yaml").write_text(yaml.dump(config))
+
+
+def time_scan(scanner: ScannerService, streaming: bool) -> dict:
+    """Runs one scan, timing its first output and measuring its peak memory"""
+    first_output = None
+    start = time.perf_counter()
+
+    def on_output(line: str):
+        nonlocal first_output
+        if first_output is None:
+            first_output = time.perf_counter() - start
+
+    tracemalloc.start()
+    scan_result = scanner.scan_repo(
+        ScanMode.ALL_FILES, on_output=on_output if streaming else None
+    )
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = time.perf_counter() - start
+
+    return {
+        "first_output": first_output if streaming else total,
+        "total": total,
+        "failures": len(scan_result.failures),
+        "peak_memory": peak_memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hooks", type=int, default=50)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_fake_pre_commit(Path(folder), args.hooks, args.files, args.delay)
+        os.environ["PATH"] = folder + os.pathsep + os.environ["PATH"]
+        os.chdir(folder)
+
+        scanner = ScannerService(PreCommitAbstraction(command_timeout_seconds=300))
+        for name, streaming in [("buffered", False), ("streaming", True)]:
+            result = time_scan(scanner, streaming)
+            print(
+                f"{name:<10} first output {result['first_output'] * 1000:8.1f}ms"
+                f"   total {result['total'] * 1000:8.1f}ms"
+                f"   failures {result['failures']:7d}"
+                f"   peak memory {result['peak_memory'] / 1024 / 1024:7.1f}MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
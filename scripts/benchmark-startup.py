@@ -0,0 +1,65 @@
+"""
+Measures the wall time of seCureLI commands from a cold interpreter, as a user experiences
+them: each run starts a fresh Python process, so module imports and container setup are
+included every time.
+
+`secureli --help` should never need to read .secureli.yaml or .gitignore, or compile ignore
+patterns. `secureli scan` is measured against the given repository, and includes running
+pre-commit, so it is best compared between runs on the same machine and repository.
+
+Usage: python scripts/benchmark-startup.py [--runs 10] [--repo .] [--skip-scan]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+def time_command(args: list[str], cwd: str, runs: int) -> list[float]:
+    """Runs seCureLI with the given arguments in fresh interpreters, timing each run"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "secureli.main", *args],
+            cwd=cwd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_interpreter(cwd: str, runs: int) -> list[float]:
+    """Times a bare interpreter, as the floor for any command's startup"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], cwd=cwd)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    print(
+        f"{name:<20} median {statistics.median(timings) * 1000:8.1f}ms"
+        f"   min {min(timings) * 1000:8.1f}ms   max {max(timings) * 1000:8.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--repo", default=".", help="The repository to run commands in")
+    parser.add_argument("--skip-scan", action="store_true")
+    args = parser.parse_args()
+
+    report("python -c pass", time_interpreter(args.repo, args.runs))
+    report("secureli --help", time_command(["--help"], args.repo, args.runs))
+    if not args.skip_scan:
+        report("secureli scan", time_command(["scan", "--yes"], args.repo, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Measures how much sending a scan's log entry adds to a command, against a local stand-in for
+the instrumentation backend that takes a configurable time to respond.
+
+Each endpoint latency is reported with the time added by posting the entry inline (as scans
+used to, with a blocking request), and by spooling it and sending it in the background, up to
+the exit budget. Inline posting adds the endpoint's full latency; spooling adds no more than
+the exit budget, however slow the endpoint is, and leaves unsent entries for the next command.
+
+Usage: python scripts/benchmark-telemetry-latency.py [--latencies 0 0.1 0.5 2] [--exit-budget 0.5]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from secureli.repositories.telemetry_spool import TelemetrySpoolRepository
+from secureli.services.logging import LogAction, LogEntry, LogStatus
+from secureli.services.telemetry import TelemetryService
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Accepts log entries after sleeping for the server's latency"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.server.latency)
+        self.send_response(202)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def log_entry() -> LogEntry:
+    """A log entry like the one each scan sends"""
+    return LogEntry(
+        username="benchmark",
+        machineid="benchmark",
+        secureli_version="0.0.0",
+        status=LogStatus.success,
+        action=LogAction.scan,
+    )
+
+
+def time_inline(url: str) -> float:
+    """Times posting a log entry inline, as scans used to"""
+    start = time.perf_counter()
+    requests.post(url=url, headers={"Api-Key": "benchmark"}, data=log_entry().json())
+    return time.perf_counter() - start
+
+
+def time_spooled(spool_folder: Path, exit_budget: float) -> tuple[float, int]:
+    """
+    Times spooling a log entry and waiting for it at exit
+    :return: The time taken and how many entries were left spooled
+    """
+    spool = TelemetrySpoolRepository(max_entries=10000)
+    spool.spool_path = spool_folder
+    telemetry = TelemetryService(
+        spool=spool,
+        batch_size=50,
+        max_retries=2,
+        request_timeout_seconds=5,
+        exit_budget_seconds=exit_budget,
+    )
+
+    start = time.perf_counter()
+    telemetry.enqueue(log_entry())
+    flusher = TelemetryService._flusher
+    telemetry.wait_for_flush()
+    elapsed = time.perf_counter() - start
+    unsent = len(list(spool_folder.iterdir()))
+
+    # Let the entry finish sending, so it doesn't carry over into the next measurement
+    if flusher is not None:
+        flusher.join()
+    return elapsed, unsent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latencies", type=float, nargs="+", default=[0, 0.1, 0.5, 2])
+    parser.add_argument("--exit-budget", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/log"
+    os.environ["API_ENDPOINT"] = url
+    os.environ["API_KEY"] = "benchmark"
+
+    with tempfile.TemporaryDirectory() as spool_folder:
+        for latency in args.latencies:
+            server.latency = latency
+            inline = time_inline(url)
+            spooled, left_spooled = time_spooled(Path(spool_folder), args.exit_budget)
+            print(
+                f"endpoint latency {latency * 1000:7.0f}ms"
+                f"   inline {inline * 1000:7.1f}ms"
+                f"   spooled {spooled * 1000:7.1f}ms"
+                f"   entries left for the next command {left_spooled}"
+            )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -110,3 +110,14 @@ class TyperEcho(EchoAbstraction):
 
     def confirm(self, message: str, default_response: Optional[bool] = False) -> bool:
         return typer.confirm(message, default=default_response, show_default=True)
+
+
+class NonInteractiveEcho(TyperEcho):
+    """
+    Prints like TyperEcho, but answers every confirmation with its default response, for
+    commands run where no one can answer, such as by the daemon.
+    """
+
+    def confirm(self, message: str, default_response: Optional[bool] = False) -> bool:
+        self._echo(f"{message} [{'Y/n' if default_response else 'y/N'}]: ")
+        return bool(default_response)
@@ -0,0 +1,347 @@
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import pydantic
+
+from secureli.utilities.patterns import IgnoreMatcher
+
+
+class WatchedChanges(pydantic.BaseModel):
+    """
+    The files that changed while being watched, relative to the watched folder
+    """
+
+    paths: list[str] = []
+
+    """True if more files changed than could be kept track of, so which ones is unknown"""
+    overflowed: bool = False
+
+
+# Folders that are never watched: git's own, and seCureLI's, which it writes to as it scans
+_unwatched_folders = {".git", ".secureli"}
+
+# The inotify flags used, as defined in <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+
+# The events each folder is watched for: files finished being written or moved in, and new folders
+_watch_mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_ONLYDIR
+
+# The fixed part of each inotify event: its watch, mask, cookie and the length of its name
+_event_header = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """
+    Watches the files in the current folder for changes, leaving out git's and seCureLI's own
+    folders and anything ignored by .gitignore or .secureli.yaml. On Linux, the operating
+    system reports changes through inotify as they happen. Elsewhere, or if inotify is
+    unavailable or out of watches, even once watching, the folder is polled for changed
+    modification times instead. Changed files are reported in batches, once no more have changed for a moment,
+    and at most max_pending_paths are kept track of between batches.
+    """
+
+    def __init__(
+        self,
+        ignore_matcher: IgnoreMatcher,
+        max_pending_paths: int,
+        poll_interval_seconds: float,
+        polling: bool,
+    ):
+        self.ignore_matcher = ignore_matcher
+        self.max_pending_paths = max_pending_paths
+        self.poll_interval_seconds = poll_interval_seconds
+        self.polling = polling
+        self.backend: Optional[Union["_InotifyBackend", "_PollingBackend"]] = None
+
+    def start(self) -> str:
+        """
+        Starts watching the current folder, and everything within it
+        :return: How changes are watched for, either "inotify" or "polling"
+        """
+        if not self.polling and sys.platform.startswith("linux"):
+            try:
+                self.backend = _InotifyBackend(self)
+                return self.backend.name
+            except OSError:
+                pass
+
+        self.backend = _PollingBackend(self)
+        return self.backend.name
+
+    def stop(self):
+        """Stops watching, releasing anything held to do so"""
+        if self.backend:
+            self.backend.close()
+            self.backend = None
+
+    def next_changes(self, debounce_seconds: float) -> WatchedChanges:
+        """
+        Waits for files to change, then until none have changed for debounce_seconds, so that
+        a burst of changes, such as an editor saving several files, is reported as one batch
+        :param debounce_seconds: How long no files must change for to end the batch
+        :return: The changed files, each listed once
+        """
+        paths: set[str] = set()
+        overflowed = False
+        while True:
+            try:
+                changed = self.backend.read_changes(
+                    debounce_seconds if paths or overflowed else None
+                )
+            except OSError:
+                if self.backend.name != _InotifyBackend.name:
+                    raise
+                # A new folder couldn't be watched, e.g. as inotify ran out of watches, so
+                # poll from now on, and as changes in it were missed, report them as unknown
+                self.backend.close()
+                self.backend = _PollingBackend(self)
+                changed = None
+
+            if changed is None or len(paths) + len(changed) > self.max_pending_paths:
+                overflowed = True
+                paths.clear()
+            elif changed and not overflowed:
+                paths.update(changed)
+            elif not changed:
+                return WatchedChanges(paths=sorted(paths), overflowed=overflowed)
+
+    def walk(self, folder: str) -> Iterator[tuple[str, list[str]]]:
+        """
+        Walks the watched folders within a folder, skipping those that aren't watched
+        :param folder: The folder to walk, relative to the current folder
+        :return: An iterator of each watched folder and the watched files directly within it
+        """
+        for folder_path, folder_names, file_names in os.walk(folder):
+            folder_path = Path(folder_path).as_posix()
+            folder_names[:] = [
+                folder_name
+                for folder_name in folder_names
+                if self.is_watched(Path(folder_path, folder_name).as_posix(), True)
+            ]
+            yield folder_path, [
+                path
+                for path in (
+                    Path(folder_path, file_name).as_posix() for file_name in file_names
+                )
+                if self.is_watched(path, False)
+            ]
+
+    def is_watched(self, path: str, is_folder: bool) -> bool:
+        """
+        True if changes to the path are reported
+        :param path: A path relative to the current folder, e.g. "src/main.py"
+        :param is_folder: Whether the path is a folder
+        :return: True if the path is watched, otherwise False
+        """
+        if path.split("/", 1)[0] in _unwatched_folders:
+            return False
+        if is_folder:
+            return path == "." or not self.ignore_matcher.is_directory_ignored(path)
+        return not self.ignore_matcher.is_ignored(path)
+
+
+class _InotifyBackend:
+    """
+    Has the Linux kernel report changes through inotify, with a watch on every watched folder.
+    inotify is called through ctypes, as the standard library has no bindings for it.
+    """
+
+    name = "inotify"
+
+    """How many bytes of events to read at a time"""
+    read_size = 64 * 1024
+
+    def __init__(self, watcher: FileWatcher):
+        self.watcher = watcher
+        libc = ctypes.CDLL(None, use_errno=True)
+        try:
+            inotify_init1 = libc.inotify_init1
+            self.inotify_add_watch = libc.inotify_add_watch
+        except AttributeError:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        inotify_init1.argtypes = [ctypes.c_int]
+        self.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+
+        self.fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise _errno_error()
+
+        # The folder each watch is on, by its watch descriptor
+        self.watched_folders: dict[int, str] = {}
+        try:
+            self._watch_tree(".")
+        except OSError:
+            self.close()
+            raise
+
+    def read_changes(self, timeout_seconds: Optional[float]) -> Optional[list[str]]:
+        """
+        Waits for watched files to change
+        :param timeout_seconds: How long to wait, or None to wait for as long as it takes
+        :return: The changed files, empty if none changed in time, or None if the kernel's
+        queue of events overflowed, so some were lost
+        """
+        deadline = (
+            None if timeout_seconds is None else time.monotonic() + timeout_seconds
+        )
+        while True:
+            remaining = (
+                None if deadline is None else max(deadline - time.monotonic(), 0)
+            )
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return []
+
+            try:
+                events = os.read(self.fd, self.read_size)
+            except BlockingIOError:
+                continue
+
+            changed = self._parse_events(events)
+            if changed is None or changed:
+                return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def _parse_events(self, events: bytes) -> Optional[list[str]]:
+        """
+        Finds the watched files changed by a buffer of inotify events, watching any new folders
+        :param events: The events, as read from inotify
+        :return: The changed files, or None if the events include the queue overflowing
+        """
+        changed = []
+        overflowed = False
+        offset = 0
+        while offset < len(events):
+            wd, mask, _, name_length = _event_header.unpack_from(events, offset)
+            offset += _event_header.size
+            name = events[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & _IN_Q_OVERFLOW:
+                overflowed = True
+                continue
+            if mask & _IN_IGNORED:
+                # The folder was deleted or moved away, so its watch is gone
+                self.watched_folders.pop(wd, None)
+                continue
+
+            folder = self.watched_folders.get(wd)
+            if folder is None or not name:
+                continue
+
+            path = Path(folder, os.fsdecode(name)).as_posix()
+            if mask & _IN_ISDIR:
+                # Files may have been written to a new folder before it was watched
+                if self.watcher.is_watched(path, True):
+                    changed.extend(self._watch_tree(path))
+            elif mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                if self.watcher.is_watched(path, False):
+                    changed.append(path)
+
+        return None if overflowed else changed
+
+    def _watch_tree(self, folder: str) -> list[str]:
+        """
+        Watches a folder and every watched folder within it. A folder moved within the tree
+        keeps its watch, which is updated with its new path.
+        :param folder: The folder to watch
+        :return: The watched files within the folder
+        """
+        files = []
+        for folder_path, file_paths in self.watcher.walk(folder):
+            wd = self.inotify_add_watch(self.fd, os.fsencode(folder_path), _watch_mask)
+            if wd < 0:
+                error = _errno_error(folder_path)
+                if error.errno in (errno.ENOENT, errno.ENOTDIR):
+                    continue  # Removed since it was listed
+                raise error
+
+            self.watched_folders[wd] = folder_path
+            files.extend(file_paths)
+
+        return files
+
+
+class _PollingBackend:
+    """
+    Finds changes by listing every watched file's modification time and size each
+    poll_interval_seconds, and comparing them with the previous listing
+    """
+
+    name = "polling"
+
+    def __init__(self, watcher: FileWatcher):
+        self.watcher = watcher
+        self.file_states = self._file_states()
+
+    def read_changes(self, timeout_seconds: Optional[float]) -> Optional[list[str]]:
+        """
+        Waits for watched files to change
+        :param timeout_seconds: How long to wait, or None to wait for as long as it takes
+        :return: The changed files, or empty if none changed in time
+        """
+        deadline = (
+            None if timeout_seconds is None else time.monotonic() + timeout_seconds
+        )
+        while True:
+            interval = self.watcher.poll_interval_seconds
+            if deadline is not None:
+                interval = min(interval, max(deadline - time.monotonic(), 0))
+            time.sleep(interval)
+
+            file_states = self._file_states()
+            changed = [
+                path
+                for path, state in file_states.items()
+                if self.file_states.get(path) != state
+            ]
+            self.file_states = file_states
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        self.file_states = {}
+
+    def _file_states(self) -> dict[str, tuple[int, int]]:
+        """
+        :return: The modification time and size of every watched file, by path
+        """
+        file_states = {}
+        for _, file_paths in self.watcher.walk("."):
+            for path in file_paths:
+                try:
+                    stat = os.stat(path)
+                    file_states[path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    pass  # Removed since it was listed
+
+        return file_states
+
+
+def _errno_error(path: Optional[str] = None) -> OSError:
+    """
+    :return: An OSError for the error a libc call just set errno to
+    """
+    error_number = ctypes.get_errno()
+    return OSError(error_number, os.strerror(error_number), path)
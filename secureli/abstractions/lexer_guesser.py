@@ -1,20 +1,153 @@
+import fnmatch
+import json
+import os
+import re
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Optional
 
+import pygments
 import pygments.lexers
+import pygments.plugin
+from pygments.util import ClassNotFound
 
 
 class LexerGuesser(ABC):
     """Represents guessing the lexer for a given file."""
 
+    """How many characters of a file guess_lexer needs to see, or None for all of them"""
+    content_sample_size: Optional[int] = None
+
     @abstractmethod
     def guess_lexer(self, file_path: Path, file_contents: str) -> str:
         pass
 
+    def guess_lexer_from_file_name(self, file_path: Path) -> Optional[str]:
+        """
+        Guesses the lexer from the file's name alone, without its contents
+        :param file_path: The path of the file to guess the lexer of
+        :raises ValueError: No lexer could ever match a file with this name
+        :return: The name of the lexer, or None if the file's contents are needed to decide
+        """
+        return None
+
+    def fingerprint(self) -> str:
+        """
+        Identifies how this guesser classifies files, so that previously guessed lexers can be
+        discarded when that changes
+        :return: A string that differs between guessers that may guess differently
+        """
+        return f"{type(self).__name__}:{self.content_sample_size}"
+
 
 class PygmentsLexerGuesser(LexerGuesser):
     """Pygments-implementation of LexerGuesser"""
 
+    def fingerprint(self) -> str:
+        return f"{super().fingerprint()}:pygments-{pygments.__version__}"
+
     def guess_lexer(self, file_path: Path, file_contents: str) -> str:
         lexer = pygments.lexers.guess_lexer_for_filename(file_path, file_contents)
         return lexer.name
+
+
+class ExtensionLexerGuesser(PygmentsLexerGuesser):
+    """
+    Pygments-implementation of LexerGuesser that decides from the file extension whenever
+    only one lexer claims it, and only falls back to pygments' content analysis (on the
+    start of the file) when the extension is ambiguous. The extension table is derived
+    from pygments' lexers and cached on disk per pygments version, as building it requires
+    importing every lexer.
+    """
+
+    content_sample_size = 4096
+    cache_path = Path(".secureli") / "lexer-extensions.json"
+
+    def __init__(self):
+        self._extension_lexers: Optional[dict[str, list[str]]] = None
+        self._other_file_names: Optional[re.Pattern] = None
+
+    def guess_lexer_from_file_name(self, file_path: Path) -> Optional[str]:
+        self._load_extension_table()
+        file_name = file_path.name
+
+        # Names like CMakeLists.txt or *.py[cod] are claimed by patterns other than a
+        # simple extension, so leave those to pygments
+        if self._other_file_names and self._other_file_names.match(file_name):
+            return None
+
+        lexer_names = set()
+        for index, character in enumerate(file_name):
+            if character == ".":
+                lexer_names.update(self._extension_lexers.get(file_name[index:], []))
+
+        if not lexer_names:
+            raise ClassNotFound(f"no lexer for filename {file_name!r} found")
+
+        return lexer_names.pop() if len(lexer_names) == 1 else None
+
+    def _load_extension_table(self):
+        """Loads the extension table from the disk cache, building and caching it if needed"""
+        if self._extension_lexers is not None:
+            return
+
+        table = self._read_cached_table() or self._build_table()
+        self._extension_lexers = table["extensions"]
+        other_file_names = table["other_file_names"]
+        self._other_file_names = (
+            re.compile("|".join(fnmatch.translate(p) for p in other_file_names))
+            if other_file_names
+            else None
+        )
+
+    def _read_cached_table(self) -> Optional[dict]:
+        """Reads the cached table, or returns None if it's missing or for another pygments"""
+        try:
+            with open(self.cache_path, "r", encoding="utf8") as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return table if table.get("pygments_version") == pygments.__version__ else None
+
+    def _build_table(self) -> dict:
+        """
+        Maps each simple extension pattern (e.g. *.py) to the lexers claiming it, just as
+        guess_lexer_for_filename would match them, and writes the table to the cache
+        :return: The table, including any file name patterns that aren't simple extensions
+        """
+        lexer_classes = [
+            getattr(pygments.lexers, class_name)
+            for class_name in pygments.lexers.LEXERS
+        ] + list(pygments.plugin.find_plugin_lexers())
+
+        extensions: dict[str, list[str]] = {}
+        other_file_names = set()
+        for lexer_class in lexer_classes:
+            for pattern in [*lexer_class.filenames, *lexer_class.alias_filenames]:
+                extension = pattern[1:]
+                if pattern.startswith("*.") and not any(c in extension for c in "*?["):
+                    lexer_names = extensions.setdefault(extension, [])
+                    if lexer_class.name not in lexer_names:
+                        lexer_names.append(lexer_class.name)
+                else:
+                    other_file_names.add(pattern)
+
+        table = {
+            "pygments_version": pygments.__version__,
+            "extensions": extensions,
+            "other_file_names": sorted(other_file_names),
+        }
+        self._write_cached_table(table)
+        return table
+
+    def _write_cached_table(self, table: dict):
+        """Atomically writes the table to the cache, ignoring failures"""
+        temp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf8") as f:
+                json.dump(table, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
@@ -1,9 +1,17 @@
+import math
+import os
+import re
+import signal
 import subprocess
+import threading
+import time
 
-from typing import Optional
+from typing import Callable, IO, Optional
 
 import pydantic
 
+from secureli.utilities.tracing import tracer, traced
+
 
 class InstallFailedError(Exception):
     """Attempting to invoke pre-commit to set up our repo for the given template did not succeed"""
@@ -30,6 +38,9 @@ class ExecuteResult(pydantic.BaseModel):
 
     successful: bool
     output: str
+    timed_out: bool = False
+    timed_out_hook: Optional[str] = None
+    hook_durations: dict[str, float] = {}
 
 
 class InstallResult(pydantic.BaseModel):
@@ -49,8 +60,10 @@ class PreCommitAbstraction:
     def __init__(
         self,
         command_timeout_seconds: int,
+        hook_timeout_seconds: int = 0,
     ):
         self.command_timeout_seconds = command_timeout_seconds
+        self.hook_timeout_seconds = hook_timeout_seconds
 
     def install(self, language: str) -> InstallResult:
         """
@@ -60,6 +73,7 @@ class PreCommitAbstraction:
         :raises InstallFailedError if the template was found, but an error occurred installing it
         """
 
+        tracer.count("subprocesses_spawned")
         completed_process = subprocess.run(["pre-commit", "install"])
         if completed_process.returncode != 0:
             raise InstallFailedError(
@@ -74,7 +88,12 @@ class PreCommitAbstraction:
         )
 
     def execute_hooks(
-        self, all_files: bool = False, hook_id: Optional[str] = None
+        self,
+        all_files: bool = False,
+        hook_id: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        files: Optional[list[str]] = None,
+        skip_hook_ids: Optional[list[str]] = None,
     ) -> ExecuteResult:
         """
         Execute the configured hooks against the repository, either against your staged changes
@@ -82,7 +101,14 @@ class PreCommitAbstraction:
         :param all_files: True if we want to scan all files, default to false, which only
         scans our staged changes we're about to commit
         :param hook_id: A specific hook to run. If None, all hooks will be run
-        :return: ExecuteResult, indicating success or failure.
+        :param files: If provided, scan only these files instead, across as many pre-commit
+        runs as it takes to fit them within the operating system's command line limit
+        :param on_output: If provided, called with each line of output (including its line
+        ending) as soon as pre-commit writes it, rather than only once pre-commit has exited
+        :param skip_hook_ids: If provided, hooks that pre-commit should skip, on top of any
+        already skipped through the SKIP environment variable
+        :return: ExecuteResult, indicating success, failure or timing out, either overall or
+        within a single hook, along with how long each hook took.
         """
         # always log colors so that we can print them out later, which does not happen by default
         # when we capture the output (which we do so we can add it to our logs).
@@ -98,14 +124,45 @@ class PreCommitAbstraction:
         if hook_id:
             subprocess_args.append(hook_id)
 
-        completed_process = subprocess.run(subprocess_args, stdout=subprocess.PIPE)
-        output = (
-            completed_process.stdout.decode("utf8") if completed_process.stdout else ""
+        if files is None:
+            return self._run(
+                subprocess_args,
+                on_output=on_output,
+                hook_timeout_seconds=self.hook_timeout_seconds,
+                skip_hook_ids=skip_hook_ids,
+            )
+
+        execute_results = []
+        for chunk in self._file_chunks([*subprocess_args, "--files"], files):
+            execute_result = self._run(
+                [*subprocess_args, "--files", *chunk],
+                on_output=on_output,
+                hook_timeout_seconds=self.hook_timeout_seconds,
+                skip_hook_ids=skip_hook_ids,
+            )
+            execute_results.append(execute_result)
+            if execute_result.timed_out:
+                break
+
+        hook_durations = {}
+        for execute_result in execute_results:
+            for hook_name, seconds in execute_result.hook_durations.items():
+                hook_durations[hook_name] = hook_durations.get(hook_name, 0) + seconds
+
+        return ExecuteResult(
+            successful=all(result.successful for result in execute_results),
+            output="".join(result.output for result in execute_results),
+            timed_out=any(result.timed_out for result in execute_results),
+            timed_out_hook=next(
+                (
+                    result.timed_out_hook
+                    for result in execute_results
+                    if result.timed_out_hook
+                ),
+                None,
+            ),
+            hook_durations=hook_durations,
         )
-        if completed_process.returncode != 0:
-            return ExecuteResult(successful=False, output=output)
-        else:
-            return ExecuteResult(successful=True, output=output)
 
     def autoupdate_hooks(
         self,
@@ -149,14 +206,7 @@ class PreCommitAbstraction:
 
             subprocess_args.extend(repo_args)
 
-        completed_process = subprocess.run(subprocess_args, stdout=subprocess.PIPE)
-        output = (
-            completed_process.stdout.decode("utf8") if completed_process.stdout else ""
-        )
-        if completed_process.returncode != 0:
-            return ExecuteResult(successful=False, output=output)
-        else:
-            return ExecuteResult(successful=True, output=output)
+        return self._run(subprocess_args)
 
     def update(self) -> ExecuteResult:
         """
@@ -165,14 +215,7 @@ class PreCommitAbstraction:
         """
         subprocess_args = ["pre-commit", "install-hooks", "--color", "always"]
 
-        completed_process = subprocess.run(subprocess_args, stdout=subprocess.PIPE)
-        output = (
-            completed_process.stdout.decode("utf8") if completed_process.stdout else ""
-        )
-        if completed_process.returncode != 0:
-            return ExecuteResult(successful=False, output=output)
-        else:
-            return ExecuteResult(successful=True, output=output)
+        return self._run(subprocess_args)
 
     def remove_unused_hooks(self) -> ExecuteResult:
         """
@@ -183,11 +226,264 @@ class PreCommitAbstraction:
         """
         subprocess_args = ["pre-commit", "gc", "--color", "always"]
 
-        completed_process = subprocess.run(subprocess_args, stdout=subprocess.PIPE)
-        output = (
-            completed_process.stdout.decode("utf8") if completed_process.stdout else ""
+        return self._run(subprocess_args)
+
+    @traced("PreCommitAbstraction._run")
+    def _run(
+        self,
+        subprocess_args: list[str],
+        on_output: Optional[Callable[[str], None]] = None,
+        hook_timeout_seconds: int = 0,
+        skip_hook_ids: Optional[list[str]] = None,
+    ) -> ExecuteResult:
+        """
+        Runs a pre-commit command in its own process group, so that it can be stopped along with
+        every hook it started if it takes longer than command_timeout_seconds overall (if above
+        0), or if waiting for it is interrupted
+        :param subprocess_args: The pre-commit command to run
+        :param on_output: If provided, called with each line of output as it arrives
+        :param hook_timeout_seconds: If above 0, also stop pre-commit if this long passes
+        without a hook reporting its result, once the first hook has started. Before then,
+        pre-commit is installing any hook environments it doesn't have yet, which can take
+        minutes on a first run, so only command_timeout_seconds applies to that.
+        :param skip_hook_ids: If provided, hooks to add to pre-commit's SKIP environment variable
+        :return: ExecuteResult, with whatever output was produced before any timeout
+        """
+        env = None
+        if skip_hook_ids:
+            env = dict(os.environ)
+            env["SKIP"] = ",".join(
+                hook_id
+                for hook_id in [*env.get("SKIP", "").split(","), *skip_hook_ids]
+                if hook_id.strip()
+            )
+
+        tracer.count("subprocesses_spawned")
+        process = subprocess.Popen(
+            subprocess_args, stdout=subprocess.PIPE, start_new_session=True, env=env
         )
-        if completed_process.returncode != 0:
-            return ExecuteResult(successful=False, output=output)
-        else:
-            return ExecuteResult(successful=True, output=output)
+        reader = _OutputReader(process.stdout, on_output)
+        deadline = (
+            time.monotonic() + self.command_timeout_seconds
+            if self.command_timeout_seconds > 0
+            else math.inf
+        )
+        timed_out_hook = None
+
+        try:
+            while True:
+                wait_until = deadline
+                if hook_timeout_seconds > 0:
+                    # Until then, checks back periodically for the first hook starting
+                    hook_clock = (
+                        reader.last_hook_finished
+                        if reader.hooks_started
+                        else time.monotonic()
+                    )
+                    wait_until = min(wait_until, hook_clock + hook_timeout_seconds)
+
+                try:
+                    process.wait(
+                        timeout=(
+                            max(wait_until - time.monotonic(), 0)
+                            if wait_until != math.inf
+                            else None
+                        )
+                    )
+                    break
+                except subprocess.TimeoutExpired:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        break
+                    if (
+                        hook_timeout_seconds > 0
+                        and reader.hooks_started
+                        and now >= reader.last_hook_finished + hook_timeout_seconds
+                    ):
+                        timed_out_hook = reader.running_hook()
+                        break
+        finally:
+            # Also stops pre-commit and its hooks if interrupted, e.g. by Ctrl+C, as they run
+            # in their own process group, which the terminal's signals don't reach
+            timed_out = process.returncode is None
+            if timed_out:
+                self._kill_process_group(process)
+
+        reader.join()
+
+        return ExecuteResult(
+            successful=not timed_out and process.returncode == 0,
+            output=reader.output(),
+            timed_out=timed_out,
+            timed_out_hook=timed_out_hook,
+            hook_durations=reader.hook_durations,
+        )
+
+    def _file_chunks(
+        self, subprocess_args: list[str], files: list[str]
+    ) -> list[list[str]]:
+        """
+        Splits a list of files into chunks that each fit on a command line after the given
+        arguments, alongside the current environment
+        :param subprocess_args: The arguments preceding the files
+        :param files: The files to split
+        :return: The chunks of files, in their original order
+        """
+        limit = _command_line_limit() - _argument_size(subprocess_args)
+        chunks = []
+        chunk = []
+        chunk_size = 0
+        for file in files:
+            file_size = _argument_size([file])
+            if chunk and chunk_size + file_size > limit:
+                chunks.append(chunk)
+                chunk = []
+                chunk_size = 0
+            chunk.append(file)
+            chunk_size += file_size
+
+        if chunk:
+            chunks.append(chunk)
+
+        return chunks
+
+    def _kill_process_group(self, process: subprocess.Popen):
+        """
+        Kills a process started by _run, along with every process it started
+        :param process: The process to kill
+        """
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+
+def _command_line_limit() -> int:
+    """
+    Determines how many bytes of arguments a new process can be given, leaving room for the
+    current environment and some headroom for anything pre-commit adds
+    :return: The number of bytes available for arguments
+    """
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (AttributeError, ValueError, OSError):
+        # Windows limits the whole command line to 32767 characters, and has no sysconf
+        return 32767 - 2048
+
+    environment_size = _argument_size(
+        [f"{name}={value}" for name, value in os.environ.items()]
+    )
+    return arg_max - environment_size - 4096
+
+
+def _argument_size(arguments: list[str]) -> int:
+    """
+    Estimates the space the given arguments take up when passed to a new process, which is
+    their encoded length plus a terminator and a pointer each
+    :param arguments: The arguments to measure
+    :return: The size of the arguments in bytes
+    """
+    return sum(len(os.fsencode(argument)) + 1 + 8 for argument in arguments)
+
+
+class _OutputReader:
+    """
+    Reads a process's output on a background thread, so the process can be timed out while it
+    is still writing, and keeps track of when pre-commit last reported a hook's result. Hooks
+    are timed from when pre-commit starts writing their result line, which it does just before
+    running them, until it finishes that line. Anything written before the first result line,
+    such as pre-commit's progress installing hook environments, is not part of any hook.
+    """
+
+    """How long to wait for output to finish once the process has exited or been killed"""
+    join_timeout_seconds = 5
+
+    """Matches ANSI escape sequences, such as the colors pre-commit uses"""
+    ansi_regexp = re.compile(r"(\x9B|\x1B\[)[0-?]*[ -/]*[@-~]")
+
+    """Matches a hook's result line, e.g. "black.......Passed", capturing its name and result"""
+    result_regexp = re.compile(r"^(.*?)\.{5,}(.*)$")
+
+    def __init__(
+        self, stream: IO[bytes], on_output: Optional[Callable[[str], None]] = None
+    ):
+        self.stream = stream
+        self.on_output = on_output
+        self.lines: list[str] = []
+        self.partial_line = b""
+        self.last_hook_finished = time.monotonic()
+        self.line_started = self.last_hook_finished
+        self.hooks_started = False
+        self.hook_durations: dict[str, float] = {}
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def join(self):
+        """Waits for the rest of the output to be read"""
+        self.thread.join(self.join_timeout_seconds)
+        if not self.thread.is_alive():
+            self.stream.close()
+
+    def output(self) -> str:
+        """
+        :return: All of the output read so far
+        """
+        return "".join(self.lines)
+
+    def running_hook(self) -> Optional[str]:
+        """
+        Finds the hook pre-commit is running from the start of its result line, which
+        pre-commit writes before running the hook, e.g. "black.......".
+        :return: The name of the running hook, or None if it could not be found
+        """
+        line = self.partial_line.decode("utf8", errors="replace")
+        hook_name = self.ansi_regexp.sub("", line).rstrip(".").strip()
+        return hook_name or None
+
+    def _read(self):
+        while chunk := self.stream.read1(65536):
+            now = time.monotonic()
+            if not self.partial_line:
+                self.line_started = now
+            lines = chunk.split(b"\n")
+            lines[0] = self.partial_line + lines[0]
+            self.partial_line = lines.pop()
+            for line in lines:
+                self._add_line(line + b"\n", now)
+                self.line_started = now
+            if not self.hooks_started and self.partial_line.find(b".....") != -1:
+                # The first hook has started, once its environment was installed
+                self.hooks_started = True
+                self.last_hook_finished = self.line_started
+
+        if self.partial_line:
+            self._add_line(self.partial_line, time.monotonic())
+            self.partial_line = b""
+
+    def _add_line(self, line: bytes, now: float):
+        decoded_line = line.decode("utf8", errors="replace")
+        self.lines.append(decoded_line)
+        if decoded_line.find(".....") != -1:
+            self.hooks_started = True
+            self.last_hook_finished = now
+            self._record_hook_duration(decoded_line, now - self.line_started)
+        if self.on_output:
+            self.on_output(decoded_line)
+
+    def _record_hook_duration(self, line: str, seconds: float):
+        """
+        Adds the time taken by the hook a result line reports on to its total, unless the hook
+        was skipped, e.g. for having no files to check
+        :param line: A line reporting a hook's result
+        :param seconds: How long the line took to be written
+        """
+        result_match = self.result_regexp.match(self.ansi_regexp.sub("", line).strip())
+        if not result_match or result_match.group(2).endswith("Skipped"):
+            return
+
+        hook_name = result_match.group(1).strip()
+        self.hook_durations[hook_name] = self.hook_durations.get(hook_name, 0) + seconds
@@ -10,6 +10,7 @@ from secureli.abstractions.pre_commit import (
     InstallFailedError,
 )
 from secureli.repositories.secureli_config import (
+    LanguageBaseline,
     SecureliConfig,
     SecureliConfigRepository,
     VerifyConfigOutcome,
@@ -20,6 +21,7 @@ from secureli.services.language_support import LanguageSupportService
 from secureli.services.scanner import ScannerService, ScanMode
 from secureli.services.updater import UpdaterService
 from secureli.services.language_config import LanguageNotSupportedError
+from secureli.utilities.tracing import traced
 
 
 class VerifyOutcome(str, Enum):
@@ -78,13 +80,15 @@ class Action(ABC):
     def __init__(self, action_deps: ActionDependencies):
         self.action_deps = action_deps
 
+    @traced("Action.verify_install")
     def verify_install(
         self, folder_path: Path, reset: bool, always_yes: bool
     ) -> VerifyResult:
         """
         Installs, upgrades or verifies the current seCureLI installation
         :param folder_path: The folder path to initialize the repo for
-        :param reset: If true, disregard existing configuration and start fresh
+        :param reset: If true, disregard existing configuration and start fresh, though the
+        last language analysis still narrows the next to the files changed since
         :param always_yes: Assume "Yes" to all prompts
         """
 
@@ -96,11 +100,22 @@ class Action(ABC):
                     outcome=update_config.outcome,
                 )
 
-        config = SecureliConfig() if reset else self.action_deps.secureli_config.load()
+        config = self.action_deps.secureli_config.load()
+        # Even when resetting, an earlier language analysis spares analyzing unchanged files
+        language_baseline = config.language_baseline
+        if reset:
+            config = SecureliConfig()
 
         if not config.languages or not config.version_installed:
-            return self._install_secureli(folder_path, always_yes)
+            return self._install_secureli(folder_path, always_yes, language_baseline)
         else:
+            # Nothing verification depends on has changed since it last succeeded
+            install_fingerprint = self.action_deps.secureli_config.install_fingerprint(
+                config
+            )
+            if install_fingerprint == config.install_fingerprint:
+                return self._up_to_date(config)
+
             available_version = self.action_deps.language_support.version_for_language(
                 config.languages
             )
@@ -121,13 +136,23 @@ class Action(ABC):
                 self.action_deps.echo.print(config_validation_result.output)
                 return self._update_secureli(always_yes)
 
-            self.action_deps.echo.print(
-                f"seCureLI is installed and up-to-date (languages = {config.languages})"
-            )
-            return VerifyResult(
-                outcome=VerifyOutcome.UP_TO_DATE,
-                config=config,
-            )
+            config.install_fingerprint = install_fingerprint
+            self.action_deps.secureli_config.save(config)
+            return self._up_to_date(config)
+
+    def _up_to_date(self, config: SecureliConfig) -> VerifyResult:
+        """
+        Reports that the current seCureLI installation is up-to-date
+        :param config: The verified configuration for seCureLI
+        :return: The up-to-date verification result
+        """
+        self.action_deps.echo.print(
+            f"seCureLI is installed and up-to-date (languages = {config.languages})"
+        )
+        return VerifyResult(
+            outcome=VerifyOutcome.UP_TO_DATE,
+            config=config,
+        )
 
     def _upgrade_secureli(
         self, config: SecureliConfig, available_version: str, always_yes: bool
@@ -173,11 +198,18 @@ class Action(ABC):
                 config=config,
             )
 
-    def _install_secureli(self, folder_path: Path, always_yes: bool) -> VerifyResult:
+    @traced("Action._install_secureli")
+    def _install_secureli(
+        self,
+        folder_path: Path,
+        always_yes: bool,
+        language_baseline: Optional[LanguageBaseline] = None,
+    ) -> VerifyResult:
         """
         Installs seCureLI into the given folder path and returns the new configuration
         :param folder_path: The folder path to initialize the repo for
         :param always_yes: Assume "Yes" to all prompts
+        :param language_baseline: The baseline of an earlier language analysis, if any
         :return: The new SecureliConfig after install or None if installation did not complete
         """
         self.action_deps.echo.print("seCureLI has not been setup yet.")
@@ -192,7 +224,9 @@ class Action(ABC):
             )
 
         try:
-            analyze_result = self.action_deps.language_analyzer.analyze(folder_path)
+            analyze_result = self.action_deps.language_analyzer.analyze(
+                folder_path, language_baseline
+            )
 
             if analyze_result.skipped_files:
                 self.action_deps.echo.warning(
@@ -204,10 +238,19 @@ class Action(ABC):
             if not analyze_result.language_proportions:
                 raise ValueError("No supported languages found in current repository")
 
-            self.action_deps.echo.print("Detected the following languages:")
+            if analyze_result.sampled:
+                self.action_deps.echo.print(
+                    f"Detected the following languages (from a sample of {analyze_result.sample_size} files):"
+                )
+            else:
+                self.action_deps.echo.print("Detected the following languages:")
             for language, percentage in analyze_result.language_proportions.items():
+                bounds = (analyze_result.confidence_bounds or {}).get(language)
+                bounds_text = f" ({bounds[0]:.0%}-{bounds[1]:.0%})" if bounds else ""
                 self.action_deps.echo.print(
-                    f"- {language}: {percentage:.0%}", color=Color.MAGENTA, bold=True
+                    f"- {language}: {percentage:.0%}{bounds_text}",
+                    color=Color.MAGENTA,
+                    bold=True,
                 )
             languages = list(analyze_result.language_proportions.keys())
             self.action_deps.echo.print(f"Overall Detected Languages: {languages}")
@@ -225,6 +268,7 @@ class Action(ABC):
         config = SecureliConfig(
             languages=languages,
             version_installed=metadata.version,
+            language_baseline=analyze_result.baseline,
         )
         self.action_deps.secureli_config.save(config)
 
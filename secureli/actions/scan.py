@@ -1,7 +1,7 @@
 from pathlib import Path
 from typing import Optional
 
-from secureli.utilities.usage_stats import post_log, convert_failures_to_failure_count
+from secureli.utilities.usage_stats import convert_failures_to_failure_count
 from secureli.abstractions.echo import EchoAbstraction
 from secureli.services.logging import LoggingService, LogAction
 from secureli.services.scanner import (
@@ -10,6 +10,9 @@ from secureli.services.scanner import (
     Failure,
     OutputParseErrors,
 )
+from secureli.services.telemetry import TelemetryService
+from secureli.repositories.scan_history import FailureRecord, ScanHistoryRepository
+from secureli.utilities.git_meta import current_branch_name
 from secureli.actions.action import VerifyOutcome, Action, ActionDependencies
 from secureli.repositories.settings import (
     SecureliRepository,
@@ -36,10 +39,14 @@ class ScanAction(Action):
         echo: EchoAbstraction,
         logging: LoggingService,
         scanner: ScannerService,
+        telemetry: TelemetryService,
+        history: ScanHistoryRepository,
         # settings_repository: SecureliRepository,
     ):
         super().__init__(action_deps)
         self.scanner = scanner
+        self.telemetry = telemetry
+        self.history = history
         self.echo = echo
         self.logging = logging
         # self.settings = settings_repository
@@ -50,6 +57,9 @@ class ScanAction(Action):
         scan_mode: ScanMode,
         always_yes: bool,
         specific_test: Optional[str] = None,
+        jobs: int = 1,
+        base_ref: Optional[str] = None,
+        head_ref: Optional[str] = None,
     ):
         """
         Scans the given directory, or offers to go through initialization if that has not
@@ -60,16 +70,43 @@ class ScanAction(Action):
         :param always_yes: Assume "Yes" to all prompts
         :param specific_test: If set, limits scanning to the single pre-commit hook.
         Otherwise, scans with all hooks.
+        :param jobs: When scanning all files, how many pre-commit processes to split the
+        repo's files across
+        :param base_ref: When scanning changed files, the ref the changes are to be merged into
+        :param head_ref: When scanning changed files, the ref holding the changes, or None for
+        HEAD
         """
         verify_result = self.verify_install(folder_path, False, always_yes)
 
         if verify_result.outcome in self.halting_outcomes:
             return
 
-        scan_result = self.scanner.scan_repo(scan_mode, specific_test)
+        streamed_lines = 0
 
-        details = scan_result.output or "Unknown output during scan"
-        self.echo.print(details)
+        def print_line(line: str):
+            nonlocal streamed_lines
+            streamed_lines += 1
+            self.echo.print(line)
+
+        scan_result = self.scanner.scan_repo(
+            scan_mode,
+            specific_test,
+            on_output=print_line,
+            jobs=jobs,
+            base_ref=base_ref,
+            head_ref=head_ref,
+        )
+
+        if not streamed_lines:
+            details = scan_result.output or "Unknown output during scan"
+            self.echo.print(details)
+
+        if scan_result.timed_out_hook:
+            self.echo.error(
+                f"Scan stopped: the {scan_result.timed_out_hook} hook ran out of time"
+            )
+        elif scan_result.timed_out:
+            self.echo.error("Scan stopped: pre-commit ran out of time")
 
         failure_count = len(scan_result.failures)
         scan_result_failures_json_string = json.dumps(
@@ -80,6 +117,18 @@ class ScanAction(Action):
             scan_result.failures
         )
 
+        if self.history.enabled:
+            self.history.record(
+                successful=scan_result.successful,
+                failures=[
+                    FailureRecord(
+                        repo=failure.repo, hook_id=failure.id, file=failure.file
+                    )
+                    for failure in scan_result.failures
+                ],
+                branch=current_branch_name(),
+            )
+
         if failure_count > 0:
             self._process_failures(scan_result.failures, always_yes=always_yes)
 
@@ -89,14 +138,17 @@ class ScanAction(Action):
                 scan_result_failures_json_string,
                 failure_count,
                 individual_failure_count,
+                hook_durations=scan_result.hook_durations,
             )
 
-            post_log(log_data.json(exclude_none=True))
+            self.telemetry.enqueue(log_data)
         else:
             self.echo.print("Scan executed successfully and detected no issues!")
-            log_data = self.logging.success(LogAction.scan)
+            log_data = self.logging.success(
+                LogAction.scan, hook_durations=scan_result.hook_durations
+            )
 
-            post_log(log_data.json(exclude_none=True))
+            self.telemetry.enqueue(log_data)
 
     def _process_failures(
         self,
@@ -0,0 +1,124 @@
+import math
+
+import pydantic
+
+from secureli.abstractions.echo import EchoAbstraction
+from secureli.repositories.scan_history import ScanHistoryRepository
+from secureli.services.logging import LoggingService, LogAction, LogEntry
+
+
+class HookDurationStats(pydantic.BaseModel):
+    """How long a hook has taken across recent scans"""
+
+    hook: str
+    runs: int
+    p50_seconds: float
+    p95_seconds: float
+
+
+class StatsAction:
+    """The action for the secureli `stats` commands, reporting on recently logged activity"""
+
+    def __init__(
+        self,
+        echo: EchoAbstraction,
+        logging: LoggingService,
+        history: ScanHistoryRepository,
+    ):
+        self.echo = echo
+        self.logging = logging
+        self.history = history
+
+    def print_hook_durations(self, scans: int):
+        """
+        Prints the median and 95th percentile time each hook took across recent scans,
+        slowest first
+        :param scans: How many of the most recent scans to report on
+        """
+        hook_stats = self.hook_duration_stats(
+            self.logging.recent_entries(LogAction.scan, scans)
+        )
+        if not hook_stats:
+            self.echo.print(
+                "No hook timings have been logged yet. Run `secureli scan` to record some."
+            )
+            return
+
+        hook_width = max(len("Hook"), *(len(stats.hook) for stats in hook_stats))
+        self.echo.print(f"{'Hook':<{hook_width}}  {'Runs':>5}  {'p50':>8}  {'p95':>8}")
+        for stats in hook_stats:
+            self.echo.print(
+                f"{stats.hook:<{hook_width}}  {stats.runs:>5}"
+                f"  {stats.p50_seconds:>7.2f}s  {stats.p95_seconds:>7.2f}s"
+            )
+
+    def print_failure_trends(self, days: int, limit: int):
+        """
+        Prints which hooks failed most often on which files over recent days, from the scan
+        history
+        :param days: How many days to report on, including today
+        :param limit: The most hook and file pairs to print
+        """
+        if not self.history.enabled:
+            self.echo.print(
+                "Scan history is not being recorded. Set `history: enabled: true` in "
+                ".secureli.yaml to record it."
+            )
+            return
+
+        run_summary = self.history.run_summary(days)
+        failure_trends = self.history.failure_trends(days, limit)
+        self.echo.print(
+            f"{run_summary.runs} scans in the last {days} days, "
+            f"{run_summary.failed_runs} of which failed"
+        )
+        if not failure_trends:
+            return
+
+        hook_width = max(len("Hook"), *(len(trend.hook_id) for trend in failure_trends))
+        file_width = max(len("File"), *(len(trend.file) for trend in failure_trends))
+        self.echo.print(
+            f"{'Hook':<{hook_width}}  {'File':<{file_width}}  {'Failures':>8}  Last failed"
+        )
+        for trend in failure_trends:
+            self.echo.print(
+                f"{trend.hook_id:<{hook_width}}  {trend.file:<{file_width}}"
+                f"  {trend.failures:>8}  {trend.last_failed_on.isoformat()}"
+            )
+
+    def hook_duration_stats(
+        self, log_entries: list[LogEntry]
+    ) -> list[HookDurationStats]:
+        """
+        Summarizes the hook durations recorded in log entries
+        :param log_entries: The log entries to summarize
+        :return: The stats for each hook that was timed, slowest (by p95) first
+        """
+        durations = {}
+        for log_entry in log_entries:
+            for hook, seconds in (log_entry.hook_durations or {}).items():
+                durations.setdefault(hook, []).append(seconds)
+
+        hook_stats = [
+            HookDurationStats(
+                hook=hook,
+                runs=len(seconds),
+                p50_seconds=self._percentile(seconds, 50),
+                p95_seconds=self._percentile(seconds, 95),
+            )
+            for hook, seconds in durations.items()
+        ]
+        hook_stats.sort(key=lambda stats: (-stats.p95_seconds, stats.hook))
+        return hook_stats
+
+    def _percentile(self, values: list[float], percent: int) -> float:
+        """
+        Finds a percentile of some values by the nearest-rank method, so that it is always one
+        of the values themselves
+        :param values: The values, which must not be empty
+        :param percent: The percentile to find, from 1 to 100
+        :return: The smallest value that at least percent% of the values are no greater than
+        """
+        ordered_values = sorted(values)
+        rank = math.ceil(percent / 100 * len(ordered_values))
+        return ordered_values[max(rank, 1) - 1]
@@ -0,0 +1,112 @@
+from pathlib import Path
+from typing import Optional
+
+from secureli.abstractions.echo import EchoAbstraction
+from secureli.abstractions.file_watcher import FileWatcher, WatchedChanges
+from secureli.actions.action import VerifyOutcome, Action, ActionDependencies
+from secureli.services.scanner import ScanMode, ScannerService
+
+
+class WatchAction(Action):
+    """
+    The action for the secureli `watch` command, scanning files as they are edited until
+    interrupted. Each batch of edits is scanned and reported on its own, and nothing is kept
+    from one batch to the next.
+    """
+
+    """Any verification outcomes that would cause us to not proceed to watch."""
+    halting_outcomes = [
+        VerifyOutcome.INSTALL_FAILED,
+        VerifyOutcome.INSTALL_CANCELED,
+    ]
+
+    def __init__(
+        self,
+        action_deps: ActionDependencies,
+        echo: EchoAbstraction,
+        scanner: ScannerService,
+        file_watcher: FileWatcher,
+        debounce_seconds: float,
+    ):
+        super().__init__(action_deps)
+        self.echo = echo
+        self.scanner = scanner
+        self.file_watcher = file_watcher
+        self.debounce_seconds = debounce_seconds
+
+    def watch_repo(
+        self,
+        folder_path: Path,
+        always_yes: bool,
+        specific_test: Optional[str] = None,
+    ):
+        """
+        Watches the given directory, scanning files with the hooks that apply to them as
+        they are edited, or offers to go through initialization first if that has not been
+        completed yet
+        :param folder_path: The folder path to watch
+        :param always_yes: Assume "Yes" to all prompts
+        :param specific_test: If set, limits scanning to the single pre-commit hook.
+        Otherwise, scans with every hook that applies to the edited files.
+        """
+        verify_result = self.verify_install(folder_path, False, always_yes)
+
+        if verify_result.outcome in self.halting_outcomes:
+            return
+
+        watch_method = self.file_watcher.start()
+        self.echo.print(
+            f"Watching for changes ({watch_method}). Press Ctrl+C to stop watching."
+        )
+        try:
+            while True:
+                changes = self.file_watcher.next_changes(self.debounce_seconds)
+                self._scan_changes(changes, specific_test)
+        except KeyboardInterrupt:
+            self.echo.print("Stopped watching.")
+        finally:
+            self.file_watcher.stop()
+
+    def _scan_changes(self, changes: WatchedChanges, specific_test: Optional[str]):
+        """
+        Scans a batch of changed files, printing the output as the scan runs
+        :param changes: The changed files
+        :param specific_test: If set, limits scanning to the single pre-commit hook
+        """
+        streamed_lines = 0
+
+        def print_line(line: str):
+            nonlocal streamed_lines
+            streamed_lines += 1
+            self.echo.print(line)
+
+        if changes.overflowed:
+            self.echo.print(
+                "Too many files changed to scan them individually. Scanning every file "
+                "that has not passed since it last changed..."
+            )
+            scan_result = self.scanner.scan_repo(
+                ScanMode.ALL_FILES, specific_test, on_output=print_line
+            )
+        else:
+            self.echo.print(f"Scanning {len(changes.paths)} edited file(s)...")
+            scan_result = self.scanner.scan_edited_files(
+                changes.paths, specific_test, on_output=print_line
+            )
+
+        if not streamed_lines and scan_result.output:
+            self.echo.print(scan_result.output.rstrip("\n"))
+
+        if scan_result.timed_out_hook:
+            self.echo.error(
+                f"Scan stopped: the {scan_result.timed_out_hook} hook ran out of time"
+            )
+        elif scan_result.timed_out:
+            self.echo.error("Scan stopped: pre-commit ran out of time")
+        elif not scan_result.successful:
+            self.echo.error(
+                f"Scan detected {len(scan_result.failures)} failure(s). "
+                "Waiting for further changes..."
+            )
+        else:
+            self.echo.print("No issues detected. Waiting for further changes...")
@@ -0,0 +1,134 @@
+"""
+The thin client for the seCureLI daemon, for use where seCureLI runs often and its start up
+time matters most, such as git hooks, e.g. `secureli-client scan`.
+
+If a daemon is running for the repository, the command is run by it, which has seCureLI
+loaded and configured already. Otherwise, the command is run in this process, as `secureli`
+would, and with `--spawn`, a daemon is started in the background for the commands that follow.
+
+This module only imports from the standard library, so that it starts as fast as Python can.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+
+# Where the daemon for the repository in the working directory listens
+SOCKET_PATH = os.path.join(".secureli", "daemon.sock")
+
+# The commands the daemon runs. Any others are run in the client's process.
+SERVED_COMMANDS = {"scan"}
+
+# The environment variables sent with each request, for the daemon to run it with in place of
+# its own: git's, such as GIT_INDEX_FILE when run by `git commit -a`, pre-commit's, including
+# SKIP, and seCureLI's, including the API_ENDPOINT and API_KEY telemetry is sent with
+REQUEST_VARIABLE_PREFIXES = ("GIT_", "PRE_COMMIT", "SECURELI_", "API_")
+REQUEST_VARIABLES = {"SKIP"}
+
+
+def is_request_variable(name: str) -> bool:
+    """
+    :param name: The name of an environment variable
+    :return: True if the variable is sent with each request to the daemon
+    """
+    return name in REQUEST_VARIABLES or name.startswith(REQUEST_VARIABLE_PREFIXES)
+
+
+def request(args: list[str]) -> int:
+    """
+    Has the daemon run a command, printing its output as it runs. The command is run in this
+    process's working directory, with its git, pre-commit and seCureLI environment variables.
+    :param args: The command's arguments, e.g. ["scan", "--mode", "all-files"]
+    :return: The command's exit code
+    :raises OSError: If no daemon is listening
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(SOCKET_PATH)
+    except OSError:
+        connection.close()
+        raise
+
+    try:
+        message = {
+            "args": args,
+            "color": sys.stdout.isatty(),
+            "cwd": os.getcwd(),
+            "env": {
+                name: value
+                for name, value in os.environ.items()
+                if is_request_variable(name)
+            },
+        }
+        connection.sendall(json.dumps(message).encode("utf8") + b"\n")
+
+        with connection.makefile("r", encoding="utf8") as replies:
+            for reply in replies:
+                reply = json.loads(reply)
+                if "output" in reply:
+                    sys.stdout.write(reply["output"])
+                    sys.stdout.flush()
+                elif "exit_code" in reply:
+                    return reply["exit_code"]
+    except (OSError, ValueError):
+        pass
+    finally:
+        connection.close()
+
+    sys.stderr.write("The seCureLI daemon stopped before the command finished\n")
+    return 1
+
+
+def spawn_daemon():
+    """Starts a daemon for the repository in the background, detached from this process"""
+    subprocess.Popen(
+        [sys.executable, "-m", "secureli.main", "daemon"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def run_locally(args: list[str]) -> int:
+    """
+    Runs a command in this process, as `secureli` would
+    :param args: The command's arguments
+    :return: The command's exit code
+    """
+    from secureli.main import app
+
+    try:
+        app(args=args, prog_name="secureli")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        return 1
+    return 0
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Runs a seCureLI command through the daemon where possible
+    :param argv: The arguments to the client, which are the command's arguments, optionally
+    preceded by --spawn
+    :return: The command's exit code
+    """
+    args = list(sys.argv[1:] if argv is None else argv)
+    spawn = bool(args) and args[0] == "--spawn"
+    if spawn:
+        args = args[1:]
+
+    if args and args[0] in SERVED_COMMANDS and hasattr(socket, "AF_UNIX"):
+        try:
+            return request(args)
+        except OSError:
+            if spawn:
+                spawn_daemon()
+
+    return run_locally(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
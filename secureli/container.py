@@ -1,26 +1,47 @@
 from dependency_injector import containers, providers
 
 from secureli.abstractions.echo import TyperEcho
-from secureli.abstractions.lexer_guesser import PygmentsLexerGuesser
+from secureli.abstractions.file_watcher import FileWatcher
+from secureli.abstractions.lexer_guesser import ExtensionLexerGuesser
 from secureli.abstractions.pre_commit import PreCommitAbstraction
 from secureli.actions.action import ActionDependencies
 from secureli.actions.initializer import InitializerAction
 from secureli.actions.scan import ScanAction
+from secureli.actions.stats import StatsAction
 from secureli.actions.build import BuildAction
 from secureli.actions.update import UpdateAction
+from secureli.actions.watch import WatchAction
+from secureli.repositories.analysis_cache import AnalysisCacheRepository
+from secureli.repositories.branch_log import BranchLogRepository
 from secureli.repositories.repo_files import RepoFilesRepository
+from secureli.repositories.scan_history import ScanHistoryRepository
+from secureli.repositories.scan_ledger import ScanLedgerRepository
 from secureli.repositories.secureli_config import SecureliConfigRepository
 from secureli.repositories.settings import SecureliRepository
+from secureli.repositories.telemetry_spool import TelemetrySpoolRepository
 from secureli.resources import read_resource
+from secureli.services.daemon import DaemonService
 from secureli.services.git_ignore import GitIgnoreService
 from secureli.services.language_analyzer import LanguageAnalyzerService
-from secureli.services.language_support import LanguageSupportService
+from secureli.services.language_support import (
+    ConfigBuildCache,
+    LanguageSupportService,
+)
 from secureli.services.logging import LoggingService
 from secureli.services.scanner import ScannerService
+from secureli.services.telemetry import TelemetryService
 from secureli.services.updater import UpdaterService
 from secureli.services.secureli_ignore import SecureliIgnoreService
 from secureli.services.language_config import LanguageConfigService
 from secureli.settings import Settings
+from secureli.utilities.patterns import IgnoreMatcher
+
+
+def _combine_ignored_file_patterns(*ignored_file_patterns: list[str]) -> list[str]:
+    """Combines lists of ignored file patterns, without duplicates"""
+    return list(
+        set(pattern for patterns in ignored_file_patterns for pattern in patterns)
+    )
 
 
 class Container(containers.DeclarativeContainer):
@@ -36,17 +57,41 @@ class Container(containers.DeclarativeContainer):
 
     settings = providers.Factory(Settings)
 
-    secureli_ignored_file_patterns = providers.Factory(
-        SecureliIgnoreService,
-        settings,
-    )().ignored_file_patterns()
+    """
+    The patterns ignored by .secureli.yaml, which are only read from the disk when first
+    needed, so that commands that don't need them start up quickly
+    """
+    secureli_ignored_file_patterns = providers.Singleton(
+        providers.Factory(
+            SecureliIgnoreService,
+            settings,
+        ).provided.ignored_file_patterns.call()
+    )
 
-    git_ignored_file_patterns = providers.Factory(
-        GitIgnoreService
-    )().ignored_file_patterns()
+    """The patterns ignored by .gitignore, likewise read only when first needed"""
+    git_ignored_file_patterns = providers.Singleton(
+        providers.Factory(GitIgnoreService).provided.ignored_file_patterns.call()
+    )
+
+    combined_ignored_file_patterns = providers.Singleton(
+        _combine_ignored_file_patterns,
+        secureli_ignored_file_patterns,
+        git_ignored_file_patterns,
+    )
+
+    """
+    Matches paths against the .secureli.yaml and .gitignore patterns. Compiled once
+    and shared by everything that needs to know whether a path is ignored
+    """
+    ignore_matcher = providers.Singleton(
+        IgnoreMatcher,
+        patterns=combined_ignored_file_patterns,
+    )
 
-    combined_ignored_file_patterns = list(
-        set(secureli_ignored_file_patterns + git_ignored_file_patterns)
+    """Matches paths against the .secureli.yaml patterns alone, as excluded from pre-commit"""
+    secureli_ignore_matcher = providers.Singleton(
+        IgnoreMatcher,
+        patterns=secureli_ignored_file_patterns,
     )
 
     # Repositories
@@ -56,7 +101,39 @@ class Container(containers.DeclarativeContainer):
         RepoFilesRepository,
         max_file_size=config.repo_files.max_file_size.as_int(),
         ignored_file_extensions=config.repo_files.ignored_file_extensions,
-        ignored_file_patterns=combined_ignored_file_patterns,
+        ignore_matcher=ignore_matcher,
+    )
+
+    """Remembers the lexers guessed for files between language analyses"""
+    analysis_cache_repository = providers.Factory(
+        AnalysisCacheRepository,
+        max_entries=config.repo_files.analysis_cache_max_entries.as_int(),
+    )
+
+    """Remembers which hooks each file has passed between scans"""
+    scan_ledger_repository = providers.Factory(
+        ScanLedgerRepository,
+        max_entries=config.scan.pass_ledger_max_entries.as_int(),
+    )
+
+    """Records the outcome of every scan, for reporting on failure trends"""
+    scan_history_repository = providers.Factory(
+        ScanHistoryRepository,
+        enabled=config.history.enabled,
+    )
+
+    """Holds log entries on the disk until they can be sent"""
+    telemetry_spool_repository = providers.Factory(
+        TelemetrySpoolRepository,
+        max_entries=config.telemetry.spool_max_entries.as_int(),
+    )
+
+    """Stores each branch's log entries, rotating and compressing older ones"""
+    branch_log_repository = providers.Factory(
+        BranchLogRepository,
+        segment_max_bytes=config.logs.segment_max_bytes.as_int(),
+        segment_max_age_days=config.logs.segment_max_age_days.as_float(),
+        max_rotated_segments=config.logs.max_rotated_segments.as_int(),
     )
 
     """
@@ -75,13 +152,23 @@ class Container(containers.DeclarativeContainer):
         level=config.echo.level,
     )
 
-    """Guesses the lexer within a given file"""
-    lexer_guesser = providers.Factory(PygmentsLexerGuesser)
+    """Guesses the lexer within a given file, from its extension where possible"""
+    lexer_guesser = providers.Factory(ExtensionLexerGuesser)
 
     """Wraps the execution and management of pre-commit in our consuming repo"""
     pre_commit_abstraction = providers.Factory(
         PreCommitAbstraction,
         command_timeout_seconds=config.language_support.command_timeout_seconds,
+        hook_timeout_seconds=config.language_support.hook_timeout_seconds,
+    )
+
+    """Watches the repository's files for changes, through inotify where available"""
+    file_watcher = providers.Factory(
+        FileWatcher,
+        ignore_matcher=ignore_matcher,
+        max_pending_paths=config.watch.max_pending_paths.as_int(),
+        poll_interval_seconds=config.watch.poll_interval_seconds.as_float(),
+        polling=config.watch.polling,
     )
 
     # Services
@@ -99,9 +186,15 @@ class Container(containers.DeclarativeContainer):
         data_loader=read_resource,
         pre_commit_settings=config.pre_commit,
         command_timeout_seconds=config.language_support.command_timeout_seconds,
-        ignored_file_patterns=secureli_ignored_file_patterns,
+        ignore_matcher=secureli_ignore_matcher,
     )
 
+    """
+    Remembers the pre-commit configurations built during a command, shared by every
+    service that needs them
+    """
+    config_build_cache = providers.Singleton(ConfigBuildCache)
+
     """Identifies the configuration version for the language and installs it"""
     language_support_service = providers.Factory(
         LanguageSupportService,
@@ -109,6 +202,7 @@ class Container(containers.DeclarativeContainer):
         git_ignore=git_ignore_service,
         language_config=language_config_service,
         data_loader=read_resource,
+        config_build_cache=config_build_cache,
     )
 
     """Analyzes a given repo to try to identify the most common language"""
@@ -116,6 +210,9 @@ class Container(containers.DeclarativeContainer):
         LanguageAnalyzerService,
         repo_files=repo_files_repository,
         lexer_guesser=lexer_guesser,
+        workers=config.repo_files.analysis_workers.as_int(),
+        sample_threshold=config.repo_files.analysis_sample_threshold.as_int(),
+        analysis_cache=analysis_cache_repository,
     )
 
     """Logs branch-level secureli log entries to the disk"""
@@ -123,12 +220,36 @@ class Container(containers.DeclarativeContainer):
         LoggingService,
         language_support=language_support_service,
         secureli_config=secureli_config_repository,
+        branch_logs=branch_log_repository,
+    )
+
+    """
+    Sends log entries to the instrumentation backend in the background, shared by every command
+    the daemon runs until its configuration is reloaded
+    """
+    telemetry_service = providers.Singleton(
+        TelemetryService,
+        spool=telemetry_spool_repository,
+        batch_size=config.telemetry.batch_size.as_int(),
+        max_retries=config.telemetry.max_retries.as_int(),
+        request_timeout_seconds=config.telemetry.request_timeout_seconds.as_float(),
+        exit_budget_seconds=config.telemetry.exit_budget_seconds.as_float(),
+    )
+
+    """Keeps seCureLI loaded, running the commands requested by secureli-client"""
+    daemon_service = providers.Factory(
+        DaemonService,
+        idle_timeout_seconds=config.daemon.idle_timeout_seconds.as_float(),
     )
 
     """The service that scans the repository using pre-commit configuration"""
     scanner_service = providers.Factory(
         ScannerService,
         pre_commit=pre_commit_abstraction,
+        hook_workers=config.scan.hook_workers,
+        serial_hook_ids=config.scan.serial_hook_ids,
+        repo_files=repo_files_repository,
+        scan_ledger=scan_ledger_repository,
     )
 
     updater_service = providers.Factory(
@@ -172,9 +293,29 @@ class Container(containers.DeclarativeContainer):
         echo=echo,
         logging=logging_service,
         scanner=scanner_service,
+        telemetry=telemetry_service,
+        history=scan_history_repository,
         # settings_repository=settings_repository,
     )
 
+    """Watch Action, representing what happens when the watch command is invoked"""
+    watch_action = providers.Factory(
+        WatchAction,
+        action_deps=action_deps,
+        echo=echo,
+        scanner=scanner_service,
+        file_watcher=file_watcher,
+        debounce_seconds=config.watch.debounce_seconds.as_float(),
+    )
+
+    """Stats Action, representing what happens when the stats commands are invoked"""
+    stats_action = providers.Factory(
+        StatsAction,
+        echo=echo,
+        logging=logging_service,
+        history=scan_history_repository,
+    )
+
     """Update Action, representing what happens when the update command is invoked"""
     update_action = providers.Factory(
         UpdateAction,
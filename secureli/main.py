@@ -1,15 +1,21 @@
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Optional
 
+import click
 import typer
+from dependency_injector import providers
 from typer import Option
 
 from secureli.actions.scan import ScanMode
 from secureli.actions.setup import SetupAction
+from secureli.client import SERVED_COMMANDS
 from secureli.container import Container
-from secureli.abstractions.echo import Color
+from secureli.abstractions.echo import Color, NonInteractiveEcho
 from secureli.resources import read_resource
+from secureli.services.logging import log_environment
 from secureli.settings import Settings
+from secureli.utilities.tracing import trace_path, tracer
 
 # Create SetupAction outside of DI, as it's not yet available.
 setup_action = SetupAction(epilog_template_data=read_resource("epilog.md"))
@@ -17,22 +23,55 @@ app = typer.Typer(
     no_args_is_help=True, rich_markup_mode="rich", epilog=setup_action.create_epilog()
 )
 
+stats_app = typer.Typer(
+    no_args_is_help=True, help="Report on seCureLI's recent activity in this repo"
+)
+app.add_typer(stats_app, name="stats")
+
 container = Container()
-container.config.from_pydantic(Settings())
 
 
 @app.callback()
-def setup():
+def setup(
+    ctx: typer.Context,
+    trace: bool = Option(
+        False,
+        "--trace",
+        help=f"Record where the command's time goes to {trace_path}, viewable in chrome://tracing",
+    ),
+):
     """
     seCureLI:
     Secure Project Manager :sparkles:
     ---
     An intelligent CLI that helps developers build securely
     """
-    # Initializes the DI container for each command
+    # Initializes the DI container for each command. Settings are only read here, so that
+    # --help doesn't need to load them
+    settings = Settings()
+    container.config.from_pydantic(settings)
     container.init_resources()
     container.wire(modules=[__name__])
 
+    if trace or settings.trace.enabled:
+        _trace_command(ctx)
+
+
+def _trace_command(ctx: typer.Context):
+    """
+    Records the command being run as a span, writing the trace once it finishes
+    :param ctx: The context of the command being run
+    """
+    tracer.enable()
+    command_span = ExitStack()
+    command_span.enter_context(tracer.span(f"secureli {ctx.invoked_subcommand}"))
+
+    def write_trace():
+        command_span.close()
+        tracer.write(trace_path)
+
+    ctx.call_on_close(write_trace)
+
 
 @app.command()
 def init(
@@ -67,7 +106,7 @@ def scan(
         ScanMode.STAGED_ONLY,
         "--mode",
         "-m",
-        help="Scan the files you're about to commit (the default) or all files in the repo.",
+        help="Scan the files you're about to commit (the default), all files in the repo, or the files changed since --base-ref.",
     ),
     specific_test: Optional[str] = Option(
         None,
@@ -75,11 +114,95 @@ def scan(
         "-t",
         help="Limit the scan to a specific hook ID from your pre-commit config",
     ),
+    jobs: int = Option(
+        1,
+        "--jobs",
+        "-j",
+        min=1,
+        help="When scanning all files, split them across this many pre-commit processes",
+    ),
+    base_ref: Optional[str] = Option(
+        None,
+        "--base-ref",
+        help="With --mode changed-since, the ref the changes are to be merged into, e.g. origin/main",
+    ),
+    head_ref: Optional[str] = Option(
+        None,
+        "--head-ref",
+        help="With --mode changed-since, the ref holding the changes, which must be checked out. Defaults to HEAD",
+    ),
 ):
     """
     Performs an explicit check of the repository to detect security issues without remote logging.
     """
-    container.scan_action().scan_repo(Path("."), mode, yes, specific_test)
+    if mode == ScanMode.CHANGED_SINCE and not base_ref:
+        raise typer.BadParameter(
+            "is required with --mode changed-since", param_hint="--base-ref"
+        )
+
+    container.scan_action().scan_repo(
+        Path("."), mode, yes, specific_test, jobs, base_ref, head_ref
+    )
+
+
+@app.command()
+def watch(
+    yes: bool = Option(
+        False,
+        "--yes",
+        "-y",
+        help="Say 'yes' to every prompt automatically without input",
+    ),
+    specific_test: Optional[str] = Option(
+        None,
+        "--specific-test",
+        "-t",
+        help="Limit the scans to a specific hook ID from your pre-commit config",
+    ),
+):
+    """
+    Scan files as you edit them, with only the hooks that apply to them, until stopped with Ctrl+C
+    """
+    container.watch_action().watch_repo(Path("."), yes, specific_test)
+
+
+@stats_app.command("hooks")
+def stats_hooks(
+    scans: int = Option(
+        50,
+        "--scans",
+        "-n",
+        min=1,
+        help="How many of the most recent scans to report on",
+    ),
+):
+    """
+    Show how long each hook took across recent scans, slowest first
+    """
+    container.stats_action().print_hook_durations(scans)
+
+
+@stats_app.command("failures")
+def stats_failures(
+    days: int = Option(
+        30,
+        "--days",
+        "-d",
+        min=1,
+        help="How many days of scan history to report on, including today",
+    ),
+    limit: int = Option(
+        20,
+        "--limit",
+        "-n",
+        min=1,
+        help="The most hook and file pairs to show",
+    ),
+):
+    """
+    Show which hooks failed most often on which files, from the scan history
+    """
+    container.stats_action().print_failure_trends(days, limit)
 
 
 @app.command(hidden=True)
@@ -105,5 +228,61 @@ def update(
     container.update_action().update_hooks(latest)
 
 
+@app.command()
+def daemon():
+    """
+    Keep seCureLI loaded for this repo, running the scans requested by secureli-client until idle
+    """
+    commands = typer.main.get_command(app).commands
+
+    def run_command(args: list[str]) -> int:
+        return _run_served_command(commands, args)
+
+    def load():
+        container.config.from_pydantic(Settings())
+        container.reset_singletons()
+        log_environment.cache_clear()
+        container.ignore_matcher()
+        container.secureli_ignore_matcher()
+
+    load()
+    with container.echo.override(
+        providers.Factory(NonInteractiveEcho, level=container.config.echo.level)
+    ):
+        if not container.daemon_service().serve(run_command, load):
+            container.echo().error(
+                "The seCureLI daemon could not start: one is already running for this "
+                "repo, or this platform does not support it"
+            )
+
+
+def _run_served_command(commands: dict[str, click.Command], args: list[str]) -> int:
+    """
+    Runs a command requested of the daemon, as `secureli` would but without setting up the
+    container again
+    :param commands: The commands of the app, by name
+    :param args: The command's arguments, starting with its name
+    :return: The command's exit code
+    """
+    if not args or args[0] not in SERVED_COMMANDS:
+        click.echo(f"The seCureLI daemon does not run {' '.join(args)}", err=True)
+        return 2
+
+    try:
+        commands[args[0]].main(
+            args=args[1:], prog_name=f"secureli {args[0]}", standalone_mode=False
+        )
+    except click.exceptions.Exit as e:
+        return e.exit_code
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.exceptions.Abort:
+        click.echo("Aborted!", err=True)
+        return 1
+
+    return 0
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,60 @@
+import json
+import os
+from pathlib import Path
+
+
+class AnalysisCacheRepository:
+    """
+    Save and retrieve the lexers guessed for files during language analysis, so that later
+    analyses only need to classify files that changed. Entries are keyed by the caller (by git
+    blob ID where possible, so they survive checkouts and fresh clones) and the whole cache is
+    discarded whenever its fingerprint no longer matches how files are being classified.
+    """
+
+    cache_path = Path(".secureli") / "analysis-cache.json"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+
+    def load(self, fingerprint: str) -> dict[str, str]:
+        """
+        Load the cached lexers, or an empty cache if it is missing, unreadable or was
+        recorded with a different fingerprint
+        :param fingerprint: Identifies how files are being classified
+        :return: A dictionary of cache keys to lexer names, least recently used first
+        """
+        if self.max_entries <= 0:
+            return {}
+
+        try:
+            with open(self.cache_path, "r", encoding="utf8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("fingerprint") != fingerprint:
+            return {}
+
+        return data.get("entries", {})
+
+    def save(self, fingerprint: str, entries: dict[str, str]):
+        """
+        Save the cached lexers, evicting the least recently used entries beyond the size cap
+        :param fingerprint: Identifies how files are being classified
+        :param entries: A dictionary of cache keys to lexer names, least recently used first
+        """
+        if self.max_entries <= 0:
+            return
+
+        if len(entries) > self.max_entries:
+            keys = list(entries)[len(entries) - self.max_entries :]
+            entries = {key: entries[key] for key in keys}
+
+        temp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf8") as f:
+                json.dump({"fingerprint": fingerprint, "entries": entries}, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
@@ -0,0 +1,307 @@
+import gzip
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pydantic
+
+
+class LogSegment(pydantic.BaseModel):
+    """
+    Summarizes a rotated, compressed segment of a branch's log, so that queries can skip the
+    segment without decompressing it
+    """
+
+    file_name: str
+    first_timestamp: datetime
+    last_timestamp: datetime
+    entry_count: int
+    status_counts: dict[str, dict[str, int]]
+
+
+class BranchLogIndex(pydantic.BaseModel):
+    """The rotated segments of a branch's log, oldest first"""
+
+    segments: list[LogSegment] = []
+
+
+class BranchLogRepository:
+    """
+    Stores each branch's log entries as JSON lines. New entries are appended to the branch's
+    active segment, `.secureli/logs/<branch>`, which is rotated once it grows too large or its
+    first entry too old: it is compressed alongside it as `<branch>.<rotation time>.gz` and
+    summarized in `<branch>.index.json`. Only the most recent rotated segments are kept.
+    """
+
+    log_folder_path = Path(".secureli") / "logs"
+
+    def __init__(
+        self,
+        segment_max_bytes: int,
+        segment_max_age_days: float,
+        max_rotated_segments: int,
+    ):
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age_days = segment_max_age_days
+        self.max_rotated_segments = max_rotated_segments
+
+    def append(self, branch: str, line: str):
+        """
+        Appends an entry to the branch's active segment, rotating the segment first if it is
+        due. The entry is written in a single append, so concurrent commands never interleave
+        their entries, and starts on a new line even if an earlier write was cut short.
+        :param branch: The branch the entry was logged on
+        :param line: The serialized entry, without a line ending
+        """
+        active_path = self.log_folder_path / branch
+        if self._rotation_due(active_path):
+            self._rotate(active_path)
+
+        data = (line + "\n").encode("utf8")
+        if not self._ends_with_newline(active_path):
+            data = b"\n" + data
+
+        # Do not simply mkdir the log folder path, in case the branch name contains
+        # additional folder structure, like `bugfix/` or `feature/`
+        active_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(active_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def recent(self, action: str, limit: int) -> list[dict]:
+        """
+        Reads the most recent entries for an action across every branch. Rotated segments are
+        read newest first, skipping those the index shows hold no entries for the action, and
+        stopping at the first that only holds entries older than those already found.
+        :param action: The action to read entries for
+        :param limit: The most entries to return
+        :return: Up to limit entries, oldest first
+        """
+        entries = []
+        segments = []
+        for log_path in self.log_folder_path.rglob("*"):
+            if not log_path.is_file() or log_path.name.endswith((".gz", ".tmp")):
+                continue
+            if log_path.name.endswith(".index.json"):
+                active_path = log_path.with_name(log_path.name[: -len(".index.json")])
+                segments.extend(
+                    (active_path.with_name(segment.file_name), segment)
+                    for segment in self._load_index(active_path).segments
+                    if segment.status_counts.get(action)
+                )
+            else:
+                # Active segments, and any whose rotation was interrupted
+                entries.extend(self._read_entries(log_path, action))
+
+        entries.sort(key=_entry_timestamp)
+        segments.sort(key=lambda segment: segment[1].last_timestamp, reverse=True)
+        for segment_path, segment in segments:
+            if len(entries) >= limit and segment.last_timestamp < _entry_timestamp(
+                entries[-limit]
+            ):
+                break
+            entries.extend(self._read_entries(segment_path, action))
+            entries.sort(key=_entry_timestamp)
+
+        return entries[-limit:]
+
+    def _rotation_due(self, active_path: Path) -> bool:
+        """
+        Determines whether the active segment has grown too large, or holds an entry too old,
+        from its size and its first line
+        :param active_path: The branch's active segment
+        :return: True if the segment should be rotated before appending to it
+        """
+        try:
+            if os.stat(active_path).st_size >= self.segment_max_bytes:
+                return True
+            if self.segment_max_age_days <= 0:
+                return False
+
+            with open(active_path, "r", encoding="utf8", errors="replace") as f:
+                first_entry = _parse_entry(f.readline())
+        except OSError:
+            return False
+
+        if first_entry is None:
+            return False
+
+        age = datetime.utcnow() - _entry_timestamp(first_entry)
+        return age > timedelta(days=self.segment_max_age_days)
+
+    def _ends_with_newline(self, log_path: Path) -> bool:
+        """
+        :return: True if the file is missing, empty or ends with a complete line
+        """
+        try:
+            with open(log_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return True
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except OSError:
+            return True
+
+    def _rotate(self, active_path: Path):
+        """
+        Compresses the active segment into a new rotated segment, records it in the index and
+        removes the oldest segments beyond the limit. The active segment is first renamed
+        aside, so that entries appended meanwhile start a new active segment. Failing to rotate
+        does not fail the command being logged, and segments whose rotation was interrupted
+        are finished by the next rotation.
+        :param active_path: The branch's active segment
+        """
+        rotating_path = active_path.with_name(
+            f"{active_path.name}.{time.time_ns():020d}"
+        )
+        try:
+            os.replace(active_path, rotating_path)
+        except OSError:
+            return
+
+        rotating_pattern = re.compile(re.escape(active_path.name) + r"\.\d{20}")
+        index = self._load_index(active_path)
+        for rotating_path in sorted(active_path.parent.iterdir()):
+            if rotating_pattern.fullmatch(rotating_path.name):
+                segment = self._compress(rotating_path)
+                if segment is not None:
+                    index.segments.append(segment)
+
+        excess = max(len(index.segments) - max(self.max_rotated_segments, 0), 0)
+        for segment in index.segments[:excess]:
+            _remove(active_path.with_name(segment.file_name))
+        index.segments = index.segments[excess:]
+        self._save_index(active_path, index)
+
+    def _compress(self, rotating_path: Path) -> Optional[LogSegment]:
+        """
+        Compresses a segment that was renamed aside for rotation, summarizing its entries
+        :param rotating_path: The segment to compress, which is removed once compressed
+        :return: The summary of the compressed segment, or None if it held no entries or
+        could not be compressed
+        """
+        segment_path = rotating_path.with_name(f"{rotating_path.name}.gz")
+        temp_path = rotating_path.with_name(f"{rotating_path.name}.{os.getpid()}.tmp")
+        timestamps = []
+        status_counts = {}
+        try:
+            with open(rotating_path, "r", encoding="utf8", errors="replace") as source:
+                with gzip.open(temp_path, "wt", encoding="utf8") as target:
+                    for line in source:
+                        entry = _parse_entry(line)
+                        if entry is None:
+                            continue
+                        target.write(line.rstrip("\n") + "\n")
+                        timestamps.append(_entry_timestamp(entry))
+                        action_counts = status_counts.setdefault(
+                            str(entry.get("action")), {}
+                        )
+                        status = str(entry.get("status"))
+                        action_counts[status] = action_counts.get(status, 0) + 1
+
+            if timestamps:
+                os.replace(temp_path, segment_path)
+            os.remove(rotating_path)
+        except OSError:
+            return None
+        finally:
+            _remove(temp_path)
+
+        if not timestamps:
+            return None
+
+        return LogSegment(
+            file_name=segment_path.name,
+            first_timestamp=min(timestamps),
+            last_timestamp=max(timestamps),
+            entry_count=len(timestamps),
+            status_counts=status_counts,
+        )
+
+    def _load_index(self, active_path: Path) -> BranchLogIndex:
+        """
+        Loads the index of a branch's rotated segments, dropping any whose files are missing
+        :param active_path: The branch's active segment
+        :return: The index, empty if it is missing or unreadable
+        """
+        index_path = active_path.with_name(f"{active_path.name}.index.json")
+        try:
+            index = BranchLogIndex.parse_file(index_path)
+        except (OSError, ValueError):
+            return BranchLogIndex()
+
+        index.segments = [
+            segment
+            for segment in index.segments
+            if active_path.with_name(segment.file_name).exists()
+        ]
+        return index
+
+    def _save_index(self, active_path: Path, index: BranchLogIndex):
+        """
+        Saves the index of a branch's rotated segments atomically
+        :param active_path: The branch's active segment
+        :param index: The index to save
+        """
+        index_path = active_path.with_name(f"{active_path.name}.index.json")
+        temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf8") as f:
+                f.write(index.json())
+            os.replace(temp_path, index_path)
+        except OSError:
+            _remove(temp_path)
+
+    def _read_entries(self, log_path: Path, action: str) -> Iterator[dict]:
+        """
+        Reads the entries for an action from a segment, compressed or not, skipping any lines
+        that are not entries
+        :param log_path: The segment to read
+        :param action: The action to read entries for
+        :return: An iterator of the entries
+        """
+        try:
+            if log_path.suffix == ".gz":
+                with gzip.open(log_path, "rt", encoding="utf8", errors="replace") as f:
+                    lines = f.readlines()
+            else:
+                with open(log_path, "r", encoding="utf8", errors="replace") as f:
+                    lines = f.readlines()
+        except (OSError, EOFError):
+            return
+
+        for line in lines:
+            entry = _parse_entry(line)
+            if entry is not None and entry.get("action") == action:
+                yield entry
+
+
+def _parse_entry(line: str) -> Optional[dict]:
+    """
+    :return: The entry a log line holds, or None if it does not hold one with a timestamp
+    """
+    try:
+        entry = json.loads(line)
+        datetime.fromisoformat(entry["timestamp"])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+    return entry
+
+
+def _entry_timestamp(entry: dict) -> datetime:
+    return datetime.fromisoformat(entry["timestamp"])
+
+
+def _remove(path: Path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
@@ -1,7 +1,60 @@
+import codecs
+import hashlib
+import io
+import json
+import os
+import subprocess
+from enum import Enum
 from pathlib import Path
-import re
+from typing import Iterator, Optional
 
-from secureli.utilities.patterns import combine_patterns
+import pydantic
+
+from secureli.utilities.patterns import IgnoreMatcher
+from secureli.utilities.tracing import counted, tracer
+
+
+class SkipReason(str, Enum):
+    """Why a file's contents could not be loaded for analysis"""
+
+    MISSING = "missing"
+    TOO_LARGE = "too-large"
+    BINARY = "binary"
+    UNDECODABLE = "undecodable"
+    UNREADABLE = "unreadable"
+    UNRECOGNIZED = "unrecognized"
+
+
+class FileSkippedError(ValueError):
+    """A file's contents could not be loaded, for the given reason"""
+
+    def __init__(self, reason: SkipReason, message: str):
+        super().__init__(reason, message)
+        self.reason = reason
+        self.message = message
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class FileChange(pydantic.BaseModel):
+    """
+    A file added, removed, modified or renamed between two versions of a repository. A side
+    without a path did not exist, and a side with a path but no blob ID exists only in the
+    working tree.
+    """
+
+    old_path: Optional[Path]
+    old_blob_id: Optional[str]
+    new_path: Optional[Path]
+    new_blob_id: Optional[str]
+
+
+# The object ID git reports for an absent side of a change, or one not yet hashed
+_null_blob_id = "0" * 40
+
+# The git file modes of regular files; anything else (symlinks, submodules) isn't one
+_regular_file_modes = ("100644", "100755")
 
 
 class RepoFilesRepository:
@@ -9,36 +62,337 @@ class RepoFilesRepository:
     Loads files in a given repository, or raises ValueError if the provided path is not a git repo
     """
 
+    """The size of each read from the git ls-files stream"""
+    git_stream_chunk_size = 64 * 1024
+
+    """How many bytes at the start of a file are checked for the NUL bytes of binary files"""
+    binary_sniff_size = 8192
+
     def __init__(
         self,
         max_file_size: int,
         ignored_file_extensions: str,
-        ignored_file_patterns: list[str],
+        ignore_matcher: IgnoreMatcher,
     ):
         self.max_file_size = max_file_size
         self.ignored_file_extensions = ignored_file_extensions
-        self.ignored_file_patterns = ignored_file_patterns
+        self.ignore_matcher = ignore_matcher
 
-    def list_repo_files(self, folder_path: Path) -> list[Path]:
+    def list_repo_files(self, folder_path: Path) -> Iterator[Path]:
         """
-        Loads visible files in a given repository, or raises ValueError if the provided path is not a git repo
+        Lazily lists visible files in a given repository, or raises ValueError if the provided path
+        is not a git repo. Files are drawn from git's index (tracked files, plus untracked files that
+        are not ignored), so ignored folders like node_modules are never visited. If git cannot list
+        the files, the folder is walked instead, pruning invisible and ignored folders as it goes.
         :param folder_path: The path to a git repo containing files
         :raises ValueError: The specified path does not exist or is not a git repo
-        :return: The visible files within the specified repo as a list of Path objects
+        :return: An iterator over the visible files within the specified repo as Path objects
         """
         git_path = folder_path / ".git"
         if not git_path.exists() or not git_path.is_dir():
             raise ValueError("The current folder is not a Git repository!")
 
-        file_paths = [
-            f
-            for f in list(folder_path.rglob("*.*"))
-            if f.is_file()
-            and self._no_part_is_invisible(f)
-            and self._file_extension_not_ignored(f)
-            and self._file_is_not_ignored(f)
+        return counted(
+            "files_listed",
+            (
+                f
+                for f in self._candidate_file_paths(folder_path)
+                if self.is_analyzed_path(f) and f.is_file()
+            ),
+        )
+
+    def is_analyzed_path(self, file_path: Path) -> bool:
+        """
+        True if a file at this path would be listed by list_repo_files, were it to exist
+        :param file_path: The path in question
+        :return: True if the path is visible and not ignored, otherwise False
+        """
+        return (
+            self._has_extension(file_path)
+            and self._no_part_is_invisible(file_path)
+            and self._file_extension_not_ignored(file_path)
+            and self._file_is_not_ignored(file_path)
+        )
+
+    def fingerprint(self) -> str:
+        """
+        Identifies which files are listed and loaded, so that results derived from them can
+        be discarded when that changes
+        :return: A string that differs between differently configured repositories
+        """
+        settings = [
+            self.max_file_size,
+            sorted(self.ignored_file_extensions),
+            sorted(self.ignore_matcher.patterns),
         ]
-        return file_paths
+        return hashlib.sha256(json.dumps(settings).encode()).hexdigest()
+
+    def _candidate_file_paths(self, folder_path: Path) -> Iterator[Path]:
+        """
+        Yields the files git knows about, falling back to a pruned walk of the folder when
+        git is unavailable or the listing fails before producing anything
+        :param folder_path: The path to the git repo
+        :return: An iterator of candidate file paths, prior to any secureli filtering
+        """
+        listed_any = False
+        for file_path in self._git_listed_file_paths(folder_path):
+            listed_any = True
+            yield file_path
+
+        if not listed_any:
+            yield from self._walked_file_paths(folder_path)
+
+    def _git_listed_file_paths(self, folder_path: Path) -> Iterator[Path]:
+        """
+        Streams tracked and untracked-but-not-ignored files from a single `git ls-files`
+        process, yielding each path as soon as it arrives
+        :param folder_path: The path to the git repo
+        :return: An iterator of file paths, empty if git could not be run
+        """
+        args = ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"]
+        tracer.count("subprocesses_spawned")
+        try:
+            process = subprocess.Popen(
+                args,
+                cwd=folder_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return
+
+        with process:
+            remainder = b""
+            while chunk := process.stdout.read(self.git_stream_chunk_size):
+                *names, remainder = (remainder + chunk).split(b"\0")
+                for name in names:
+                    if name:
+                        yield folder_path / os.fsdecode(name)
+
+    def tracked_blob_ids(self, folder_path: Path) -> dict[Path, str]:
+        """
+        Identifies the git blob of each tracked regular file whose working tree contents still
+        match the index, which fingerprints the file's contents without reading it
+        :param folder_path: The path to the git repo
+        :return: A dictionary of file paths (as listed by list_repo_files) to blob IDs, empty if
+        git could not be run
+        """
+        staged_entries = self._git_output(folder_path, ["ls-files", "-s", "-z"])
+        modified_names = self._git_output(folder_path, ["ls-files", "-m", "-z"])
+        if staged_entries is None or modified_names is None:
+            return {}
+
+        modified_names = set(modified_names.split(b"\0"))
+        blob_ids = {}
+        for entry in staged_entries.split(b"\0"):
+            info, _, name = entry.partition(b"\t")
+            if not name or name in modified_names:
+                continue
+
+            # Only unconflicted regular files, as symlinks and submodules are not file contents
+            mode, blob_id, stage = info.split(b" ")
+            if stage == b"0" and mode.decode() in _regular_file_modes:
+                blob_ids[folder_path / os.fsdecode(name)] = blob_id.decode()
+
+        return blob_ids
+
+    def head_commit(self, folder_path: Path, ref: str = "HEAD") -> Optional[str]:
+        """
+        Identifies the commit checked out in the repo, or the one a ref points to
+        :param folder_path: The path to the git repo
+        :param ref: The ref to identify the commit of, e.g. a branch name
+        :return: The commit ID, or None if nothing is committed, the ref is unknown or git
+        could not be run
+        """
+        output = self._git_output(
+            folder_path, ["rev-parse", "--verify", "-q", f"{ref}^{{commit}}"]
+        )
+        return output.decode().strip() if output else None
+
+    def tracked_files(self, folder_path: Path) -> Optional[list[Path]]:
+        """
+        Lists every file git tracks in the repo, the same files pre-commit scans when running
+        against all files
+        :param folder_path: The path to the git repo
+        :return: The tracked file paths, or None if git could not be run
+        """
+        output = self._git_output(folder_path, ["ls-files", "-z"])
+        if output is None:
+            return None
+
+        return [folder_path / os.fsdecode(name) for name in output.split(b"\0") if name]
+
+    def changed_files(
+        self, folder_path: Path, base_ref: str, head_ref: Optional[str] = None
+    ) -> Optional[list[Path]]:
+        """
+        Lists the files changed since the point a branch diverged from a base ref, as a pull
+        request would show them, with a single git process. Renamed files are listed under
+        their new names, and deleted files are left out.
+        :param folder_path: The path to the git repo
+        :param base_ref: The ref the changes are to be merged into, e.g. origin/main
+        :param head_ref: The ref holding the changes, or None for HEAD
+        :return: The changed file paths, or None if git could not be run or a ref is unknown
+        """
+        output = self._git_output(
+            folder_path,
+            [
+                "diff",
+                "--name-only",
+                "-z",
+                "--no-renames",
+                "--diff-filter=d",
+                f"{base_ref}...{head_ref or 'HEAD'}",
+                "--",
+            ],
+        )
+        if output is None:
+            return None
+
+        return [folder_path / os.fsdecode(name) for name in output.split(b"\0") if name]
+
+    def diff_files(
+        self, folder_path: Path, from_commit: str, to_commit: Optional[str]
+    ) -> Optional[list[FileChange]]:
+        """
+        Lists the tracked files that differ between two commits, or between a commit and the
+        working tree, detecting renames
+        :param folder_path: The path to the git repo
+        :param from_commit: The commit to compare from
+        :param to_commit: The commit to compare to, or None to compare to the working tree
+        :return: The changed files, or None if they could not be determined in terms of
+        regular files (e.g. an unknown commit, a merge conflict or a changed symlink)
+        """
+        args = ["diff", "--raw", "-z", "-M", "--no-abbrev", from_commit]
+        args += [to_commit, "--"] if to_commit else ["--"]
+        output = self._git_output(folder_path, args)
+        if output is None:
+            return None
+
+        fields = output.split(b"\0")
+        changes = []
+        index = 0
+        while index < len(fields) and fields[index]:
+            old_mode, new_mode, old_blob_id, new_blob_id, status = (
+                fields[index].decode().lstrip(":").split(" ")
+            )
+            path_count = 2 if status[0] in "RC" else 1
+            paths = [
+                folder_path / os.fsdecode(name)
+                for name in fields[index + 1 : index + 1 + path_count]
+            ]
+            index += 1 + path_count
+
+            if status[0] not in "ADMRT":
+                return None
+            if any(
+                mode != "000000" and mode not in _regular_file_modes
+                for mode in (old_mode, new_mode)
+            ):
+                return None
+
+            changes.append(
+                FileChange(
+                    old_path=paths[0] if old_mode != "000000" else None,
+                    old_blob_id=old_blob_id if old_mode != "000000" else None,
+                    new_path=paths[-1] if new_mode != "000000" else None,
+                    new_blob_id=(
+                        new_blob_id
+                        if new_mode != "000000" and new_blob_id != _null_blob_id
+                        else None
+                    ),
+                )
+            )
+
+        return changes
+
+    def untracked_files(self, folder_path: Path) -> Optional[list[Path]]:
+        """
+        Lists the files in the working tree that git neither tracks nor ignores
+        :param folder_path: The path to the git repo
+        :return: The untracked files, or None if git could not be run
+        """
+        args = ["ls-files", "-z", "--others", "--exclude-standard"]
+        output = self._git_output(folder_path, args)
+        if output is None:
+            return None
+
+        return [folder_path / os.fsdecode(name) for name in output.split(b"\0") if name]
+
+    def load_blob(
+        self, folder_path: Path, file_path: Path, blob_id: str, max_chars: Optional[int]
+    ) -> str:
+        """
+        Loads the contents of a file as committed to the repo, just as load_file would load
+        them from the working tree
+        :param folder_path: The path to the git repo
+        :param file_path: The path the contents were committed at, for error messages
+        :param blob_id: The git blob ID of the contents
+        :param max_chars: If set, only this many characters from the start are returned
+        :raises A FileSkippedError (a ValueError) if the contents cannot be loaded
+        :return: the contents of the blob as a str, or raises a ValueError
+        """
+        size = self._git_output(folder_path, ["cat-file", "-s", blob_id])
+        if size is not None and int(size) > self.max_file_size:
+            raise FileSkippedError(
+                SkipReason.TOO_LARGE, f"File at path {file_path} was too big to scan"
+            )
+
+        contents = self._git_output(folder_path, ["cat-file", "blob", blob_id])
+        if size is None or contents is None:
+            raise FileSkippedError(
+                SkipReason.UNREADABLE,
+                f"An unknown error occurred loading the file from {file_path}",
+            )
+
+        return self._decode(file_path, memoryview(contents), True, max_chars)
+
+    def _git_output(self, folder_path: Path, args: list[str]) -> Optional[bytes]:
+        """
+        Runs a git command in the repo
+        :param folder_path: The path to the git repo
+        :param args: The arguments to git
+        :return: The command's output, or None if git could not be run or failed
+        """
+        tracer.count("subprocesses_spawned")
+        try:
+            completed_process = subprocess.run(
+                ["git", *args],
+                cwd=folder_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+
+        return completed_process.stdout if completed_process.returncode == 0 else None
+
+    def _walked_file_paths(self, folder_path: Path) -> Iterator[Path]:
+        """
+        Walks the folder, without descending into invisible or ignored folders
+        :param folder_path: The path to the git repo
+        :return: An iterator of file paths
+        """
+        for dir_path, dir_names, file_names in os.walk(folder_path):
+            dir_names[:] = [
+                dir_name
+                for dir_name in dir_names
+                if dir_name[0] != "."
+                and not self.ignore_matcher.is_directory_ignored(
+                    Path(dir_path) / dir_name
+                )
+            ]
+            for file_name in file_names:
+                yield Path(dir_path) / file_name
+
+    def _has_extension(self, file_path: Path) -> bool:
+        """
+        True if the file name contains an extension separator, matching the `*.*` files
+        language analysis has always considered
+        :param file_path: The file in question
+        :return: True if the file name contains a period, otherwise False
+        """
+        return "." in file_path.name
 
     def _file_is_not_ignored(self, file_path: Path):
         """
@@ -46,11 +400,7 @@ class RepoFilesRepository:
         :param file_path: The file in question
         :return: True if the file is not ignored, otherwise False
         """
-
-        combined_ignore_pattern = combine_patterns(self.ignored_file_patterns)
-        return not combined_ignore_pattern or not re.findall(
-            combined_ignore_pattern, str(file_path)
-        )
+        return not self.ignore_matcher.is_ignored(file_path)
 
     def _file_extension_not_ignored(self, file_path: Path):
         """
@@ -70,27 +420,106 @@ class RepoFilesRepository:
         """
         return not [p for p in file_path.parts if p[0] == "."]
 
-    def load_file(self, file_path: Path) -> str:
+    def load_file(self, file_path: Path, max_chars: Optional[int] = None) -> str:
         """
-        Loads the contents of the specified file into memory or raises a ValueError
+        Loads the contents of the specified file into memory or raises a ValueError. The file
+        is opened and measured once, and only as much of it as is needed is read into a
+        buffer, so large files never have to be held in memory in full.
         :param file_path: The path to the file to load
-        :raises A ValueError if an error occurs loading the file
+        :param max_chars: If set, only this many characters from the start of the file are
+        read, which is all some lexer guessers need
+        :raises A FileSkippedError (a ValueError) if an error occurs loading the file, with
+        the reason it could not be loaded
         :return: the contents of the file as a str, or raises a ValueError
         """
+        try:
+            with io.FileIO(file_path, "r") as file_io:
+                file_size = os.fstat(file_io.fileno()).st_size
+                if file_size > self.max_file_size:
+                    raise FileSkippedError(
+                        SkipReason.TOO_LARGE,
+                        f"File at path {file_path} was too big to scan",
+                    )
+
+                # UTF-8 encodes each character in at most four bytes
+                read_size = (
+                    file_size if max_chars is None else min(file_size, max_chars * 4)
+                )
+                buffer = memoryview(bytearray(read_size))
+                read_count = self._read_into(
+                    file_io, buffer, 0, min(read_size, self.binary_sniff_size)
+                )
+                self._raise_if_binary(file_path, buffer[:read_count])
+                read_count = self._read_into(file_io, buffer, read_count, read_size)
+        except (FileNotFoundError, IsADirectoryError):
+            raise FileSkippedError(
+                SkipReason.MISSING, f"File at path {file_path} did not exist"
+            )
+        except OSError:
+            raise FileSkippedError(
+                SkipReason.UNREADABLE,
+                f"An unknown error occurred loading the file from {file_path}",
+            )
+
+        return self._decode(
+            file_path, buffer[:read_count], read_count == file_size, max_chars
+        )
 
-        if not file_path.exists() or not file_path.is_file():
-            raise ValueError(f"File at path {file_path} did not exist")
+    def _read_into(
+        self, file_io: io.FileIO, buffer: memoryview, read_count: int, read_size: int
+    ) -> int:
+        """
+        Fills the buffer from the file, up to the given size or the end of the file
+        :param file_io: The open file
+        :param buffer: The buffer to fill
+        :param read_count: How many bytes of the buffer are already filled
+        :param read_size: How many bytes of the buffer to fill
+        :return: How many bytes of the buffer are now filled
+        """
+        while read_count < read_size:
+            count = file_io.readinto(buffer[read_count:read_size])
+            if not count:
+                break
+            read_count += count
+        return read_count
 
-        if file_path.stat().st_size > self.max_file_size:
-            raise ValueError(f"File at path {file_path} was too big to scan")
+    def _raise_if_binary(self, file_path: Path, data: memoryview):
+        """
+        Raises a FileSkippedError if the start of the contents contains a NUL byte, which text
+        files never contain but binary files almost always do
+        :param file_path: The path of the file, for error messages
+        :param data: The contents, or the start of them
+        """
+        if b"\0" in data[: self.binary_sniff_size].tobytes():
+            raise FileSkippedError(
+                SkipReason.BINARY, f"File at path {file_path} is a binary file"
+            )
 
+    def _decode(
+        self,
+        file_path: Path,
+        data: memoryview,
+        complete: bool,
+        max_chars: Optional[int],
+    ) -> str:
+        """
+        Decodes a file's contents as UTF-8 text, with universal newlines as when reading a
+        file in text mode
+        :param file_path: The path of the file, for error messages
+        :param data: The contents, or the start of them
+        :param complete: True if the data is all of the contents, otherwise a character may
+        have been cut off at the end and is dropped
+        :param max_chars: If set, only this many characters from the start are returned
+        :raises A FileSkippedError if the contents are binary or are not UTF-8
+        :return: The decoded text
+        """
+        self._raise_if_binary(file_path, data)
         try:
-            with open(file_path, "r", encoding="utf8") as file_handle:
-                text = file_handle.read()
-                return text
-        except IOError:
-            pass
-        except ValueError:
-            pass
-
-        raise ValueError(f"An unknown error occurred loading the file from {file_path}")
+            text = codecs.getincrementaldecoder("utf8")().decode(data, final=complete)
+        except UnicodeDecodeError:
+            raise FileSkippedError(
+                SkipReason.UNDECODABLE, f"File at path {file_path} is not UTF-8 text"
+            )
+
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text if max_chars is None else text[:max_chars]
@@ -0,0 +1,310 @@
+import sqlite3
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+import pydantic
+
+SECONDS_PER_DAY = 86400
+
+EPOCH = date(1970, 1, 1)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    branch TEXT,
+    successful INTEGER NOT NULL,
+    failure_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_timestamp ON runs (timestamp, successful);
+
+CREATE TABLE IF NOT EXISTS hooks (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    hook_id TEXT NOT NULL,
+    UNIQUE (repo, hook_id)
+);
+
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS failures (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    hook_id INTEGER NOT NULL REFERENCES hooks (id),
+    file_id INTEGER NOT NULL REFERENCES files (id)
+);
+CREATE INDEX IF NOT EXISTS failures_by_run ON failures (run_id);
+
+CREATE TABLE IF NOT EXISTS daily_failures (
+    hook_id INTEGER NOT NULL REFERENCES hooks (id),
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    day INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    PRIMARY KEY (hook_id, file_id, day)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS total_failures (
+    hook_id INTEGER NOT NULL REFERENCES hooks (id),
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    failures INTEGER NOT NULL,
+    PRIMARY KEY (hook_id, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS total_failures_by_failures ON total_failures (failures);
+"""
+
+
+class FailureRecord(pydantic.BaseModel):
+    """A hook's failure on a file, as recorded in the scan history"""
+
+    repo: str
+    hook_id: str
+    file: str
+
+
+class FailureTrend(pydantic.BaseModel):
+    """How often a hook has failed on a file over a period"""
+
+    hook_id: str
+    file: str
+    failures: int
+    last_failed_on: date
+
+
+class RunSummary(pydantic.BaseModel):
+    """How many scans ran over a period, and how many of them failed"""
+
+    runs: int
+    failed_runs: int
+
+
+class ScanHistoryRepository:
+    """
+    Records the outcome of every scan in a SQLite database, `.secureli/history.db`, so that
+    failure trends can be queried without re-reading the logs. Hooks and files are stored once
+    each and referred to by id. As failures are recorded, they are also counted for each hook
+    and file, both per day and in total, so that the pairs that failed most can be found
+    without aggregating every failure. Recording is disabled unless enabled by the history
+    setting.
+    """
+
+    history_path = Path(".secureli") / "history.db"
+
+    """How long to wait for another command to finish writing to the history"""
+    busy_timeout_seconds = 5
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+
+    def record(
+        self,
+        successful: bool,
+        failures: list[FailureRecord],
+        branch: Optional[str] = None,
+    ):
+        """
+        Records a scan and its failures in a single transaction. Failing to do so does not
+        fail the scan being recorded.
+        :param successful: Whether the scan passed
+        :param failures: The failures the scan found
+        :param branch: The branch that was scanned
+        """
+        if not self.enabled:
+            return
+
+        timestamp = time.time()
+        day = int(timestamp // SECONDS_PER_DAY)
+        try:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = self._connect()
+        except (OSError, sqlite3.Error):
+            return
+
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            run_id = connection.execute(
+                "INSERT INTO runs (timestamp, branch, successful, failure_count)"
+                " VALUES (?, ?, ?, ?)",
+                (timestamp, branch, int(successful), len(failures)),
+            ).lastrowid
+
+            hook_ids = self._ids(
+                connection,
+                "INSERT OR IGNORE INTO hooks (repo, hook_id) VALUES (?, ?)",
+                "SELECT id FROM hooks WHERE repo = ? AND hook_id = ?",
+                {(failure.repo, failure.hook_id) for failure in failures},
+            )
+            file_ids = self._ids(
+                connection,
+                "INSERT OR IGNORE INTO files (path) VALUES (?)",
+                "SELECT id FROM files WHERE path = ?",
+                {(failure.file,) for failure in failures},
+            )
+            failure_ids = [
+                (hook_ids[(failure.repo, failure.hook_id)], file_ids[(failure.file,)])
+                for failure in failures
+            ]
+
+            connection.executemany(
+                "INSERT INTO failures (run_id, hook_id, file_id) VALUES (?, ?, ?)",
+                [(run_id, hook_id, file_id) for hook_id, file_id in failure_ids],
+            )
+            connection.executemany(
+                "INSERT INTO daily_failures (hook_id, file_id, day, failures)"
+                " VALUES (?, ?, ?, 1)"
+                " ON CONFLICT (hook_id, file_id, day)"
+                " DO UPDATE SET failures = failures + 1",
+                [(hook_id, file_id, day) for hook_id, file_id in failure_ids],
+            )
+            connection.executemany(
+                "INSERT INTO total_failures (hook_id, file_id, failures)"
+                " VALUES (?, ?, 1)"
+                " ON CONFLICT (hook_id, file_id)"
+                " DO UPDATE SET failures = failures + 1",
+                failure_ids,
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+        finally:
+            connection.close()
+
+    def failure_trends(self, days: int, limit: int) -> list[FailureTrend]:
+        """
+        Finds the hooks that failed most often on each file over recent days. Pairs of hook
+        and file are visited in order of how often they have ever failed, counting each one's
+        failures over the period, until no pair left could have failed more often over the
+        period than those already found.
+        :param days: How many days to look back over, including today
+        :param limit: The most hook and file pairs to return
+        :return: The pairs that failed most, most failures first. Pairs that failed equally
+        often may be left out in favor of each other.
+        """
+        if not self.history_path.exists():
+            return []
+
+        first_day = self._first_day(days)
+        try:
+            connection = self._connect()
+        except sqlite3.Error:
+            return []
+
+        try:
+            trends = []
+            for hook_id, file_id, total in connection.execute(
+                "SELECT hook_id, file_id, failures FROM total_failures"
+                " ORDER BY failures DESC"
+            ):
+                if len(trends) >= limit and total <= trends[-1][0]:
+                    break
+
+                failures, last_day = connection.execute(
+                    "SELECT SUM(failures), MAX(day) FROM daily_failures"
+                    " WHERE hook_id = ? AND file_id = ? AND day >= ?",
+                    (hook_id, file_id, first_day),
+                ).fetchone()
+                if failures:
+                    trends.append((failures, last_day, hook_id, file_id))
+                    trends.sort(key=lambda trend: -trend[0])
+                    del trends[limit:]
+
+            return [
+                FailureTrend(
+                    hook_id=connection.execute(
+                        "SELECT hook_id FROM hooks WHERE id = ?", (hook_id,)
+                    ).fetchone()[0],
+                    file=connection.execute(
+                        "SELECT path FROM files WHERE id = ?", (file_id,)
+                    ).fetchone()[0],
+                    failures=failures,
+                    last_failed_on=EPOCH + timedelta(days=last_day),
+                )
+                for failures, last_day, hook_id, file_id in trends
+            ]
+        except sqlite3.Error:
+            return []
+        finally:
+            connection.close()
+
+    def run_summary(self, days: int) -> RunSummary:
+        """
+        Counts the scans recorded over recent days
+        :param days: How many days to look back over, including today
+        :return: How many scans ran, and how many failed
+        """
+        rows = self._query(
+            "SELECT COUNT(*), COUNT(*) - COALESCE(SUM(successful), 0)"
+            " FROM runs WHERE timestamp >= ?",
+            (self._first_day(days) * SECONDS_PER_DAY,),
+        )
+        runs, failed_runs = rows[0] if rows else (0, 0)
+        return RunSummary(runs=runs, failed_runs=failed_runs)
+
+    def _first_day(self, days: int) -> int:
+        return int(time.time() // SECONDS_PER_DAY) - max(days, 1) + 1
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens the history, creating its tables if needed. Transactions are managed explicitly.
+        :return: The connection
+        """
+        connection = sqlite3.connect(
+            self.history_path,
+            timeout=self.busy_timeout_seconds,
+            isolation_level=None,
+        )
+        try:
+            # Lets queries read the history while a scan is recording to it
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            if (
+                connection.execute("PRAGMA user_version").fetchone()[0]
+                != SCHEMA_VERSION
+            ):
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except sqlite3.Error:
+            connection.close()
+            raise
+
+        return connection
+
+    def _query(self, sql: str, parameters: tuple) -> list[tuple]:
+        """
+        Runs a query against the history
+        :return: The rows found, or none if nothing has been recorded
+        """
+        if not self.history_path.exists():
+            return []
+
+        try:
+            connection = self._connect()
+        except sqlite3.Error:
+            return []
+
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error:
+            return []
+        finally:
+            connection.close()
+
+    def _ids(
+        self,
+        connection: sqlite3.Connection,
+        insert_sql: str,
+        select_sql: str,
+        keys: set[tuple],
+    ) -> dict[tuple, int]:
+        """
+        Finds the ids of rows with the given keys, inserting any that are missing
+        :return: A dictionary of each key to its row's id
+        """
+        connection.executemany(insert_sql, keys)
+        return {key: connection.execute(select_sql, key).fetchone()[0] for key in keys}
@@ -0,0 +1,80 @@
+import json
+import os
+from pathlib import Path
+
+
+class ScanLedgerRepository:
+    """
+    Save and retrieve which hooks each file has passed, so that scans of all files only need to
+    hand pre-commit the files that changed since they last passed. Files are identified by the
+    caller (by git blob ID where possible, so the ledger survives checkouts and can be restored
+    onto fresh clones, such as CI runners) and the whole ledger is discarded whenever the
+    pre-commit configuration it was recorded with changes.
+    """
+
+    ledger_path = Path(".secureli") / "scan-ledger.json"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+
+    def load(self, config_version: str) -> dict[str, set[str]]:
+        """
+        Load the recorded passes, or an empty ledger if it is missing, unreadable or was
+        recorded with a different configuration
+        :param config_version: Identifies the pre-commit configuration being scanned with
+        :return: A dictionary of file keys to the ids of the hooks they passed, least recently
+        used first
+        """
+        if self.max_entries <= 0:
+            return {}
+
+        try:
+            with open(self.ledger_path, "r", encoding="utf8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if data.get("config_version") != config_version:
+            return {}
+
+        # Each file's passes are stored as a bitmask over the list of hook ids
+        hook_ids = data.get("hook_ids", [])
+        return {
+            file_key: {
+                hook_id
+                for index, hook_id in enumerate(hook_ids)
+                if hook_mask & (1 << index)
+            }
+            for file_key, hook_mask in data.get("passes", {}).items()
+        }
+
+    def save(self, config_version: str, passes: dict[str, set[str]]):
+        """
+        Save the recorded passes, evicting the least recently used entries beyond the size cap
+        :param config_version: Identifies the pre-commit configuration being scanned with
+        :param passes: A dictionary of file keys to the ids of the hooks they passed, least
+        recently used first
+        """
+        if self.max_entries <= 0:
+            return
+
+        file_keys = list(passes)[-self.max_entries :]
+        hook_ids = sorted({hook_id for key in file_keys for hook_id in passes[key]})
+        hook_bits = {hook_id: 1 << index for index, hook_id in enumerate(hook_ids)}
+        data = {
+            "config_version": config_version,
+            "hook_ids": hook_ids,
+            "passes": {
+                file_key: sum(hook_bits[hook_id] for hook_id in passes[file_key])
+                for file_key in file_keys
+            },
+        }
+
+        temp_path = self.ledger_path.with_name(f"{self.ledger_path.name}.{os.getpid()}")
+        try:
+            self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.ledger_path)
+        except OSError:
+            pass
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from typing import Optional
 from enum import Enum
@@ -5,10 +6,25 @@ import yaml
 
 from pydantic import BaseModel
 
+from secureli.utilities.secureli_meta import secureli_version
+
+
+class LanguageBaseline(BaseModel):
+    """
+    How many of the files committed as of a given commit were analyzed as each lexer, from
+    which later language analyses can be derived by analyzing only the files that changed
+    """
+
+    commit: str
+    fingerprint: str
+    lexer_counts: dict[str, int]
+
 
 class SecureliConfig(BaseModel):
     languages: Optional[list[str]]
     version_installed: Optional[str]
+    language_baseline: Optional[LanguageBaseline]
+    install_fingerprint: Optional[str]
 
 
 class DeprecatedSecureliConfig(BaseModel):
@@ -29,6 +45,8 @@ class VerifyConfigOutcome(str, Enum):
 class SecureliConfigRepository:
     """Save and retrieve the seCureLI configuration"""
 
+    fingerprinted_file_paths = [Path(".pre-commit-config.yaml"), Path(".secureli.yaml")]
+
     def save(self, secureli_config: SecureliConfig):
         """
         Save the specified configuration to the .secureli folder
@@ -96,6 +114,34 @@ class SecureliConfigRepository:
             version_installed=old_config.version_installed,
         )
 
+    def install_fingerprint(self, secureli_config: SecureliConfig) -> str:
+        """
+        Identifies everything verifying an installation depends on, from the configuration
+        itself, the installed seCureLI version and the size, modification time and inode of
+        each configuration file, without reading any of those files
+        :param secureli_config: The configuration the installation was verified with
+        :return: A string that changes whenever the installation may need to be verified again
+        """
+        file_stats = []
+        for file_path in self.fingerprinted_file_paths:
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                file_stats.append(f"{file_path}:missing")
+                continue
+            file_stats.append(
+                f"{file_path}:{stat_result.st_size}:{stat_result.st_mtime_ns}:{stat_result.st_ino}"
+            )
+
+        return "|".join(
+            [
+                secureli_version(),
+                ",".join(secureli_config.languages or []),
+                secureli_config.version_installed or "",
+                *file_stats,
+            ]
+        )
+
     def _initialize_secureli_directory(self):
         """
         Creates the .secureli folder within the current directory if needed.
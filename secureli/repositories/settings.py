@@ -67,6 +67,9 @@ class RepoFilesSettings(BaseSettings):
     max_file_size: int = Field(default=100000)
     ignored_file_extensions: list[str] = Field(default=default_ignored_extensions)
     exclude_file_patterns: list[str] = Field(default=[])
+    analysis_workers: int = Field(default=1)
+    analysis_sample_threshold: int = Field(default=0)
+    analysis_cache_max_entries: int = Field(default=500000)
 
 
 class EchoLevel(str, Enum):
@@ -90,6 +93,7 @@ class LanguageSupportSettings(BaseSettings):
     """
 
     command_timeout_seconds: int = Field(default=300)
+    hook_timeout_seconds: int = Field(default=0)
 
 
 class PreCommitHook(BaseSettings):
@@ -122,6 +126,83 @@ class PreCommitSettings(BaseSettings):
     suppressed_repos: list[str] = Field(default=[])
 
 
+default_serial_hook_ids = [
+    "black",
+    "dotnet-format",
+    "end-of-file-fixer",
+    "mixed-line-ending",
+    "prettier",
+    "trailing-whitespace",
+]
+
+
+class ScanSettings(BaseSettings):
+    """
+    Settings that affect how seCureLI runs pre-commit's hooks during a scan.
+    """
+
+    hook_workers: int = Field(default=1)
+    serial_hook_ids: list[str] = Field(default=default_serial_hook_ids)
+    pass_ledger_max_entries: int = Field(default=200000)
+
+
+class TraceSettings(BaseSettings):
+    """
+    Settings that affect how seCureLI records where its time goes.
+    """
+
+    enabled: bool = Field(default=False)
+
+
+class TelemetrySettings(BaseSettings):
+    """
+    Settings that affect how seCureLI sends log entries to the instrumentation backend.
+    """
+
+    batch_size: int = Field(default=50)
+    max_retries: int = Field(default=2)
+    request_timeout_seconds: float = Field(default=5)
+    exit_budget_seconds: float = Field(default=0.5)
+    spool_max_entries: int = Field(default=10000)
+
+
+class LogsSettings(BaseSettings):
+    """
+    Settings that affect how seCureLI rotates and compresses each branch's log.
+    """
+
+    segment_max_bytes: int = Field(default=1000000)
+    segment_max_age_days: float = Field(default=30)
+    max_rotated_segments: int = Field(default=20)
+
+
+class HistorySettings(BaseSettings):
+    """
+    Settings that affect whether seCureLI keeps a history of its scans.
+    """
+
+    enabled: bool = Field(default=False)
+
+
+class DaemonSettings(BaseSettings):
+    """
+    Settings that affect how long the seCureLI daemon keeps running.
+    """
+
+    idle_timeout_seconds: float = Field(default=1800)
+
+
+class WatchSettings(BaseSettings):
+    """
+    Settings that affect how `secureli watch` notices and batches edits.
+    """
+
+    debounce_seconds: float = Field(default=0.5)
+    max_pending_paths: int = Field(default=1000)
+    poll_interval_seconds: float = Field(default=1)
+    polling: bool = Field(default=False)
+
+
 class SecureliFile(BaseModel):
     """
     Represents the contents of the .secureli.yaml file
@@ -131,6 +212,13 @@ class SecureliFile(BaseModel):
     echo: Optional[EchoSettings]
     language_support: Optional[LanguageSupportSettings] = Field(default=None)
     pre_commit: Optional[PreCommitSettings] = Field(default=None)
+    scan: Optional[ScanSettings] = Field(default=None)
+    trace: Optional[TraceSettings] = Field(default=None)
+    telemetry: Optional[TelemetrySettings] = Field(default=None)
+    logs: Optional[LogsSettings] = Field(default=None)
+    history: Optional[HistorySettings] = Field(default=None)
+    daemon: Optional[DaemonSettings] = Field(default=None)
+    watch: Optional[WatchSettings] = Field(default=None)
 
 
 class SecureliRepository:
@@ -0,0 +1,141 @@
+import os
+import time
+from pathlib import Path
+
+import pydantic
+
+
+class SpooledEntry(pydantic.BaseModel):
+    """A log entry waiting in the spool, claimed for sending"""
+
+    path: Path
+    data: str
+
+
+class TelemetrySpoolRepository:
+    """
+    Holds log entries on the disk until they can be sent, so that sending them never delays a
+    command and entries that could not be sent are retried by later commands. Each entry is its
+    own file, written atomically, so adding one never reads or rewrites the rest and an
+    interrupted write never leaves a partial entry behind. Entries are claimed for sending by
+    renaming them, so concurrent commands never send the same entry twice.
+    """
+
+    spool_path = Path(".secureli") / "telemetry"
+
+    """How long an entry may stay claimed before it is assumed its sender has died"""
+    stale_claim_seconds = 600
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+
+    def add(self, data: str):
+        """
+        Adds an entry to the spool. Failing to do so does not fail the command being logged.
+        :param data: The serialized log entry
+        """
+        if self.max_entries <= 0:
+            return
+
+        # Names sort in the order entries were added, and are unique across processes
+        entry_name = f"{time.time_ns():020d}-{os.getpid()}"
+        temp_path = self.spool_path / f"{entry_name}.tmp"
+        try:
+            self.spool_path.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf8") as f:
+                f.write(data)
+            os.replace(temp_path, self.spool_path / f"{entry_name}.json")
+        except OSError:
+            pass
+
+    def claim(self, limit: int) -> list[SpooledEntry]:
+        """
+        Claims the oldest unclaimed entries for sending, first discarding the oldest entries
+        beyond the size cap and reclaiming entries whose sender appears to have died
+        :param limit: The most entries to claim
+        :return: The claimed entries, oldest first, which must then be removed or released
+        """
+        try:
+            entry_paths = sorted(self.spool_path.iterdir())
+        except OSError:
+            return []
+
+        unclaimed_paths = []
+        for entry_path in entry_paths:
+            if entry_path.suffix == ".json":
+                unclaimed_paths.append(entry_path)
+            elif entry_path.suffix == ".claimed" and self._is_stale(entry_path):
+                unclaimed_path = self._unclaimed_path(entry_path)
+                if self._rename(entry_path, unclaimed_path):
+                    unclaimed_paths.append(unclaimed_path)
+            elif entry_path.suffix == ".tmp" and self._is_stale(entry_path):
+                self._unlink(entry_path)  # Left behind by an interrupted add
+        unclaimed_paths.sort()
+
+        overflow = len(unclaimed_paths) - self.max_entries
+        for entry_path in unclaimed_paths[: max(overflow, 0)]:
+            self._unlink(entry_path)
+
+        claimed_entries = []
+        for entry_path in unclaimed_paths[max(overflow, 0) :]:
+            if len(claimed_entries) >= limit:
+                break
+
+            claimed_path = entry_path.with_name(
+                f"{entry_path.stem}.{os.getpid()}.claimed"
+            )
+            if not self._rename(entry_path, claimed_path):
+                continue  # Claimed by another process first
+
+            try:
+                # Renaming keeps the entry's modification time, which now marks its claim
+                os.utime(claimed_path)
+                with open(claimed_path, "r", encoding="utf8") as f:
+                    claimed_entries.append(
+                        SpooledEntry(path=claimed_path, data=f.read())
+                    )
+            except OSError:
+                self._unlink(claimed_path)
+
+        return claimed_entries
+
+    def remove(self, entries: list[SpooledEntry]):
+        """
+        Removes claimed entries from the spool, once they have been sent
+        :param entries: The claimed entries
+        """
+        for entry in entries:
+            self._unlink(entry.path)
+
+    def release(self, entries: list[SpooledEntry]):
+        """
+        Returns claimed entries to the spool, to be sent later
+        :param entries: The claimed entries
+        """
+        for entry in entries:
+            self._rename(entry.path, self._unclaimed_path(entry.path))
+
+    def _unclaimed_path(self, claimed_path: Path) -> Path:
+        entry_name = claimed_path.name.split(".")[0]
+        return claimed_path.with_name(f"{entry_name}.json")
+
+    def _is_stale(self, entry_path: Path) -> bool:
+        try:
+            modified_at = entry_path.stat().st_mtime
+        except OSError:
+            return False
+
+        return time.time() - modified_at > self.stale_claim_seconds
+
+    def _rename(self, source_path: Path, target_path: Path) -> bool:
+        try:
+            os.replace(source_path, target_path)
+            return True
+        except OSError:
+            return False
+
+    def _unlink(self, entry_path: Path):
+        try:
+            entry_path.unlink()
+        except OSError:
+            pass
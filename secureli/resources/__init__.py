@@ -1 +1 @@
-from secureli.resources.read_resource import read_resource
+from secureli.resources.read_resource import read_resource, resources_fingerprint
@@ -1,3 +1,5 @@
+import functools
+import os
 from pathlib import Path
 
 
@@ -16,3 +18,24 @@ def read_resource(resource_name: str) -> str:
 
     with open(resource_path, encoding="utf8") as resource_file:
         return resource_file.read()
+
+
+@functools.lru_cache(maxsize=None)
+def resources_fingerprint() -> str:
+    """
+    Identifies the contents of the resource files from their names, sizes and modification
+    times, without reading them. They ship with seCureLI, so they are only stat'ed once per
+    process.
+    :return: A string that changes whenever a resource file is added, removed or modified
+    """
+    resources_folder = Path(__file__).parent / "files"
+    file_stats = []
+    for dir_path, dir_names, file_names in os.walk(resources_folder):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            stat_result = os.stat(os.path.join(dir_path, file_name))
+            file_stats.append(
+                f"{dir_path}/{file_name}:{stat_result.st_size}:{stat_result.st_mtime_ns}"
+            )
+
+    return "|".join(file_stats)
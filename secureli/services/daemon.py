@@ -0,0 +1,227 @@
+import io
+import json
+import os
+import socket
+import traceback
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Callable, Optional
+
+from secureli.client import SOCKET_PATH, is_request_variable
+from secureli.utilities.git_meta import git_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows, which has no Unix domain sockets to serve on either
+    fcntl = None
+
+
+class _ReplyWriter(io.TextIOBase):
+    """
+    Streams what a command prints back to the client that requested it. If the client goes
+    away, the command still runs to completion, but its output is dropped.
+    """
+
+    def __init__(self, connection: socket.socket, color: bool):
+        self.connection = connection
+        self.color = color
+        self.connected = True
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            # Tells click that this is a text stream, not a binary one
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if text:
+            self.send({"output": text})
+        return len(text)
+
+    def isatty(self) -> bool:
+        # Lets typer keep colors if the client is printing to a terminal
+        return self.color
+
+    def send(self, reply: dict):
+        if not self.connected:
+            return
+
+        try:
+            self.connection.sendall(json.dumps(reply).encode("utf8") + b"\n")
+        except OSError:
+            self.connected = False
+
+
+class DaemonService:
+    """
+    Keeps seCureLI loaded for a repository, running the commands requested by `secureli-client`
+    over a Unix domain socket, so that they skip Python's start up, imports and seCureLI's
+    configuration. Commands are run one at a time. Before each one, the files seCureLI's
+    configuration is read from are checked for changes, reloading it if any changed. The daemon
+    stops once no command has been requested for idle_timeout_seconds.
+    """
+
+    socket_path = Path(SOCKET_PATH)
+
+    """Held for as long as a daemon is serving the repository, so only one ever does"""
+    lock_path = Path(".secureli") / "daemon.lock"
+
+    """
+    The files that seCureLI's configuration is read from. The file naming the current branch,
+    HEAD in the repo's git folder, is watched too.
+    """
+    watched_paths = [
+        Path(".secureli.yaml"),
+        Path(".pre-commit-config.yaml"),
+        Path(".gitignore"),
+    ]
+
+    """How long a client may take to send its request once connected"""
+    request_timeout_seconds = 5
+
+    def __init__(self, idle_timeout_seconds: float):
+        self.idle_timeout_seconds = idle_timeout_seconds
+
+    def serve(
+        self,
+        run_command: Callable[[list[str]], int],
+        reload: Callable[[], None],
+    ) -> bool:
+        """
+        Serves commands until idle for too long
+        :param run_command: Runs a command from its arguments, returning its exit code
+        :param reload: Discards everything loaded from the watched files
+        :return: False if the daemon could not serve, as another is already serving the
+        repository or the platform has no Unix domain sockets
+        """
+        if fcntl is None or not hasattr(socket, "AF_UNIX"):
+            return False
+
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False
+
+            self._remove_socket()  # Left behind by a daemon that was killed
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                server.bind(str(self.socket_path))
+                server.listen()
+                server.settimeout(self.idle_timeout_seconds or None)
+                self._serve_requests(server, run_command, reload)
+            finally:
+                server.close()
+                self._remove_socket()
+
+        return True
+
+    def _serve_requests(
+        self,
+        server: socket.socket,
+        run_command: Callable[[list[str]], int],
+        reload: Callable[[], None],
+    ):
+        """
+        Accepts and runs requests one at a time until none arrives within the idle timeout
+        """
+        watched_paths = [*self.watched_paths, git_dir() / "HEAD"]
+        watched_state = self._watched_state(watched_paths)
+        while True:
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                return
+
+            with connection:
+                current_state = self._watched_state(watched_paths)
+                if current_state != watched_state:
+                    reload()
+                    watched_state = current_state
+                self._handle(connection, run_command)
+
+    def _handle(
+        self, connection: socket.socket, run_command: Callable[[list[str]], int]
+    ):
+        """
+        Runs a client's request, streaming its output back followed by its exit code
+        :param connection: The connection to the client
+        :param run_command: Runs a command from its arguments, returning its exit code
+        """
+        connection.settimeout(self.request_timeout_seconds)
+        try:
+            with connection.makefile("rb") as requests:
+                request = json.loads(requests.readline())
+            args = [str(arg) for arg in request["args"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        connection.settimeout(None)
+
+        writer = _ReplyWriter(connection, color=bool(request.get("color")))
+        with redirect_stdout(writer), redirect_stderr(writer):
+            try:
+                with self._requested_environment(request):
+                    exit_code = run_command(args)
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+        writer.send({"exit_code": exit_code})
+
+    @contextmanager
+    def _requested_environment(self, request: dict):
+        """
+        Runs a request in the client's working directory, with the git, pre-commit and seCureLI
+        environment variables it sent in place of the daemon's own, restoring the daemon's
+        afterwards
+        :param request: The client's request
+        """
+        environ = dict(os.environ)
+        cwd = os.getcwd()
+        requested_environ = request.get("env")
+        if not isinstance(requested_environ, dict):
+            requested_environ = {}
+
+        for name in [name for name in os.environ if is_request_variable(name)]:
+            del os.environ[name]
+        os.environ.update(
+            {
+                str(name): str(value)
+                for name, value in requested_environ.items()
+                if is_request_variable(str(name))
+            }
+        )
+        try:
+            if request.get("cwd"):
+                os.chdir(str(request["cwd"]))
+            yield
+        finally:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(environ)
+
+    def _watched_state(
+        self, watched_paths: list[Path]
+    ) -> list[Optional[tuple[int, int]]]:
+        """
+        :param watched_paths: The watched files
+        :return: The modification time and size of each watched file, or None if missing
+        """
+        state = []
+        for path in watched_paths:
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                state.append(None)
+        return state
+
+    def _remove_socket(self):
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
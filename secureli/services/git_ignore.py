@@ -1,6 +1,6 @@
 from pathlib import Path
 
-import pathspec
+from secureli.utilities.patterns import git_wild_match_patterns
 
 
 class BadIgnoreBlockError(Exception):
@@ -34,15 +34,7 @@ class GitIgnoreService:
         """Reads the lines from the .gitignore file"""
         file_contents = self._read_file_contents()
         lines = file_contents.splitlines(keepends=False)
-        pathspec_lines = pathspec.PathSpec.from_lines(
-            pathspec.patterns.GitWildMatchPattern, lines
-        )
-        raw_patterns = [
-            pathspec_pattern.regex.pattern
-            for pathspec_pattern in pathspec_lines.patterns
-            if pathspec_pattern.include
-        ]
-        return raw_patterns
+        return git_wild_match_patterns(lines)
 
     def _generate_git_ignore_block(self) -> str:
         """
@@ -1,11 +1,24 @@
-from collections import defaultdict
+import math
+import random
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
 
 import pydantic
 
 from secureli.abstractions.lexer_guesser import LexerGuesser
-from secureli.repositories.repo_files import RepoFilesRepository
+from secureli.repositories.analysis_cache import AnalysisCacheRepository
+from secureli.repositories.repo_files import (
+    FileChange,
+    FileSkippedError,
+    RepoFilesRepository,
+    SkipReason,
+)
+from secureli.repositories.secureli_config import LanguageBaseline
 from secureli.services.language_support import supported_languages
+from secureli.utilities.tracing import tracer, traced
 
 
 class SkippedFile(pydantic.BaseModel):
@@ -15,6 +28,7 @@ class SkippedFile(pydantic.BaseModel):
 
     file_path: Path
     error_message: str
+    reason: Optional[SkipReason] = None
 
 
 class AnalyzeResult(pydantic.BaseModel):
@@ -24,6 +38,74 @@ class AnalyzeResult(pydantic.BaseModel):
 
     language_proportions: dict[str, float]
     skipped_files: list[SkippedFile]
+    sampled: bool = False
+    sample_size: Optional[int] = None
+    confidence_bounds: Optional[dict[str, tuple[float, float]]] = None
+    baseline: Optional[LanguageBaseline] = None
+
+
+# The outcome of guessing one file's lexer: the lexer name, or why the file was skipped
+LexerGuess = tuple[Optional[str], Optional[SkippedFile]]
+
+# Each analysis worker process holds its own repository and lexer guesser, set once by the
+# pool's initializer, so only file paths and LexerGuess tuples cross process boundaries.
+_worker_repo_files: Optional[RepoFilesRepository] = None
+_worker_lexer_guesser: Optional[LexerGuesser] = None
+
+
+def _guess_file_lexer(
+    repo_files: RepoFilesRepository, lexer_guesser: LexerGuesser, file_path: Path
+) -> LexerGuess:
+    """
+    Guesses the file's lexer, loading only as much of the file as the guesser needs,
+    or none of it if the guesser can decide from the file name alone
+    :param repo_files: The repository to load the file from
+    :param lexer_guesser: The guesser to identify the file's lexer
+    :param file_path: The file to guess the lexer of
+    :return: The name of the lexer and no error, or no lexer and the reason it was skipped
+    """
+    try:
+        lexer = lexer_guesser.guess_lexer_from_file_name(file_path)
+        if lexer is None:
+            text = repo_files.load_file(file_path, lexer_guesser.content_sample_size)
+            lexer = lexer_guesser.guess_lexer(file_path, text)
+        return lexer, None
+    except ValueError as value_error:
+        return None, _skipped_file(file_path, value_error)
+
+
+def _skipped_file(file_path: Path, value_error: ValueError) -> SkippedFile:
+    """
+    Describes a file skipped because of the given error
+    :param file_path: The file that was skipped
+    :param value_error: The error raised while loading the file or guessing its lexer
+    :return: The SkippedFile, with the reason given by the error, or that no lexer
+    recognized the file if the error gives none
+    """
+    return SkippedFile(
+        file_path=file_path,
+        error_message=str(value_error),
+        reason=(
+            value_error.reason
+            if isinstance(value_error, FileSkippedError)
+            else SkipReason.UNRECOGNIZED
+        ),
+    )
+
+
+def _initialize_worker(repo_files: RepoFilesRepository, lexer_guesser: LexerGuesser):
+    """Stores the dependencies a worker process needs to guess lexers"""
+    global _worker_repo_files, _worker_lexer_guesser
+    _worker_repo_files = repo_files
+    _worker_lexer_guesser = lexer_guesser
+
+
+def _guess_file_lexers_in_worker(file_paths: list[Path]) -> list[LexerGuess]:
+    """Guesses the lexer of each file in a batch, within a worker process"""
+    return [
+        _guess_file_lexer(_worker_repo_files, _worker_lexer_guesser, file_path)
+        for file_path in file_paths
+    ]
 
 
 class LanguageAnalyzerService:
@@ -31,42 +113,514 @@ class LanguageAnalyzerService:
     Analyzes a repository's visible files to determine which language seCureLI is targeting.
     """
 
+    """How many files are sent to an analysis worker process at a time"""
+    batch_size = 200
+
+    """When sampling, how many files to classify between checks of the language ranking"""
+    sample_batch_size = 250
+
+    """When sampling, how many files to classify before the ranking may be considered stable"""
+    minimum_sample_size = 1000
+
+    """When sampling, how many consecutive checks the ranking must hold for before stopping"""
+    stable_checks_required = 4
+
+    """The z-score of the confidence bounds reported for sampled proportions (95%)"""
+    confidence_z_score = 1.96
+
     def __init__(
         self,
         repo_files: RepoFilesRepository,
         lexer_guesser: LexerGuesser,
+        workers: int = 1,
+        sample_threshold: int = 0,
+        analysis_cache: Optional[AnalysisCacheRepository] = None,
     ):
         self.repo_files = repo_files
         self.lexer_guesser = lexer_guesser
+        self.workers = workers
+        self.sample_threshold = sample_threshold
+        self.analysis_cache = analysis_cache
 
-    def analyze(self, folder_path: Path) -> AnalyzeResult:
+    @traced("LanguageAnalyzerService.analyze")
+    def analyze(
+        self, folder_path: Path, baseline: Optional[LanguageBaseline] = None
+    ) -> AnalyzeResult:
         """
         Analyzes the folder structure and lists languages found
         :param folder_path: The path to the repository to analyze
+        :param baseline: The baseline recorded by an earlier analysis, if any. While it still
+        applies, only the files changed since its commit are analyzed
         :return: Produces an ordered dictionary of languages detected and what percentage
         of the repo is each language. For example, if 60% of the repo is Python files and
         40% of the repo is JavaScript, the result will be a dictionary containing keys
-        "Python" and "JavaScript" with values 0.6 and 0.4 respectively
+        "Python" and "JavaScript" with values 0.6 and 0.4 respectively. Unless the repository
+        was sampled, the result includes a baseline to provide to later analyses
         """
+        if baseline is not None:
+            analyze_result = self._analyze_changes(folder_path, baseline)
+            if analyze_result is not None:
+                return analyze_result
+
         file_paths = self.repo_files.list_repo_files(folder_path)
+        if self.sample_threshold:
+            file_paths = list(file_paths)
+            if len(file_paths) > self.sample_threshold:
+                return self._analyze_sample(folder_path, file_paths)
+
         results = defaultdict(int)
 
         skipped_files = []
-        for file_path in file_paths:
-            try:
-                text = self.repo_files.load_file(file_path)
-                lexer = self.lexer_guesser.guess_lexer(file_path, text)
+        guesses = self._guess_file_lexers_with_cache(folder_path, file_paths)
+        for file_path, (lexer, skipped_file) in guesses:
+            tracer.count("files_analyzed")
+            if skipped_file is None:
                 results[lexer] += 1
-            except ValueError as value_error:
-                skipped_files.append(
-                    SkippedFile(file_path=file_path, error_message=str(value_error))
-                )
+            else:
+                skipped_files.append(skipped_file)
 
         return AnalyzeResult(
             language_proportions=self._process_counts_to_ratios_per_language(results),
             skipped_files=skipped_files,
+            baseline=self._record_baseline(folder_path, results),
+        )
+
+    def _analyze_changes(
+        self, folder_path: Path, baseline: LanguageBaseline
+    ) -> Optional[AnalyzeResult]:
+        """
+        Analyzes the repository by applying the files changed since the baseline's commit,
+        both in later commits and in the working tree, to the baseline's lexer counts
+        :param folder_path: The path to the repository to analyze
+        :param baseline: The baseline recorded by an earlier analysis
+        :return: The AnalyzeResult, with a baseline for the current commit, or None if the
+        baseline no longer applies and the whole repository needs analyzing
+        """
+        if baseline.fingerprint != self._baseline_fingerprint():
+            return None
+
+        head_commit = self.repo_files.head_commit(folder_path)
+        if head_commit is None:
+            return None
+
+        skipped_files = {}
+        committed_changes = self._count_changes(
+            folder_path, baseline.commit, head_commit, skipped_files
+        )
+        working_tree_changes = self._count_changes(
+            folder_path, head_commit, None, skipped_files
+        )
+        if committed_changes is None or working_tree_changes is None:
+            return None
+
+        committed_counts = self._apply_count_changes(
+            baseline.lexer_counts, committed_changes
+        )
+        if committed_counts is None:
+            return None
+
+        results = self._apply_count_changes(committed_counts, working_tree_changes)
+        if results is None:
+            return None
+
+        return AnalyzeResult(
+            language_proportions=self._process_counts_to_ratios_per_language(results),
+            skipped_files=list(skipped_files.values()),
+            baseline=LanguageBaseline(
+                commit=head_commit,
+                fingerprint=baseline.fingerprint,
+                lexer_counts=committed_counts,
+            ),
+        )
+
+    def _record_baseline(
+        self, folder_path: Path, results: dict[str, int]
+    ) -> Optional[LanguageBaseline]:
+        """
+        Derives a baseline for the current commit from a full analysis of the working tree,
+        by taking away the files changed in the working tree since that commit
+        :param folder_path: The path to the repository analyzed
+        :param results: A dictionary of all lexers and counts of files evaluated to them
+        :return: The baseline, or None if one could not be derived
+        """
+        head_commit = self.repo_files.head_commit(folder_path)
+        if head_commit is None:
+            return None
+
+        working_tree_changes = self._count_changes(folder_path, head_commit, None, {})
+        if working_tree_changes is None:
+            return None
+
+        committed_counts = self._apply_count_changes(
+            results, {lexer: -count for lexer, count in working_tree_changes.items()}
+        )
+        if committed_counts is None:
+            return None
+
+        return LanguageBaseline(
+            commit=head_commit,
+            fingerprint=self._baseline_fingerprint(),
+            lexer_counts=committed_counts,
+        )
+
+    def _baseline_fingerprint(self) -> str:
+        """Identifies how files are listed and classified, as a baseline only applies to one"""
+        return f"{self.lexer_guesser.fingerprint()}:{self.repo_files.fingerprint()}"
+
+    def _count_changes(
+        self,
+        folder_path: Path,
+        from_commit: str,
+        to_commit: Optional[str],
+        skipped_files: dict[Path, SkippedFile],
+    ) -> Optional[dict[str, int]]:
+        """
+        Classifies both versions of each file changed between two commits, or between a
+        commit and the working tree (including untracked files)
+        :param folder_path: The path to the repository
+        :param from_commit: The commit to compare from
+        :param to_commit: The commit to compare to, or None to compare to the working tree
+        :param skipped_files: Updated with each changed file that was skipped,
+        and cleared of any files changed again
+        :return: How many more (or fewer) files are evaluated to each lexer, or None if the
+        changes could not be determined
+        """
+        changes = self.repo_files.diff_files(folder_path, from_commit, to_commit)
+        if changes is None:
+            return None
+
+        if to_commit is None:
+            untracked_files = self.repo_files.untracked_files(folder_path)
+            if untracked_files is None:
+                return None
+            changes += [FileChange(new_path=file_path) for file_path in untracked_files]
+
+        cached_lexers = (
+            self.analysis_cache.load(self._cache_fingerprint())
+            if self.analysis_cache and changes
+            else {}
+        )
+        count_changes = defaultdict(int)
+        for change in changes:
+            if change.old_path is not None:
+                skipped_files.pop(change.old_path, None)
+                lexer, _ = self._guess_version_lexer(
+                    folder_path, change.old_path, change.old_blob_id, cached_lexers
+                )
+                if lexer is not None:
+                    count_changes[lexer] -= 1
+
+            if change.new_path is not None:
+                lexer, skipped_file = self._guess_version_lexer(
+                    folder_path, change.new_path, change.new_blob_id, cached_lexers
+                )
+                if lexer is not None:
+                    count_changes[lexer] += 1
+                elif skipped_file is not None:
+                    skipped_files[change.new_path] = skipped_file
+
+        return count_changes
+
+    def _guess_version_lexer(
+        self,
+        folder_path: Path,
+        file_path: Path,
+        blob_id: Optional[str],
+        cached_lexers: dict[str, str],
+    ) -> LexerGuess:
+        """
+        Guesses the lexer of one version of a file, just as analyzing the whole repository
+        would have done when that version was checked out
+        :param folder_path: The path to the repository
+        :param file_path: The path of the file
+        :param blob_id: The git blob of the version, or None for the working tree's version
+        :param cached_lexers: The contents of the analysis cache
+        :return: The LexerGuess, with neither a lexer nor a skipped file if the file is not
+        analyzed
+        """
+        if not self.repo_files.is_analyzed_path(file_path):
+            return None, None
+
+        if blob_id is None:
+            if not file_path.is_file():
+                return None, None
+            return _guess_file_lexer(self.repo_files, self.lexer_guesser, file_path)
+
+        cached_lexer = cached_lexers.get(self._blob_cache_key(blob_id, file_path))
+        if cached_lexer is not None:
+            return cached_lexer, None
+
+        try:
+            lexer = self.lexer_guesser.guess_lexer_from_file_name(file_path)
+            if lexer is None:
+                text = self.repo_files.load_blob(
+                    folder_path,
+                    file_path,
+                    blob_id,
+                    self.lexer_guesser.content_sample_size,
+                )
+                lexer = self.lexer_guesser.guess_lexer(file_path, text)
+            return lexer, None
+        except ValueError as value_error:
+            return None, _skipped_file(file_path, value_error)
+
+    def _apply_count_changes(
+        self, counts: dict[str, int], count_changes: dict[str, int]
+    ) -> Optional[dict[str, int]]:
+        """
+        Adds changes in how many files are evaluated to each lexer to the counts
+        :param counts: A dictionary of lexers and counts of files evaluated to them
+        :param count_changes: A dictionary of lexers and changes to those counts
+        :return: The changed counts, or None if the changes don't fit the counts
+        """
+        changed_counts = dict(counts)
+        for lexer, count_change in count_changes.items():
+            changed_counts[lexer] = changed_counts.get(lexer, 0) + count_change
+
+        if any(count < 0 for count in changed_counts.values()):
+            return None
+
+        return {lexer: count for lexer, count in changed_counts.items() if count}
+
+    def _analyze_sample(
+        self, folder_path: Path, file_paths: list[Path]
+    ) -> AnalyzeResult:
+        """
+        Analyzes a stratified sample of the files, drawn in proportion from each combination of
+        folder and extension, and stops once the ranking of supported languages is stable
+        :param folder_path: The path to the repository to analyze
+        :param file_paths: All the visible files in the repository
+        :return: The AnalyzeResult for the sample, including confidence bounds for each
+        language's proportion
+        """
+        results = defaultdict(int)
+        skipped_files = []
+        ranking = None
+        stable_checks = 0
+        sample_size = 0
+
+        guesses = self._guess_file_lexers_with_cache(
+            folder_path, self._stratified_order(file_paths)
+        )
+        for file_path, (lexer, skipped_file) in guesses:
+            tracer.count("files_analyzed")
+            sample_size += 1
+            if skipped_file is None:
+                results[lexer] += 1
+            else:
+                skipped_files.append(skipped_file)
+
+            if sample_size % self.sample_batch_size:
+                continue
+
+            current_ranking = self._rank_supported_languages(results)
+            stable_checks = stable_checks + 1 if current_ranking == ranking else 0
+            ranking = current_ranking
+            if (
+                sample_size >= self.minimum_sample_size
+                and stable_checks >= self.stable_checks_required
+            ):
+                guesses.close()
+                break
+
+        language_proportions = self._process_counts_to_ratios_per_language(results)
+        sampled_supported_files = sum(
+            count for lexer, count in results.items() if lexer in supported_languages
+        )
+        return AnalyzeResult(
+            language_proportions=language_proportions,
+            skipped_files=skipped_files,
+            sampled=True,
+            sample_size=sample_size,
+            confidence_bounds={
+                language: self._confidence_bounds(proportion, sampled_supported_files)
+                for language, proportion in language_proportions.items()
+            },
         )
 
+    def _stratified_order(self, file_paths: list[Path]) -> list[Path]:
+        """
+        Orders the files so that any leading slice is a proportional stratified sample, with
+        each combination of folder and extension represented according to its size
+        :param file_paths: The files to order
+        :return: The same files, in sampling order
+        """
+        strata = defaultdict(list)
+        for file_path in file_paths:
+            strata[(file_path.parent, file_path.suffix)].append(file_path)
+
+        # Seeded, so repeated analysis of the same repository is reproducible
+        rng = random.Random(0)
+        keyed_paths = []
+        for stratum in strata.values():
+            rng.shuffle(stratum)
+            offset = rng.random()
+            keyed_paths.extend(
+                ((index + offset) / len(stratum), file_path)
+                for index, file_path in enumerate(stratum)
+            )
+
+        keyed_paths.sort(key=lambda keyed_path: keyed_path[0])
+        return [file_path for _, file_path in keyed_paths]
+
+    def _rank_supported_languages(self, results: dict[str, int]) -> list[str]:
+        """
+        Ranks the supported languages found so far, from most to least common
+        :param results: A dictionary of all languages and counts of files evaluated to them
+        :return: The supported language names in descending order of their counts
+        """
+        return sorted(
+            (lexer for lexer in results if lexer in supported_languages),
+            key=lambda lexer: (-results[lexer], lexer),
+        )
+
+    def _confidence_bounds(
+        self, proportion: float, sample_size: int
+    ) -> tuple[float, float]:
+        """
+        Calculates the Wilson score interval for a proportion observed within a sample
+        :param proportion: The observed proportion, between 0 and 1
+        :param sample_size: How many samples the proportion was observed over
+        :return: The lower and upper bounds of the interval
+        """
+        z_squared = self.confidence_z_score**2
+        denominator = 1 + z_squared / sample_size
+        center = (proportion + z_squared / (2 * sample_size)) / denominator
+        margin = (
+            self.confidence_z_score
+            * math.sqrt(
+                proportion * (1 - proportion) / sample_size
+                + z_squared / (4 * sample_size**2)
+            )
+            / denominator
+        )
+        return max(0.0, center - margin), min(1.0, center + margin)
+
+    def _guess_file_lexers_with_cache(
+        self, folder_path: Path, file_paths: Iterable[Path]
+    ) -> Iterator[tuple[Path, LexerGuess]]:
+        """
+        Guesses the lexer of each file as _guess_file_lexers does, reusing the lexers cached for
+        files that are unchanged since an earlier analysis and caching those newly guessed.
+        Tracked files are recognized by their git blob, so the cache survives checkouts, and
+        any other file by its path, size and modification time.
+        :param folder_path: The path to the repository being analyzed
+        :param file_paths: The files to guess lexers for
+        :return: An iterator of each file path alongside its LexerGuess
+        """
+        if self.analysis_cache is None:
+            yield from self._guess_file_lexers(file_paths)
+            return
+
+        fingerprint = self._cache_fingerprint()
+        cached_lexers = self.analysis_cache.load(fingerprint)
+        blob_ids = self.repo_files.tracked_blob_ids(folder_path)
+        uncached_keys = {}
+
+        def cached_guess(file_path: Path) -> Optional[LexerGuess]:
+            cache_key = self._cache_key(file_path, blob_ids)
+            lexer = cached_lexers.pop(cache_key, None)
+            if lexer is None:
+                uncached_keys[file_path] = cache_key
+                return None
+
+            # Reinserted, as the cache evicts the least recently inserted entries first
+            cached_lexers[cache_key] = lexer
+            return lexer, None
+
+        try:
+            guesses = self._guess_file_lexers(file_paths, cached_guess)
+            for file_path, (lexer, skipped_file) in guesses:
+                cache_key = uncached_keys.pop(file_path, None)
+                # Skipped files are not cached, as their error messages name the file's path
+                if cache_key is not None and lexer is not None:
+                    cached_lexers[cache_key] = lexer
+                yield file_path, (lexer, skipped_file)
+        finally:
+            self.analysis_cache.save(fingerprint, cached_lexers)
+
+    def _cache_fingerprint(self) -> str:
+        """Identifies how files are classified, as cached lexers only apply to one"""
+        return f"{self.lexer_guesser.fingerprint()}:{self.repo_files.max_file_size}"
+
+    def _blob_cache_key(self, blob_id: str, file_path: Path) -> str:
+        """Identifies a committed file's name and contents for the analysis cache"""
+        return f"blob:{blob_id}:{file_path.name}"
+
+    def _cache_key(self, file_path: Path, blob_ids: dict[Path, str]) -> Optional[str]:
+        """
+        Identifies a file's name and contents for the analysis cache. The name is part of the
+        key, as lexers are guessed from it as well as from the contents.
+        :param file_path: The file to identify
+        :param blob_ids: The git blob IDs of the repository's unmodified tracked files
+        :return: The cache key, or None if the file could not be identified
+        """
+        blob_id = blob_ids.get(file_path)
+        if blob_id is not None:
+            return self._blob_cache_key(blob_id, file_path)
+
+        try:
+            stat_result = file_path.stat()
+        except OSError:
+            return None
+
+        return f"file:{file_path}:{stat_result.st_size}:{stat_result.st_mtime_ns}"
+
+    def _guess_file_lexers(
+        self,
+        file_paths: Iterable[Path],
+        cached_guess: Callable[[Path], Optional[LexerGuess]] = lambda _: None,
+    ) -> Iterator[tuple[Path, LexerGuess]]:
+        """
+        Guesses the lexer of each file, in order. With more than one worker configured, batches
+        of files are spread across a pool of processes, keeping a bounded number of batches in
+        flight so the file listing is consumed as the analysis progresses.
+        :param file_paths: The files to guess lexers for
+        :param cached_guess: Provides a previously guessed LexerGuess for a file, or None if
+        the file's lexer needs guessing
+        :return: An iterator of each file path alongside its LexerGuess
+        """
+        if self.workers <= 1:
+            for file_path in file_paths:
+                yield file_path, cached_guess(file_path) or _guess_file_lexer(
+                    self.repo_files, self.lexer_guesser, file_path
+                )
+            return
+
+        file_paths = iter(file_paths)
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_initialize_worker,
+            initargs=(self.repo_files, self.lexer_guesser),
+        ) as executor:
+            in_flight = deque()
+            while True:
+                while len(in_flight) < self.workers * 2:
+                    batch = list(islice(file_paths, self.batch_size))
+                    if not batch:
+                        break
+                    guesses = [cached_guess(file_path) for file_path in batch]
+                    uncached_batch = [
+                        file_path
+                        for file_path, guess in zip(batch, guesses)
+                        if guess is None
+                    ]
+                    future = (
+                        executor.submit(_guess_file_lexers_in_worker, uncached_batch)
+                        if uncached_batch
+                        else None
+                    )
+                    in_flight.append((batch, guesses, future))
+
+                if not in_flight:
+                    return
+
+                batch, guesses, future = in_flight.popleft()
+                if future is not None:
+                    uncached_guesses = iter(future.result())
+                    guesses = [guess or next(uncached_guesses) for guess in guesses]
+                yield from zip(batch, guesses)
+
     def _process_counts_to_ratios_per_language(
         self, results: dict[str, int]
     ) -> dict[str, float]:
@@ -1,12 +1,15 @@
 from pathlib import Path
 from typing import Callable, Optional, Any
 
-import pathspec
 import pydantic
 import yaml
 
 from secureli.repositories.settings import PreCommitSettings, PreCommitRepo
-from secureli.utilities.patterns import combine_patterns
+from secureli.utilities.patterns import (
+    IgnoreMatcher,
+    combine_patterns,
+    git_wild_match_patterns,
+)
 from secureli.resources.slugify import slugify
 from secureli.utilities.hash import hash_config
 
@@ -40,18 +43,28 @@ class LanguageConfigService:
         self,
         command_timeout_seconds: int,
         data_loader: Callable[[str], str],
-        ignored_file_patterns: list[str],
+        ignore_matcher: IgnoreMatcher,
         pre_commit_settings: dict[str:Any],
     ):
         self.command_timeout_seconds = command_timeout_seconds
         self.data_loader = data_loader
-        self.ignored_file_patterns = ignored_file_patterns
+        self.ignore_matcher = ignore_matcher
         self.pre_commit_settings = (
             PreCommitSettings.parse_obj(pre_commit_settings)
             if pre_commit_settings
             else PreCommitSettings()
         )
 
+    def fingerprint(self) -> str:
+        """
+        Identifies the repo settings that are combined into each language's configuration,
+        so that configurations built from other settings can be told apart
+        :return: A hash of the pre-commit settings and ignored file patterns
+        """
+        return hash_config(
+            f"{self.pre_commit_settings.json()}|{self.ignore_matcher.combined_pattern}"
+        )
+
     def get_language_config(self, language: str) -> LanguagePreCommitResult:
         """
         Calculates a hash of the pre-commit file for the given language to be used as part
@@ -88,8 +101,8 @@ class LanguageConfigService:
         slugified_language = slugify(language)
         config_data = self.data_loader(f"{slugified_language}-pre-commit.yaml")
         config = yaml.safe_load(config_data) or {}
-        if self.ignored_file_patterns:
-            config["exclude"] = combine_patterns(self.ignored_file_patterns)
+        if self.ignore_matcher.combined_pattern:
+            config["exclude"] = self.ignore_matcher.combined_pattern
 
         # Combine our .secureli.yaml mutations into the configuration
         self._apply_pre_commit_settings(config)
@@ -227,14 +240,7 @@ class LanguageConfigService:
         if not exclude_file_patterns:
             return
 
-        pathspec_lines = pathspec.PathSpec.from_lines(
-            pathspec.patterns.GitWildMatchPattern, exclude_file_patterns
-        )
-        raw_patterns = [
-            pathspec_pattern.regex.pattern
-            for pathspec_pattern in pathspec_lines.patterns
-            if pathspec_pattern.include
-        ]
+        raw_patterns = git_wild_match_patterns(exclude_file_patterns)
         matching_hook["exclude"] = combine_patterns(raw_patterns)
 
     def _calculate_combined_configuration_data(self, language: str) -> str:
@@ -8,7 +8,9 @@ from secureli.abstractions.pre_commit import PreCommitAbstraction
 from secureli.services.git_ignore import GitIgnoreService
 from secureli.services.language_config import LanguageConfigService
 from secureli.utilities.hash import hash_config
+from secureli.resources import resources_fingerprint
 from secureli.resources.slugify import slugify
+from secureli.utilities.tracing import tracer, traced
 
 supported_languages = [
     "C#",
@@ -82,6 +84,42 @@ class BuildConfigResult(pydantic.BaseModel):
     version: str
 
 
+class ConfigBuildCache:
+    """
+    Remembers the combined pre-commit configurations built for each set of languages, so that
+    a single command builds each one once, however many services ask for it. Entries are keyed
+    by the languages along with fingerprints of the repo settings and the templates the
+    configuration is built from.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._results: dict[tuple, BuildConfigResult] = {}
+
+    def get(self, key: tuple) -> Optional[BuildConfigResult]:
+        """
+        Retrieves a copy of the configuration built for the key, counting a hit or a miss
+        :param key: The languages and fingerprints the configuration was built for
+        :return: The BuildConfigResult, or None if it hasn't been built yet
+        """
+        result = self._results.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return result.copy(deep=True)
+
+    def put(self, key: tuple, result: BuildConfigResult):
+        """
+        Remembers a copy of the configuration built for the key
+        :param key: The languages and fingerprints the configuration was built for
+        :param result: The BuildConfigResult to remember
+        """
+        self._results[key] = result.copy(deep=True)
+
+
 class LanguageSupportService:
     """
     Orchestrates a growing list of security best practices for languages. Installs
@@ -94,11 +132,15 @@ class LanguageSupportService:
         language_config: LanguageConfigService,
         git_ignore: GitIgnoreService,
         data_loader: Callable[[str], str],
+        config_build_cache: Optional[ConfigBuildCache] = None,
+        templates_fingerprint: Callable[[], str] = resources_fingerprint,
     ):
         self.git_ignore = git_ignore
         self.pre_commit_hook = pre_commit_hook
         self.language_config = language_config
         self.data_loader = data_loader
+        self.config_build_cache = config_build_cache or ConfigBuildCache()
+        self.templates_fingerprint = templates_fingerprint
 
     def version_for_language(self, languages: list[str]) -> str:
         """
@@ -110,6 +152,7 @@ class LanguageSupportService:
         # For now, just a passthrough to pre-commit hook abstraction
         return self._build_pre_commit_config(languages).version
 
+    @traced("LanguageSupportService.apply_support")
     def apply_support(self, languages: list[str]) -> LanguageMetadata:
         """
         Applies Secure Build support for the provided language
@@ -255,6 +298,29 @@ class LanguageSupportService:
         return config_hash
 
     def _build_pre_commit_config(self, languages: list[str]) -> BuildConfigResult:
+        """
+        Builds the final .pre-commit-config.yaml from all supported repo languages, or reuses
+        the configuration already built for them. Also returns any and all linter
+        configuration data.
+        :param langauges: list of languages to get calculated configuration for.
+        :return: BuildConfigResult
+        """
+        cache_key = (
+            tuple(languages),
+            self.language_config.fingerprint(),
+            self.templates_fingerprint(),
+        )
+        result = self.config_build_cache.get(cache_key)
+        if result is None:
+            tracer.count("config_builds")
+            result = self._build_uncached_pre_commit_config(languages)
+            self.config_build_cache.put(cache_key, result)
+
+        return result
+
+    def _build_uncached_pre_commit_config(
+        self, languages: list[str]
+    ) -> BuildConfigResult:
         """
         Builds the final .pre-commit-config.yaml from all supported repo languages. Also returns any and all
         linter configuration data.
@@ -1,16 +1,44 @@
+import functools
 import platform
 from datetime import datetime
 from enum import Enum
-from pathlib import Path
 from typing import Optional
 from uuid import uuid4
 
 import pydantic
 
 from secureli.services.language_support import LanguageSupportService, HookConfiguration
+from secureli.repositories.branch_log import BranchLogRepository
 from secureli.repositories.secureli_config import SecureliConfigRepository
 from secureli.utilities.git_meta import current_branch_name, git_user_email, origin_url
 from secureli.utilities.secureli_meta import secureli_version
+from secureli.utilities.tracing import TraceSummary, tracer
+
+
+class LogEnvironment(pydantic.BaseModel):
+    """The details of the user and environment shared by every log entry"""
+
+    origin_url: str
+    username: str
+    branch: Optional[str]
+    machineid: str
+    secureli_version: str
+
+
+@functools.lru_cache(maxsize=None)
+def log_environment() -> LogEnvironment:
+    """
+    Determines the details of the user and environment the first time a log entry needs
+    them, as doing so runs git and reads package metadata. They are remembered for the rest
+    of the process, as they don't change while it runs.
+    """
+    return LogEnvironment(
+        origin_url=origin_url(),
+        username=git_user_email(),
+        branch=current_branch_name(),
+        machineid=platform.uname().node,
+        secureli_version=secureli_version(),
+    )
 
 
 def generate_unique_id() -> str:
@@ -18,7 +46,10 @@ def generate_unique_id() -> str:
     A unique identifier representing the log entry, including various
     bits specific to the user and environment
     """
-    origin_email_branch = f"{origin_url()}|{git_user_email()}|{current_branch_name()}"
+    environment = log_environment()
+    origin_email_branch = (
+        f"{environment.origin_url}|{environment.username}|{environment.branch}"
+    )
     return f"{uuid4()}|{origin_email_branch}"
 
 
@@ -47,11 +78,13 @@ class LogFailure(pydantic.BaseModel):
 class LogEntry(pydantic.BaseModel):
     """A distinct entry in the log captured following actions like scan and init"""
 
-    id: str = generate_unique_id()
-    timestamp: datetime = datetime.utcnow()
-    username: str = git_user_email()
-    machineid: str = platform.uname().node
-    secureli_version: str = secureli_version()
+    id: str = pydantic.Field(default_factory=generate_unique_id)
+    timestamp: datetime = pydantic.Field(default_factory=datetime.utcnow)
+    username: str = pydantic.Field(default_factory=lambda: log_environment().username)
+    machineid: str = pydantic.Field(default_factory=lambda: log_environment().machineid)
+    secureli_version: str = pydantic.Field(
+        default_factory=lambda: log_environment().secureli_version
+    )
     languages: Optional[list[str]]
     status: LogStatus
     action: LogAction
@@ -59,6 +92,8 @@ class LogEntry(pydantic.BaseModel):
     failure: Optional[LogFailure] = None
     total_failure_count: Optional[int]
     failure_count_details: Optional[object]
+    hook_durations: Optional[dict[str, float]]
+    trace: Optional[TraceSummary]
 
 
 class LoggingService:
@@ -68,14 +103,19 @@ class LoggingService:
         self,
         language_support: LanguageSupportService,
         secureli_config: SecureliConfigRepository,
+        branch_logs: BranchLogRepository,
     ):
         self.language_support = language_support
         self.secureli_config = secureli_config
+        self.branch_logs = branch_logs
 
-    def success(self, action: LogAction) -> LogEntry:
+    def success(
+        self, action: LogAction, hook_durations: Optional[dict[str, float]] = None
+    ) -> LogEntry:
         """
         Capture that a successful conclusion has been reached for an action
         :param action: The action that succeeded
+        :param hook_durations: How many seconds each hook took, if the action ran hooks
         """
         secureli_config = self.secureli_config.load()
         hook_config = (
@@ -88,6 +128,8 @@ class LoggingService:
             action=action,
             hook_config=hook_config,
             languages=secureli_config.languages if secureli_config.languages else None,
+            hook_durations=hook_durations or None,
+            trace=tracer.summary(),
         )
         self._log(log_entry)
 
@@ -99,6 +141,7 @@ class LoggingService:
         details: str,
         total_failure_count: Optional[int] = None,
         individual_failure_count: Optional[object] = None,
+        hook_durations: Optional[dict[str, float]] = None,
     ) -> LogEntry:
         """
         Capture a failure against an action, with details
@@ -106,6 +149,7 @@ class LoggingService:
         :param details: Details about the failure
         :param total_failure_count: The total failure count
         :param individual_failure_count: The individual failure count
+        :param hook_durations: How many seconds each hook took, if the action ran hooks
         """
         secureli_config = self.secureli_config.load()
         hook_config = (
@@ -123,18 +167,32 @@ class LoggingService:
             failure_count_details=individual_failure_count,
             hook_config=hook_config,
             languages=secureli_config.languages if secureli_config.languages else None,
+            hook_durations=hook_durations or None,
+            trace=tracer.summary(),
         )
         self._log(log_entry)
 
         return log_entry
 
+    def recent_entries(self, action: LogAction, limit: int) -> list[LogEntry]:
+        """
+        Reads back the most recent entries logged for an action, across every branch's log,
+        skipping any that cannot be read as an entry
+        :param action: The action to read entries for
+        :param limit: The most entries to return
+        :return: Up to limit entries, oldest first
+        """
+        entries = []
+        for entry in self.branch_logs.recent(action.value, limit):
+            try:
+                entries.append(LogEntry.parse_obj(entry))
+            except ValueError:
+                continue
+
+        return entries
+
     def _log(self, log_entry: LogEntry):
-        """Commit a log entry to the branch log file"""
-        log_folder_path = Path(f".secureli/logs")
-        path_to_log = log_folder_path / f"{current_branch_name()}"
-
-        # Do not simply mkdir the log folder path, in case the branch name contains
-        # additional folder structure, like `bugfix/` or `feature/`
-        path_to_log.parent.mkdir(parents=True, exist_ok=True)
-        with open(path_to_log, "a") as f:
-            f.writelines([log_entry.json(exclude_none=True) + "\n"])
+        """Commit a log entry to the branch log"""
+        self.branch_logs.append(
+            f"{current_branch_name()}", log_entry.json(exclude_none=True)
+        )
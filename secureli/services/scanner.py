@@ -1,12 +1,21 @@
+import hashlib
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Optional
+from typing import Callable, Optional
 from pathlib import Path
 
 import pydantic
 import re
 import yaml
 
-from secureli.abstractions.pre_commit import PreCommitAbstraction
+from secureli.abstractions.pre_commit import ExecuteResult, PreCommitAbstraction
+from secureli.repositories.repo_files import RepoFilesRepository
+from secureli.repositories.scan_ledger import ScanLedgerRepository
+from secureli.repositories.settings import default_serial_hook_ids
+from secureli.utilities.hash import hash_config
+from secureli.utilities.tracing import traced
 
 
 class ScanMode(str, Enum):
@@ -16,6 +25,7 @@ class ScanMode(str, Enum):
 
     STAGED_ONLY = "staged-only"
     ALL_FILES = "all-files"
+    CHANGED_SINCE = "changed-since"
 
 
 class OutputParseErrors(str, Enum):
@@ -44,6 +54,9 @@ class ScanResult(pydantic.BaseModel):
     successful: bool
     output: Optional[str] = None
     failures: list[Failure]
+    timed_out: bool = False
+    timed_out_hook: Optional[str] = None
+    hook_durations: dict[str, float] = {}
 
 
 class ScanOuput(pydantic.BaseModel):
@@ -54,94 +67,103 @@ class ScanOuput(pydantic.BaseModel):
     failures: list[Failure]
 
 
-class ScannerService:
+class ScanOutputParser:
     """
-    Scans the repo according to the repo's seCureLI config
+    Parses the output from a scan one line at a time, so hook rule failures can be reported
+    while pre-commit is still running. A failure starts at a line reporting a hook "Failed",
+    whose next line holds the hook id, and runs until the next line of dots that reports
+    another hook's result.
     """
 
-    def __init__(self, pre_commit: PreCommitAbstraction):
-        self.pre_commit = pre_commit
+    """Matches a hook's result line, e.g. "black.......Passed", capturing its result"""
+    result_regexp = re.compile(r"^.*?\.{5,}.*?(Passed|Failed|Skipped)$")
 
-    def scan_repo(
-        self, scan_mode: ScanMode, specific_test: Optional[str] = None
-    ) -> ScanResult:
+    def __init__(self, config: dict):
+        self.config = config
+        self.open_failures: list[tuple[Optional[str], list[str]]] = []
+        self.failed_hook_ids: set[str] = set()
+        self.hook_results: list[str] = []
+
+    def feed(self, line: str) -> list[Failure]:
         """
-        Scans the repo according to the repo's seCureLI config
-        :param scan_mode: Whether to scan the staged files (i.e., the files about to be
-        committed) or the entire repository
-        :param specific_test: If specified, limits the pre-commit execution to a single hook.
-        If None, run all hooks.
-        :return: A ScanResult object containing whether we succeeded and any error
+        Parses the next line of output
+        :param line: A line of raw output from a scan, without its line ending
+        :return: The failures completed by this line, if any
         """
-        all_files = True if scan_mode == ScanMode.ALL_FILES else False
-        execute_result = self.pre_commit.execute_hooks(all_files, hook_id=specific_test)
-        parsed_output = self._parse_scan_ouput(output=execute_result.output)
-
-        return ScanResult(
-            successful=execute_result.successful,
-            output=execute_result.output,
-            failures=parsed_output.failures,
+        result_match = self.result_regexp.match(
+            self._remove_ansi_from_string(line).strip()
         )
+        if result_match:
+            self.hook_results.append(result_match.group(1))
 
-    def _parse_scan_ouput(self, output: str = "") -> ScanOuput:
+        failures = []
+        open_failures = []
+        for hook_id, failure_lines in self.open_failures:
+            # The line after a failure names its hook id
+            if hook_id is None:
+                hook_id = self._find_hook_id(line)
+                if hook_id is not None:
+                    self.failed_hook_ids.add(hook_id)
+
+            if line.find(".....") == -1:  # Look for line break
+                failure_lines.append(line)
+                open_failures.append((hook_id, failure_lines))
+            else:
+                failures.extend(self._to_failures(hook_id, failure_lines))
+
+        if line.find("Failed") != -1:
+            open_failures.append((None, []))
+
+        self.open_failures = open_failures
+        return failures
+
+    def finish(self) -> list[Failure]:
         """
-        Parses the output from a scan and returns a list of Failure objects representing any
-        hook rule failures during a scan.
-        :param output: Raw output from a scan.
-        :return: ScanOuput object representing a list of hook rule Failure objects.
+        Completes any failures still being parsed once the output has ended
+        :return: The failures completed by the end of the output, if any
         """
         failures = []
-        failure_indexes = []
-        config_data = self._get_config()
-
-        # Split the output up by each line and record the index of each failure
-        output_by_line = output.split("\n")
-        for index, line in enumerate(output_by_line):
-            if line.find("Failed") != -1:
-                failure_indexes.append(index)
-
-        # Process each failure
-        for failure_index in failure_indexes:
-            # Remove ANSI encoding and record hook id
-            id_with_encoding = output_by_line[failure_index + 1].split(": ")[1]
-            id = self._remove_ansi_from_string(id_with_encoding)
-
-            # Retrieve repo url for failure
-            repo = self._find_repo_from_id(hook_id=id, config=config_data)
-
-            # Capture all output lines for this failure
-            failure_output_list = self._get_single_failure_output(
-                failure_start=failure_index, output_by_line=output_by_line
-            )
-            # Capture files that failed
-            files = self._find_file_names(failure_output_list=failure_output_list)
+        for hook_id, failure_lines in self.open_failures:
+            failures.extend(self._to_failures(hook_id, failure_lines))
 
-            for file in files:
-                failures.append(Failure(id=id, file=file, repo=repo))
+        self.open_failures = []
+        return failures
 
-        return ScanOuput(failures=failures)
-
-    def _get_single_failure_output(
-        self, failure_start: int, output_by_line: list[str]
-    ) -> list[str]:
-        failure_lines = []
+    def _to_failures(
+        self, hook_id: Optional[str], failure_lines: list[str]
+    ) -> list[Failure]:
+        """
+        Creates a Failure for each file named in the output of a failed hook
+        :param hook_id: The id of the failed hook, or None if it could not be found
+        :param failure_lines: The output lines for this failure
+        :return: A Failure for each file that failed
+        """
+        if hook_id is None:
+            return []
 
-        for index in range(failure_start + 1, len(output_by_line)):
-            line = output_by_line[index]
+        repo = self._find_repo_from_id(hook_id)
+        return [
+            Failure(id=hook_id, file=file, repo=repo)
+            for file in self._find_file_names(failure_lines)
+        ]
 
-            if line.find(".....") == -1:  # Look for line break
-                failure_lines.append(line)
-            else:
-                break
+    def _find_hook_id(self, line: str) -> Optional[str]:
+        """
+        Finds the hook id in the line following a failure, e.g. "- hook id: black"
+        :param line: The line following a failure
+        :return: The hook id with its ANSI encoding removed, or None if there is none
+        """
+        _, separator, id_with_encoding = line.partition(": ")
+        if not separator:
+            return None
 
-        return failure_lines
+        return self._remove_ansi_from_string(id_with_encoding)
 
-    def _find_file_names(self, failure_output_list: list[str]) -> str:
+    def _find_file_names(self, failure_output_list: list[str]) -> list[str]:
         """
-        Finds the file name for a hook rule failure
-        :param failure_index: The index of the initial failure in failure_output_list
-        :param output_by_line: List containing the scan output delimited by newlines
-        :return: Returns the file name that caused the failure.
+        Finds the file names for a hook rule failure
+        :param failure_output_list: The output lines for this failure
+        :return: Returns the file names that caused the failure.
         """
         regexp = re.compile(r"^(?!http:|https)[a-z0-9-_/]+\.+[a-z][^:\s]*")
         file_names = []
@@ -167,14 +189,13 @@ class ScannerService:
 
         return clean_string
 
-    def _find_repo_from_id(self, hook_id: str, config: dict):
+    def _find_repo_from_id(self, hook_id: str):
         """
         Retrieves the repo URL that a hook ID belongs to and returns it
-        :param linter_id: The hook id we want to retrieve the repo url for
-        :config: A dict containing the contents of the .pre-commit-config.yaml file
+        :param hook_id: The hook id we want to retrieve the repo url for
         :return: The repo url our hook id belongs to
         """
-        repos = config.get("repos")
+        repos = self.config.get("repos")
 
         for repo in repos:
             hooks = repo["hooks"]
@@ -186,6 +207,641 @@ class ScannerService:
 
         return OutputParseErrors.REPO_NOT_FOUND
 
+
+class ScannerService:
+    """
+    Scans the repo according to the repo's seCureLI config
+    """
+
+    """The stage pre-commit runs hooks for unless told otherwise, by its current and legacy names"""
+    run_stages = {"pre-commit", "commit"}
+
+    """Matches pre-commit's error for a hook not run in the stage, e.g. one with stages: [push]"""
+    not_in_stage_regexp = re.compile(r"No hook with id `[^`]*` in stage `[^`]*`")
+
+    def __init__(
+        self,
+        pre_commit: PreCommitAbstraction,
+        hook_workers: int = 1,
+        serial_hook_ids: Optional[list[str]] = None,
+        repo_files: Optional[RepoFilesRepository] = None,
+        scan_ledger: Optional[ScanLedgerRepository] = None,
+    ):
+        self.pre_commit = pre_commit
+        self.repo_files = repo_files
+        self.scan_ledger = scan_ledger
+        self.hook_workers = hook_workers
+        self.serial_hook_ids = (
+            default_serial_hook_ids if serial_hook_ids is None else serial_hook_ids
+        )
+
+    @traced("ScannerService.scan_repo")
+    def scan_repo(
+        self,
+        scan_mode: ScanMode,
+        specific_test: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        jobs: int = 1,
+        base_ref: Optional[str] = None,
+        head_ref: Optional[str] = None,
+    ) -> ScanResult:
+        """
+        Scans the repo according to the repo's seCureLI config
+        :param scan_mode: Whether to scan the staged files (i.e., the files about to be
+        committed), the entire repository, or the files changed since base_ref
+        :param specific_test: If specified, limits the pre-commit execution to a single hook.
+        If None, run all hooks.
+        :param on_output: If provided, called with each line of output (without its line
+        ending) while the scan is running, and failures are parsed as each line arrives
+        :param jobs: When scanning all files, how many pre-commit processes to split the
+        repo's files across
+        :param base_ref: When scanning changed files, the ref the changes are to be merged
+        into, e.g. origin/main
+        :param head_ref: When scanning changed files, the ref holding the changes, or None for
+        HEAD
+        :return: A ScanResult object containing whether we succeeded and any error
+        """
+        if scan_mode == ScanMode.CHANGED_SINCE:
+            return self._scan_changed_files(
+                base_ref, head_ref, specific_test, on_output, jobs
+            )
+
+        all_files = True if scan_mode == ScanMode.ALL_FILES else False
+        if not all_files:
+            return self._execute_hooks(False, specific_test, on_output)
+
+        if self.scan_ledger and self.repo_files:
+            return self._scan_unpassed_files(specific_test, on_output, jobs)
+
+        return self._scan_files(None, specific_test, on_output, jobs)
+
+    @traced("ScannerService.scan_edited_files")
+    def scan_edited_files(
+        self,
+        files: list[str],
+        specific_test: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> ScanResult:
+        """
+        Scans files that were just edited, in a single pre-commit run, with only the hooks
+        that apply to at least one of them. Files that no longer exist are left out.
+        :param files: The edited files, relative to the repo
+        :param specific_test: If specified, limits the pre-commit execution to a single hook
+        :param on_output: If provided, called with each line of output (without its line
+        ending) while the scan is running
+        :return: A ScanResult object for the edited files
+        """
+        files = sorted(file for file in set(files) if os.path.lexists(file))
+        config = self._get_config()
+        hook_ids = self._hook_ids(config)
+        relevant_hook_ids = self._relevant_hook_ids(config, files)
+        if specific_test:
+            relevant_hook_ids = [
+                hook_id for hook_id in relevant_hook_ids if hook_id == specific_test
+            ]
+
+        if not relevant_hook_ids:
+            output = "No hooks apply to the edited files\n"
+            return ScanResult(successful=True, output=output, failures=[])
+
+        return self._execute_hooks(
+            False,
+            specific_test,
+            on_output,
+            files,
+            skip_hook_ids=[
+                hook_id for hook_id in hook_ids if hook_id not in relevant_hook_ids
+            ],
+        )
+
+    def _relevant_hook_ids(self, config: dict, files: list[str]) -> list[str]:
+        """
+        Lists the configured hooks whose files and exclude patterns match at least one of the
+        given files, as pre-commit would match them. Patterns a hook doesn't set in the config
+        come from its repo's manifest, which isn't read here, so those are assumed to match;
+        pre-commit still applies them, skipping the hook if nothing does.
+        :param config: The contents of the .pre-commit-config.yaml file
+        :param files: The files to match
+        :return: Each relevant hook id once, in the order hooks are configured
+        """
+        try:
+            include = re.compile(config.get("files", ""))
+            exclude = re.compile(config.get("exclude", "^$"))
+            files = [
+                file
+                for file in files
+                if include.search(file) and not exclude.search(file)
+            ]
+
+            hook_ids = []
+            for repo in config.get("repos", []):
+                for hook in repo["hooks"]:
+                    hook_include = re.compile(hook.get("files", ""))
+                    hook_exclude = (
+                        re.compile(hook["exclude"]) if "exclude" in hook else None
+                    )
+                    if hook["id"] not in hook_ids and any(
+                        hook_include.search(file)
+                        and not (hook_exclude and hook_exclude.search(file))
+                        for file in files
+                    ):
+                        hook_ids.append(hook["id"])
+        except re.error:
+            # Leave pre-commit to report the invalid pattern
+            return self._hook_ids(config)
+
+        return hook_ids
+
+    def _scan_changed_files(
+        self,
+        base_ref: Optional[str],
+        head_ref: Optional[str] = None,
+        specific_test: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        jobs: int = 1,
+    ) -> ScanResult:
+        """
+        Scans the files changed since the point HEAD diverged from base_ref, listed once up
+        front and handed to pre-commit explicitly. pre-commit scans files as they are in the
+        working tree, so head_ref, if given, must be the commit checked out, and changed files
+        missing from the working tree are left out.
+        :param base_ref: The ref the changes are to be merged into
+        :param head_ref: The ref holding the changes, or None for HEAD
+        :param specific_test: If specified, limits the pre-commit execution to a single hook
+        :param on_output: If provided, called with each line of output (without its line
+        ending) while the scan is running
+        :param jobs: How many pre-commit processes to split the files across
+        :return: A ScanResult object for the changed files
+        """
+        changed_files = None
+        if (
+            head_ref
+            and self.repo_files
+            and (
+                self.repo_files.head_commit(Path("."), head_ref)
+                != self.repo_files.head_commit(Path("."))
+            )
+        ):
+            output = (
+                f"Could not scan the changes in {head_ref}, as it is not checked out. "
+                "Check it out to scan them.\n"
+            )
+            successful = False
+        else:
+            changed_files = (
+                self.repo_files.changed_files(Path("."), base_ref, head_ref)
+                if base_ref and self.repo_files
+                else None
+            )
+            if changed_files is None:
+                output = f"Could not list the files changed since {base_ref}\n"
+                successful = False
+            else:
+                changed_files = [
+                    str(file_path)
+                    for file_path in changed_files
+                    if os.path.lexists(file_path)
+                ]
+                output = f"No files have changed since {base_ref}\n"
+                successful = True
+
+        if changed_files:
+            return self._scan_files(changed_files, specific_test, on_output, jobs)
+
+        if on_output:
+            on_output(output.rstrip("\n"))
+        return ScanResult(successful=successful, output=output, failures=[])
+
+    def _scan_unpassed_files(
+        self,
+        specific_test: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        jobs: int = 1,
+    ) -> ScanResult:
+        """
+        Scans only the tracked files that have not passed every hook being run since they last
+        changed, then records which hooks the scanned files passed
+        :param specific_test: If specified, limits the pre-commit execution to a single hook
+        :param on_output: If provided, called with each line of output (without its line
+        ending) while the scan is running
+        :param jobs: How many pre-commit processes to split the files across
+        :return: A ScanResult object for the files that were scanned
+        """
+        tracked_files = self.repo_files.tracked_files(Path("."))
+        if tracked_files is None:
+            return self._scan_files(None, specific_test, on_output, jobs)
+
+        config = self._get_config()
+        config_version = hash_config(yaml.dump(config))
+        hook_ids = {specific_test} if specific_test else set(self._hook_ids(config))
+        file_keys = self._file_keys(tracked_files)
+        passes = self.scan_ledger.load(config_version)
+
+        files = [
+            file
+            for file, file_key in file_keys.items()
+            if not hook_ids <= passes.get(file_key, set())
+        ]
+        if not files:
+            output = "No files have changed since they last passed every hook\n"
+            if on_output:
+                on_output(output.rstrip("\n"))
+            return ScanResult(successful=True, output=output, failures=[])
+
+        scan_result = self._scan_files(files, specific_test, on_output, jobs)
+        passed_hook_ids = self._passed_hook_ids(scan_result, hook_ids, config)
+        failed_files = {failure.file for failure in scan_result.failures}
+        for file in files:
+            if file not in failed_files:
+                passes.setdefault(file_keys[file], set()).update(passed_hook_ids)
+
+        # Keep the current files' entries as the most recently used
+        current_passes = {
+            file_key: passes.pop(file_key)
+            for file_key in file_keys.values()
+            if file_key in passes
+        }
+        passes.update(current_passes)
+        self.scan_ledger.save(config_version, passes)
+
+        return scan_result
+
+    def _file_keys(self, file_paths: list[Path]) -> dict[str, str]:
+        """
+        Identifies the contents of each file, by git blob ID where the file matches the index
+        and by a hash of its contents otherwise
+        :param file_paths: The tracked files to identify
+        :return: A dictionary of files to their keys, omitting files that could not be read
+        """
+        blob_ids = self.repo_files.tracked_blob_ids(Path("."))
+        file_keys = {}
+        for file_path in file_paths:
+            if file_path in blob_ids:
+                file_keys[str(file_path)] = f"blob:{blob_ids[file_path]}"
+                continue
+
+            try:
+                with open(file_path, "rb") as f:
+                    content_hash = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                continue
+            file_keys[str(file_path)] = f"sha256:{content_hash}"
+
+        return file_keys
+
+    def _passed_hook_ids(
+        self, scan_result: ScanResult, hook_ids: set[str], config: dict
+    ) -> set[str]:
+        """
+        Determines which hooks passed for every scanned file. Result lines name hooks rather
+        than their ids, so they are matched to the configured hooks run in the order
+        pre-commit reports them, once per pre-commit run. Only hooks reported as Passed or
+        Skipped in every run are among them. A hook that failed never is, even where its
+        failures name files, as not every file name can be parsed from its output, so it may
+        have failed for any of them. Nothing is, if the results don't match up with the hooks
+        run, or the scan failed without any hook failing, e.g. as pre-commit itself errored.
+        :param scan_result: The result of scanning the files
+        :param hook_ids: The ids of the hooks that were run
+        :param config: The contents of the .pre-commit-config.yaml file
+        :return: The ids of the hooks to record as passed
+        """
+        if scan_result.timed_out:
+            return set()
+
+        parser = ScanOutputParser(config)
+        for line in (scan_result.output or "").splitlines():
+            parser.feed(line)
+        parser.finish()
+
+        hook_runs = [
+            hook["id"]
+            for repo in config.get("repos", [])
+            for hook in repo["hooks"]
+            if hook["id"] in hook_ids and self._runs_in_stage(config, hook)
+        ]
+        results = parser.hook_results
+        if not hook_runs or not results or len(results) % len(hook_runs):
+            return set()
+        if not scan_result.successful and not parser.failed_hook_ids:
+            return set()
+
+        passed_hook_ids = set(hook_runs) - parser.failed_hook_ids
+        for index, result in enumerate(results):
+            if result not in ("Passed", "Skipped"):
+                passed_hook_ids.discard(hook_runs[index % len(hook_runs)])
+
+        return passed_hook_ids
+
+    def _scan_files(
+        self,
+        files: Optional[list[str]],
+        specific_test: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        jobs: int = 1,
+    ) -> ScanResult:
+        """
+        Scans the given files, or all files, split across processes as configured
+        :param files: The files to scan, or None to scan all files
+        :param specific_test: If specified, limits the pre-commit execution to a single hook
+        :param on_output: If provided, called with each line of output (without its line
+        ending) while the scan is running
+        :param jobs: How many pre-commit processes to split the files across
+        :return: A ScanResult object containing whether we succeeded and any error
+        """
+        if jobs > 1 and files is None and self.repo_files:
+            tracked_files = self.repo_files.tracked_files(Path("."))
+            if tracked_files:
+                files = [str(file_path) for file_path in tracked_files]
+
+        if jobs > 1 and files:
+            return self._scan_shards(
+                self._shard_files(files, jobs), specific_test, on_output
+            )
+
+        # Concurrent runs against staged files would each stash and restore unstaged changes
+        if self.hook_workers > 1 and not specific_test:
+            return self._scan_hooks_in_parallel(on_output, files)
+
+        return self._execute_hooks(files is None, specific_test, on_output, files)
+
+    def _execute_hooks(
+        self,
+        all_files: bool,
+        specific_test: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        files: Optional[list[str]] = None,
+        skip_hook_ids: Optional[list[str]] = None,
+    ) -> ScanResult:
+        """
+        Scans in a single pre-commit run
+        :param all_files: Whether to scan all files, rather than the staged files
+        :param specific_test: If specified, limits the pre-commit execution to a single hook
+        :param on_output: If provided, called with each line of output (without its line
+        ending) while the scan is running, and failures are parsed as each line arrives
+        :param files: If provided, scan only these files
+        :param skip_hook_ids: If provided, hooks for pre-commit to skip
+        :return: A ScanResult object containing whether we succeeded and any error
+        """
+        if not on_output:
+            execute_result = self.pre_commit.execute_hooks(
+                all_files,
+                hook_id=specific_test,
+                files=files,
+                skip_hook_ids=skip_hook_ids,
+            )
+            parsed_output = self._parse_scan_ouput(output=execute_result.output)
+
+            return ScanResult(
+                successful=execute_result.successful,
+                output=execute_result.output,
+                failures=parsed_output.failures,
+                timed_out=execute_result.timed_out,
+                timed_out_hook=execute_result.timed_out_hook,
+                hook_durations=execute_result.hook_durations,
+            )
+
+        parser = ScanOutputParser(self._get_config())
+        failures = []
+
+        def handle_line(line: str):
+            line = line.rstrip("\n")
+            on_output(line)
+            failures.extend(parser.feed(line))
+
+        execute_result = self.pre_commit.execute_hooks(
+            all_files,
+            hook_id=specific_test,
+            on_output=handle_line,
+            files=files,
+            skip_hook_ids=skip_hook_ids,
+        )
+        failures.extend(parser.finish())
+
+        return ScanResult(
+            successful=execute_result.successful,
+            output=execute_result.output,
+            failures=failures,
+            timed_out=execute_result.timed_out,
+            timed_out_hook=execute_result.timed_out_hook,
+            hook_durations=execute_result.hook_durations,
+        )
+
+    def _scan_hooks_in_parallel(
+        self,
+        on_output: Optional[Callable[[str], None]] = None,
+        files: Optional[list[str]] = None,
+    ) -> ScanResult:
+        """
+        Scans all files, running each configured hook as its own pre-commit run, up to
+        hook_workers at a time. Hooks that may modify files run on their own, after every
+        hook listed before them has finished, so they never change files another hook is
+        reading. Outputs are reported in the order hooks are configured, whatever order they
+        finish in.
+        :param on_output: If provided, called with each line of output (without its line
+        ending) once every hook listed before it has finished
+        :param files: If provided, scan only these files instead of all files
+        :return: A ScanResult object merging the results of every hook
+        """
+        config = self._get_config()
+        hook_ids = self._hook_ids(config)
+        serial_hook_ids = {
+            hook["id"]
+            for repo in config.get("repos", [])
+            for hook in repo["hooks"]
+            if hook["id"] in self.serial_hook_ids or hook.get("require_serial")
+        }
+
+        parser = ScanOutputParser(config)
+        failures = []
+        execute_results = []
+
+        def report(execute_result: ExecuteResult):
+            if not execute_result.successful and self.not_in_stage_regexp.search(
+                execute_result.output
+            ):
+                # Its stages, set in its repo's manifest, leave it out, as a single run would
+                execute_result = ExecuteResult(successful=True, output="")
+            execute_results.append(execute_result)
+            for line in execute_result.output.splitlines():
+                if on_output:
+                    on_output(line)
+                failures.extend(parser.feed(line))
+
+        with ThreadPoolExecutor(max_workers=self.hook_workers) as executor:
+            pending = []
+            for hook_id in hook_ids:
+                if hook_id not in serial_hook_ids:
+                    pending.append(
+                        executor.submit(
+                            self.pre_commit.execute_hooks,
+                            files is None,
+                            hook_id=hook_id,
+                            files=files,
+                        )
+                    )
+                    continue
+
+                for future in pending:
+                    report(future.result())
+                pending = []
+                report(
+                    self.pre_commit.execute_hooks(
+                        files is None, hook_id=hook_id, files=files
+                    )
+                )
+
+            for future in pending:
+                report(future.result())
+
+        failures.extend(parser.finish())
+
+        return self._merge_results(execute_results, failures)
+
+    def _hook_ids(self, config: dict) -> list[str]:
+        """
+        Lists the ids of the configured hooks that run in the stage scanned
+        :param config: The contents of the .pre-commit-config.yaml file
+        :return: Each hook id once, in the order hooks are configured
+        """
+        hook_ids = []
+        for repo in config.get("repos", []):
+            for hook in repo["hooks"]:
+                if hook["id"] not in hook_ids and self._runs_in_stage(config, hook):
+                    hook_ids.append(hook["id"])
+
+        return hook_ids
+
+    def _runs_in_stage(self, config: dict, hook: dict) -> bool:
+        """
+        Determines whether pre-commit runs a hook in the stage scanned, from the stages set
+        for it, or else the config's default_stages. Stages set only in its repo's manifest
+        aren't read here, so such hooks are assumed to run.
+        :param config: The contents of the .pre-commit-config.yaml file
+        :param hook: The hook's configuration
+        :return: True if the hook runs in the stage scanned
+        """
+        stages = hook.get("stages", config.get("default_stages"))
+        return stages is None or bool(self.run_stages.intersection(stages))
+
+    def _shard_files(self, files: list[str], shard_count: int) -> list[list[str]]:
+        """
+        Partitions files into shards of roughly equal total size, by handing each file, from
+        largest to smallest, to the shard with the least in it so far. Ties, such as between
+        empty files, go to the shard with the fewest files.
+        :param files: The files to partition
+        :param shard_count: How many shards to partition the files into
+        :return: The non-empty shards, each listing its files in path order
+        """
+        file_sizes = []
+        for file in files:
+            try:
+                file_sizes.append((os.lstat(file).st_size, file))
+            except OSError:
+                file_sizes.append((0, file))
+
+        shards = [[] for _ in range(shard_count)]
+        shard_sizes = [(0, 0, index) for index in range(shard_count)]
+        for file_size, file in sorted(file_sizes, reverse=True):
+            shard_size, shard_files, index = heapq.heappop(shard_sizes)
+            shards[index].append(file)
+            heapq.heappush(
+                shard_sizes, (shard_size + file_size, shard_files + 1, index)
+            )
+
+        return [sorted(shard) for shard in shards if shard]
+
+    def _scan_shards(
+        self,
+        shards: list[list[str]],
+        specific_test: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> ScanResult:
+        """
+        Scans each shard of files in its own pre-commit process, all at once. Outputs are
+        reported in shard order, and a hook failing on a file is only reported once.
+        :param shards: The files to scan, partitioned into shards
+        :param specific_test: If specified, limits the pre-commit execution to a single hook
+        :param on_output: If provided, called with each line of output (without its line
+        ending) once every shard before it has finished
+        :return: A ScanResult object merging the results of every shard
+        """
+        config = self._get_config()
+        failures = {}
+        execute_results = []
+
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(
+                    self.pre_commit.execute_hooks,
+                    False,
+                    hook_id=specific_test,
+                    files=shard,
+                )
+                for shard in shards
+            ]
+            for future in futures:
+                execute_result = future.result()
+                execute_results.append(execute_result)
+
+                parser = ScanOutputParser(config)
+                shard_failures = []
+                for line in execute_result.output.splitlines():
+                    if on_output:
+                        on_output(line)
+                    shard_failures.extend(parser.feed(line))
+                shard_failures.extend(parser.finish())
+
+                for failure in shard_failures:
+                    failures.setdefault((failure.id, failure.file), failure)
+
+        return self._merge_results(execute_results, list(failures.values()))
+
+    def _merge_results(
+        self, execute_results: list[ExecuteResult], failures: list[Failure]
+    ) -> ScanResult:
+        """
+        Combines the results of several pre-commit runs into a single scan result
+        :param execute_results: The results of each run, in the order to report them
+        :param failures: The failures parsed from every run
+        :return: A ScanResult that succeeded only if every run succeeded, with the time each
+        hook took summed across runs
+        """
+        hook_durations = {}
+        for execute_result in execute_results:
+            for hook_name, seconds in execute_result.hook_durations.items():
+                hook_durations[hook_name] = hook_durations.get(hook_name, 0) + seconds
+
+        return ScanResult(
+            successful=all(result.successful for result in execute_results),
+            output="".join(result.output for result in execute_results),
+            failures=failures,
+            timed_out=any(result.timed_out for result in execute_results),
+            timed_out_hook=next(
+                (
+                    result.timed_out_hook
+                    for result in execute_results
+                    if result.timed_out_hook
+                ),
+                None,
+            ),
+            hook_durations=hook_durations,
+        )
+
+    def _parse_scan_ouput(self, output: str = "") -> ScanOuput:
+        """
+        Parses the output from a scan and returns a list of Failure objects representing any
+        hook rule failures during a scan.
+        :param output: Raw output from a scan.
+        :return: ScanOuput object representing a list of hook rule Failure objects.
+        """
+        parser = ScanOutputParser(self._get_config())
+        failures = []
+        for line in output.split("\n"):
+            failures.extend(parser.feed(line))
+        failures.extend(parser.finish())
+
+        return ScanOuput(failures=failures)
+
     def _get_config(self):
         """
         Gets the contents of the .pre-commit-config file and returns it as a dict
@@ -1,6 +1,5 @@
-import pathspec
-
 from secureli.settings import Settings
+from secureli.utilities.patterns import git_wild_match_patterns
 
 
 class SecureliIgnoreService:
@@ -22,14 +21,4 @@ class SecureliIgnoreService:
         if not self.settings.repo_files.exclude_file_patterns:
             return []
 
-        pathspec_lines = pathspec.PathSpec.from_lines(
-            pathspec.patterns.GitWildMatchPattern,
-            self.settings.repo_files.exclude_file_patterns,
-        )
-        raw_patterns = [
-            pathspec_pattern.regex.pattern
-            for pathspec_pattern in pathspec_lines.patterns
-            if pathspec_pattern.include
-        ]
-
-        return raw_patterns
+        return git_wild_match_patterns(self.settings.repo_files.exclude_file_patterns)
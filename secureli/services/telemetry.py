@@ -0,0 +1,161 @@
+import atexit
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from secureli.repositories.telemetry_spool import TelemetrySpoolRepository
+from secureli.services.logging import LogEntry
+
+
+class TelemetryService:
+    """
+    Ships log entries to the instrumentation backend (configured by the API_ENDPOINT and API_KEY
+    environment variables) without delaying the command that logged them. Entries are spooled
+    to the disk and sent by a background thread, one entry per request as the backend expects,
+    over a single keep-alive session. However many instances a process creates, it has one
+    such thread at a time and waits for it once at exit, for no longer than
+    exit_budget_seconds; anything left unsent stays spooled for the next command to send.
+    """
+
+    """Guards the process-wide state below"""
+    _lock = threading.Lock()
+
+    """The thread sending the spool, if one is running"""
+    _flusher: Optional[threading.Thread] = None
+
+    """True if entries were spooled since the running thread last found the spool empty"""
+    _pending = False
+
+    """Set at exit, to stop sending once the exit budget is spent"""
+    _stopping = threading.Event()
+
+    """How long to wait at exit, as configured for the latest entry spooled"""
+    _exit_budget_seconds = 0.0
+
+    """True once waiting at exit is registered"""
+    _waits_at_exit = False
+
+    def __init__(
+        self,
+        spool: TelemetrySpoolRepository,
+        batch_size: int,
+        max_retries: int,
+        request_timeout_seconds: float,
+        exit_budget_seconds: float,
+    ):
+        self.spool = spool
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.request_timeout_seconds = request_timeout_seconds
+        self.exit_budget_seconds = exit_budget_seconds
+        self.api_endpoint = os.getenv("API_ENDPOINT")
+        self.api_key = os.getenv("API_KEY")
+
+    def enqueue(self, log_entry: LogEntry):
+        """
+        Spools a log entry and makes sure the spool is being sent in the background, unless
+        no backend is configured. The backend is looked up again each time, as the daemon
+        runs each command with the environment variables of the client that requested it.
+        :param log_entry: The log entry to send
+        """
+        self.api_endpoint = os.getenv("API_ENDPOINT")
+        self.api_key = os.getenv("API_KEY")
+        if not self.api_endpoint or not self.api_key:
+            return
+
+        self.spool.add(log_entry.json(exclude_none=True))
+        with TelemetryService._lock:
+            TelemetryService._pending = True
+            TelemetryService._exit_budget_seconds = self.exit_budget_seconds
+            if TelemetryService._flusher is None:
+                TelemetryService._stopping.clear()
+                TelemetryService._flusher = threading.Thread(
+                    target=self._flush_until_idle, daemon=True
+                )
+                TelemetryService._flusher.start()
+            if not TelemetryService._waits_at_exit:
+                atexit.register(TelemetryService.wait_for_flush)
+                TelemetryService._waits_at_exit = True
+
+    def flush(self) -> int:
+        """
+        Sends the spooled entries, claiming batch_size at a time, until the spool is empty, an
+        entry fails to send even after retrying, or the command is exiting
+        :return: How many entries were sent
+        """
+        sent_count = 0
+        with self._session() as session:
+            while not TelemetryService._stopping.is_set():
+                entries = self.spool.claim(self.batch_size)
+                if not entries:
+                    break
+
+                for index, entry in enumerate(entries):
+                    try:
+                        response = session.post(
+                            self.api_endpoint,
+                            data=entry.data,
+                            timeout=self.request_timeout_seconds,
+                        )
+                        response.raise_for_status()
+                    except requests.RequestException:
+                        self.spool.release(entries[index:])
+                        return sent_count
+
+                    self.spool.remove([entry])
+                    sent_count += 1
+
+        return sent_count
+
+    @classmethod
+    def wait_for_flush(cls):
+        """
+        Waits up to the exit budget for the background sending to finish, then stops it from
+        claiming any further batches
+        """
+        with cls._lock:
+            flusher = cls._flusher
+        if flusher is not None:
+            flusher.join(cls._exit_budget_seconds)
+        cls._stopping.set()
+
+    def _flush_until_idle(self):
+        """
+        Sends the spool until no entries were spooled since it was last found empty, so that
+        entries spooled while sending are sent by the same thread
+        """
+        while True:
+            with TelemetryService._lock:
+                if not TelemetryService._pending or TelemetryService._stopping.is_set():
+                    TelemetryService._flusher = None
+                    return
+                TelemetryService._pending = False
+
+            self.flush()
+
+    def _session(self) -> requests.Session:
+        """
+        Creates the session entries are sent over, reusing its connection between entries.
+        Only failures the backend can't have processed the entry in are retried, with
+        backoff: failing to connect, and being rate limited or unavailable. Read errors and
+        other server errors aren't, as posting the entry again could log it twice.
+        :return: The session
+        """
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=self.max_retries,
+            backoff_factor=0.2,
+            status_forcelist=[429, 503],
+            allowed_methods=frozenset({"POST"}),
+        )
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(max_retries=retry, pool_maxsize=1))
+        session.mount("https://", HTTPAdapter(max_retries=retry, pool_maxsize=1))
+        session.headers.update({"Api-Key": self.api_key})
+        return session
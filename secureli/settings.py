@@ -6,9 +6,16 @@ import yaml
 
 from secureli.repositories.settings import (
     RepoFilesSettings,
+    DaemonSettings,
     EchoSettings,
+    HistorySettings,
     LanguageSupportSettings,
+    LogsSettings,
     PreCommitSettings,
+    ScanSettings,
+    TelemetrySettings,
+    TraceSettings,
+    WatchSettings,
 )
 
 
@@ -42,6 +49,13 @@ class Settings(pydantic.BaseSettings):
     echo: EchoSettings = EchoSettings()
     language_support: LanguageSupportSettings = LanguageSupportSettings()
     pre_commit: PreCommitSettings = PreCommitSettings()
+    scan: ScanSettings = ScanSettings()
+    trace: TraceSettings = TraceSettings()
+    telemetry: TelemetrySettings = TelemetrySettings()
+    logs: LogsSettings = LogsSettings()
+    history: HistorySettings = HistorySettings()
+    daemon: DaemonSettings = DaemonSettings()
+    watch: WatchSettings = WatchSettings()
 
     class Config:
         env_file_encoding = "utf-8"
@@ -1,15 +1,39 @@
 import subprocess
 import configparser
+from pathlib import Path
+
+from secureli.utilities.tracing import tracer
 
 
 def git_user_email() -> str:
     """Leverage the command prompt to derive the user's email address"""
     args = ["git", "config", "user.email"]
+    tracer.count("subprocesses_spawned")
     completed_process = subprocess.run(args, stdout=subprocess.PIPE)
     output = completed_process.stdout.decode("utf8").strip()
     return output
 
 
+def git_dir() -> Path:
+    """
+    Leverage git to find the repo's git folder, which .git only points to in worktrees and
+    submodules, falling back to .git if git can't find it
+    """
+    args = ["git", "rev-parse", "--git-dir"]
+    tracer.count("subprocesses_spawned")
+    try:
+        completed_process = subprocess.run(
+            args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+    except OSError:
+        return Path(".git")
+
+    output = completed_process.stdout.decode("utf8").strip()
+    return (
+        Path(output) if completed_process.returncode == 0 and output else Path(".git")
+    )
+
+
 def origin_url() -> str:
     """Leverage the git config file to determine the remote origin URL"""
     git_config_parser = configparser.ConfigParser()
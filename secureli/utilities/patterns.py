@@ -1,4 +1,8 @@
-from typing import Optional
+import re
+from pathlib import Path
+from typing import Optional, Union
+
+import pathspec
 
 
 def combine_patterns(patterns: list[str]) -> Optional[str]:
@@ -32,3 +36,90 @@ def combine_patterns(patterns: list[str]) -> Optional[str]:
     combined_patterns = str.join("|", ignored_file_patterns)
     combined_ignore_pattern = f"^({combined_patterns})$"
     return combined_ignore_pattern
+
+
+def git_wild_match_patterns(lines: list[str]) -> list[str]:
+    """
+    Translates gitignore-style lines into the regular expression pattern strings pathspec
+    generates for them, omitting comments, blank lines and negations
+    :param lines: The gitignore-style lines to translate
+    :return: A list of regular expression pattern strings
+    """
+    pathspec_lines = pathspec.PathSpec.from_lines(
+        pathspec.patterns.GitWildMatchPattern, lines
+    )
+    return [
+        pathspec_pattern.regex.pattern
+        for pathspec_pattern in pathspec_lines.patterns
+        if pathspec_pattern.include
+    ]
+
+
+# The leading and trailing fragments pathspec generates around each pattern. Patterns sharing
+# both are matched through a single branch, so the regex engine only has to evaluate the shared
+# fragments once per path rather than once per pattern.
+_shared_pattern_heads = ["^(?:.+/)?[^/]*\\.", "^(?:.+/)?", "^"]
+_shared_pattern_tails = {
+    "(?:(?P<ps_d>/).*)?$": "(?:/.*)?$",
+    "(?P<ps_d>/).*$": "/.*$",
+    "$": "$",
+}
+
+
+def _factor_patterns(patterns: list[str]) -> str:
+    """
+    Combines pathspec patterns into a single regex equivalent to combine_patterns, with the
+    fragments shared between patterns factored out. Matching is much cheaper with thousands of
+    patterns, since most branches of the alternation then begin with a literal.
+    :param patterns: The pattern strings provided by pathspec to combine
+    :return: a combined pattern, suitable for matching but not for display
+    """
+    grouped_patterns: dict[tuple[str, str], list[str]] = {}
+    other_patterns = []
+    for pattern in patterns:
+        head = next((h for h in _shared_pattern_heads if pattern.startswith(h)), None)
+        tail = next((t for t in _shared_pattern_tails if pattern.endswith(t)), None)
+        if head is None or tail is None or len(head) + len(tail) > len(pattern):
+            other_patterns.append(f"(?:{pattern.replace('(?P<ps_d>', '(?:')})")
+            continue
+        core = pattern[len(head) : len(pattern) - len(tail)]
+        grouped_patterns.setdefault((head, tail), []).append(core)
+
+    branches = [
+        f"{head}(?:{'|'.join(cores)}){_shared_pattern_tails[tail]}"
+        for (head, tail), cores in grouped_patterns.items()
+    ]
+    return "|".join(branches + other_patterns)
+
+
+class IgnoreMatcher:
+    """
+    Matches paths against a set of ignore patterns from pathspec. The patterns are combined
+    and compiled once when the matcher is built, so a single matcher can be shared by every
+    consumer and asked about any number of paths without recompiling. The combined pattern,
+    as provided to pre-commit, is available as `combined_pattern`.
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = patterns
+        self.combined_pattern = combine_patterns(patterns)
+        self._regex = re.compile(_factor_patterns(patterns)) if patterns else None
+
+    def is_ignored(self, file_path: Union[Path, str]) -> bool:
+        """
+        True if the path matches on any of the ignore patterns
+        :param file_path: The path in question
+        :return: True if the path is ignored, otherwise False
+        """
+        return (
+            self._regex is not None and self._regex.search(str(file_path)) is not None
+        )
+
+    def is_directory_ignored(self, dir_path: Union[Path, str]) -> bool:
+        """
+        True if the folder itself is ignored, which means every path within it is ignored
+        and the whole subtree can be skipped without being visited
+        :param dir_path: The folder in question
+        :return: True if the folder and everything beneath it is ignored, otherwise False
+        """
+        return self.is_ignored(f"{str(dir_path).rstrip('/')}/")
@@ -1,6 +1,6 @@
-import pkg_resources
+from importlib.metadata import version
 
 
 def secureli_version() -> str:
-    """Leverage package resources to determine the current version of secureli"""
-    return pkg_resources.get_distribution("secureli").version
+    """Leverage the package metadata to determine the current version of secureli"""
+    return version("secureli")
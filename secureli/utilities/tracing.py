@@ -0,0 +1,174 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+import pydantic
+
+T = TypeVar("T")
+
+
+class TraceSummary(pydantic.BaseModel):
+    """The totals recorded by a trace, as summarized in log entries"""
+
+    span_seconds: dict[str, float]
+    counters: dict[str, int]
+
+
+class Tracer:
+    """
+    Records nested spans of time and running counters for a single command, in the Chrome
+    trace event format, so that the phases of a slow command can be seen on a timeline (e.g. in
+    chrome://tracing or Perfetto). Spans are nested by their timings within each thread. Until
+    enabled, recording a span or a count costs no more than checking whether it is enabled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._events: list[dict] = []
+        self._span_seconds: dict[str, float] = {}
+        self._counters: dict[str, int] = {}
+
+    def enable(self):
+        """Starts recording, discarding anything recorded earlier"""
+        with self._lock:
+            self.enabled = True
+            self._origin = time.perf_counter()
+            self._events = []
+            self._span_seconds = {}
+            self._counters = {}
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        """
+        Records the time spent within the context as a span
+        :param name: The name of the span, shared by every span timing the same phase
+        :param args: Details to show alongside the span, such as its inputs
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._add_event(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self._origin) * 1_000_000,
+                    "dur": (end - start) * 1_000_000,
+                    "args": args,
+                }
+            )
+            with self._lock:
+                self._span_seconds[name] = self._span_seconds.get(name, 0) + end - start
+
+    def count(self, name: str, amount: int = 1):
+        """
+        Adds to a counter, recording its new total on the timeline
+        :param name: The name of the counter
+        :param amount: How much to add to it
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            total = self._counters.get(name, 0) + amount
+            self._counters[name] = total
+        self._add_event(
+            {
+                "name": name,
+                "ph": "C",
+                "ts": (time.perf_counter() - self._origin) * 1_000_000,
+                "args": {name: total},
+            }
+        )
+
+    def summary(self) -> Optional[TraceSummary]:
+        """
+        :return: The total time spent in each kind of span and the final value of each
+        counter, or None if tracing is not enabled
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            return TraceSummary(
+                span_seconds=dict(self._span_seconds), counters=dict(self._counters)
+            )
+
+    def write(self, trace_path: Path):
+        """
+        Writes everything recorded so far as a Chrome trace event file, replacing any earlier
+        trace. Failing to write the trace does not fail the command being traced.
+        :param trace_path: Where to write the trace
+        """
+        with self._lock:
+            trace = {"traceEvents": list(self._events), "displayTimeUnit": "ms"}
+
+        temp_path = trace_path.with_name(f"{trace_path.name}.{os.getpid()}")
+        try:
+            trace_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf8") as f:
+                json.dump(trace, f)
+            os.replace(temp_path, trace_path)
+        except OSError:
+            pass
+
+    def _add_event(self, event: dict):
+        event["pid"] = os.getpid()
+        event["tid"] = threading.get_ident()
+        with self._lock:
+            self._events.append(event)
+
+
+# The tracer shared by every part of seCureLI, enabled by `--trace` or the trace setting
+tracer = Tracer()
+
+# Where traces are written once a traced command finishes
+trace_path = Path(".secureli") / "trace.json"
+
+
+def traced(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorates a function so that each call to it is recorded as a span
+    :param name: The name of the span
+    :return: The decorator
+    """
+
+    def decorator(function: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(function)
+        def traced_function(*args, **kwargs) -> T:
+            with tracer.span(name):
+                return function(*args, **kwargs)
+
+        return traced_function
+
+    return decorator
+
+
+def counted(name: str, items: Iterator[T]) -> Iterator[T]:
+    """
+    Counts items as they are drawn from an iterable, without drawing them early
+    :param name: The name of the counter
+    :param items: The items to count
+    :return: The same items, counted if tracing is enabled
+    """
+    if not tracer.enabled:
+        return items
+
+    def count_items() -> Iterator[T]:
+        for item in items:
+            tracer.count(name)
+            yield item
+
+    return count_items()
@@ -0,0 +1,146 @@
+import ctypes
+import errno
+import sys
+from pathlib import Path
+
+import pytest
+
+from secureli.abstractions.file_watcher import FileWatcher
+from secureli.utilities.patterns import IgnoreMatcher
+
+requires_inotify = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="requires inotify"
+)
+
+
+@pytest.fixture()
+def watched_folder_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    for folder_name in [".git", ".secureli", "build", "src"]:
+        (tmp_path / folder_name).mkdir()
+    return tmp_path
+
+
+def file_watcher(polling: bool, max_pending_paths: int = 100) -> FileWatcher:
+    return FileWatcher(
+        ignore_matcher=IgnoreMatcher(["^build/", r"\.log$"]),
+        max_pending_paths=max_pending_paths,
+        poll_interval_seconds=0.01,
+        polling=polling,
+    )
+
+
+def write_files(folder_path: Path, file_names: list[str]):
+    for file_name in file_names:
+        (folder_path / file_name).parent.mkdir(parents=True, exist_ok=True)
+        (folder_path / file_name).write_text("x = 1\n")
+
+
+@pytest.mark.parametrize("polling", [pytest.param(False, marks=requires_inotify), True])
+def test_that_file_watcher_reports_watched_files_that_change(
+    watched_folder_path: Path, polling: bool
+):
+    watcher = file_watcher(polling)
+    assert watcher.start() == ("polling" if polling else "inotify")
+    try:
+        write_files(
+            watched_folder_path,
+            [
+                "a.py",
+                "src/b.py",
+                "src/new/c.py",
+                "debug.log",
+                "build/d.py",
+                ".git/index",
+                ".secureli/history.db",
+            ],
+        )
+
+        changes = watcher.next_changes(debounce_seconds=0.1)
+    finally:
+        watcher.stop()
+
+    assert changes.paths == ["a.py", "src/b.py", "src/new/c.py"]
+    assert not changes.overflowed
+
+
+@requires_inotify
+def test_that_file_watcher_reports_files_moved_into_watched_folders(
+    watched_folder_path: Path,
+):
+    write_files(watched_folder_path, ["build/a.py"])
+    watcher = file_watcher(polling=False)
+    watcher.start()
+    try:
+        (watched_folder_path / "build" / "a.py").rename(watched_folder_path / "a.py")
+
+        changes = watcher.next_changes(debounce_seconds=0.1)
+    finally:
+        watcher.stop()
+
+    assert changes.paths == ["a.py"]
+
+
+@pytest.mark.parametrize("polling", [pytest.param(False, marks=requires_inotify), True])
+def test_that_file_watcher_stops_tracking_files_beyond_its_limit(
+    watched_folder_path: Path, polling: bool
+):
+    watcher = file_watcher(polling, max_pending_paths=2)
+    watcher.start()
+    try:
+        write_files(watched_folder_path, ["a.py", "b.py", "c.py"])
+
+        changes = watcher.next_changes(debounce_seconds=0.1)
+    finally:
+        watcher.stop()
+
+    assert changes.paths == []
+    assert changes.overflowed
+
+
+def fail_to_watch(watcher: FileWatcher, folder_path: str, error_number: int):
+    inotify_add_watch = watcher.backend.inotify_add_watch
+
+    def add_watch(fd: int, path: bytes, mask: int) -> int:
+        if path.decode() != folder_path:
+            return inotify_add_watch(fd, path, mask)
+        ctypes.set_errno(error_number)
+        return -1
+
+    watcher.backend.inotify_add_watch = add_watch
+
+
+@requires_inotify
+def test_that_file_watcher_skips_new_folders_that_vanish(watched_folder_path: Path):
+    watcher = file_watcher(polling=False)
+    watcher.start()
+    try:
+        fail_to_watch(watcher, "src/gone", errno.ENOENT)
+        write_files(watched_folder_path, ["src/gone/a.py", "b.py"])
+
+        changes = watcher.next_changes(debounce_seconds=0.1)
+    finally:
+        watcher.stop()
+
+    assert changes.paths == ["b.py"]
+    assert not changes.overflowed
+
+
+@requires_inotify
+def test_that_file_watcher_polls_once_out_of_watches(watched_folder_path: Path):
+    watcher = file_watcher(polling=False)
+    watcher.start()
+    try:
+        fail_to_watch(watcher, "src/new", errno.ENOSPC)
+        write_files(watched_folder_path, ["src/new/a.py"])
+
+        changes = watcher.next_changes(debounce_seconds=0.1)
+        backend_name = watcher.backend.name
+        write_files(watched_folder_path, ["src/new/b.py"])
+        next_changes = watcher.next_changes(debounce_seconds=0.1)
+    finally:
+        watcher.stop()
+
+    assert changes.overflowed
+    assert backend_name == "polling"
+    assert next_changes.paths == ["src/new/b.py"]
@@ -1,3 +1,8 @@
+import io
+import os
+import subprocess
+import sys
+import time
 from subprocess import CompletedProcess
 from unittest.mock import MagicMock
 
@@ -65,6 +70,9 @@ def mock_data_loader() -> MagicMock:
 def mock_subprocess(mocker: MockerFixture) -> MagicMock:
     mock_subprocess = MagicMock()
     mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.stdout = io.BytesIO()
+    mock_subprocess.Popen.return_value.returncode = 0
+    mock_subprocess.TimeoutExpired = subprocess.TimeoutExpired
     mocker.patch("secureli.abstractions.pre_commit.subprocess", mock_subprocess)
     return mock_subprocess
 
@@ -103,29 +111,49 @@ def test_that_pre_commit_executes_hooks_successfully(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.execute_hooks()
 
     assert execute_result.successful
-    assert "--all-files" not in mock_subprocess.run.call_args_list[0].args[0]
+    assert "--all-files" not in mock_subprocess.Popen.call_args_list[0].args[0]
 
 
 def test_that_pre_commit_executes_hooks_successfully_including_all_files(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.execute_hooks(all_files=True)
 
     assert execute_result.successful
-    assert "--all-files" in mock_subprocess.run.call_args_list[0].args[0]
+    assert "--all-files" in mock_subprocess.Popen.call_args_list[0].args[0]
+
+
+def test_that_pre_commit_streams_hook_output_as_it_arrives(
+    pre_commit: PreCommitAbstraction,
+    mock_subprocess: MagicMock,
+):
+    mock_process = mock_subprocess.Popen.return_value
+    mock_process.stdout = io.BytesIO(b"first line\nsecond line\n")
+    mock_process.returncode = 1
+    streamed_lines = []
+
+    execute_result = pre_commit.execute_hooks(
+        all_files=True, on_output=streamed_lines.append
+    )
+
+    assert streamed_lines == ["first line\n", "second line\n"]
+    assert execute_result.output == "first line\nsecond line\n"
+    assert not execute_result.successful
+    assert "--all-files" in mock_subprocess.Popen.call_args.args[0]
+    mock_subprocess.run.assert_not_called()
 
 
 def test_that_pre_commit_executes_hooks_and_reports_failures(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=1)
+    mock_subprocess.Popen.return_value.returncode = 1
     execute_result = pre_commit.execute_hooks()
 
     assert not execute_result.successful
@@ -135,10 +163,37 @@ def test_that_pre_commit_executes_a_single_hook_if_specified(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     pre_commit.execute_hooks(hook_id="detect-secrets")
 
-    assert mock_subprocess.run.call_args_list[0].args[0][-1] == "detect-secrets"
+    assert mock_subprocess.Popen.call_args_list[0].args[0][-1] == "detect-secrets"
+
+
+def test_that_pre_commit_splits_files_across_runs_to_fit_the_command_line(
+    pre_commit: PreCommitAbstraction,
+    mock_subprocess: MagicMock,
+    mocker: MockerFixture,
+):
+    base_args = ["pre-commit", "run", "--color", "always", "black", "--files"]
+    base_size = sum(len(arg) + 9 for arg in base_args)
+    # Room for two of the files below on each command line
+    mocker.patch(
+        "secureli.abstractions.pre_commit._command_line_limit",
+        return_value=base_size + 2 * (len("file-0.py") + 9),
+    )
+    mock_subprocess.Popen.side_effect = lambda *args, **kwargs: MagicMock(
+        stdout=io.BytesIO(), returncode=0
+    )
+    files = [f"file-{index}.py" for index in range(5)]
+
+    execute_result = pre_commit.execute_hooks(hook_id="black", files=files)
+
+    assert execute_result.successful
+    assert [call.args[0] for call in mock_subprocess.Popen.call_args_list] == [
+        [*base_args, "file-0.py", "file-1.py"],
+        [*base_args, "file-2.py", "file-3.py"],
+        [*base_args, "file-4.py"],
+    ]
 
 
 ##### autoupdate_hooks #####
@@ -146,7 +201,7 @@ def test_that_pre_commit_autoupdate_hooks_executes_successfully(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.autoupdate_hooks()
 
     assert execute_result.successful
@@ -156,7 +211,7 @@ def test_that_pre_commit_autoupdate_hooks_properly_handles_failed_executions(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=1)
+    mock_subprocess.Popen.return_value.returncode = 1
     execute_result = pre_commit.autoupdate_hooks()
 
     assert not execute_result.successful
@@ -166,22 +221,22 @@ def test_that_pre_commit_autoupdate_hooks_executes_successfully_with_bleeding_ed
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.autoupdate_hooks(bleeding_edge=True)
 
     assert execute_result.successful
-    assert "--bleeding-edge" in mock_subprocess.run.call_args_list[0].args[0]
+    assert "--bleeding-edge" in mock_subprocess.Popen.call_args_list[0].args[0]
 
 
 def test_that_pre_commit_autoupdate_hooks_executes_successfully_with_freeze(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.autoupdate_hooks(freeze=True)
 
     assert execute_result.successful
-    assert "--freeze" in mock_subprocess.run.call_args_list[0].args[0]
+    assert "--freeze" in mock_subprocess.Popen.call_args_list[0].args[0]
 
 
 def test_that_pre_commit_autoupdate_hooks_executes_successfully_with_repos(
@@ -189,11 +244,11 @@ def test_that_pre_commit_autoupdate_hooks_executes_successfully_with_repos(
     mock_subprocess: MagicMock,
 ):
     test_repos = ["some-repo-url"]
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.autoupdate_hooks(repos=test_repos)
 
     assert execute_result.successful
-    assert "--repo some-repo-url" in mock_subprocess.run.call_args_list[0].args[0]
+    assert "--repo some-repo-url" in mock_subprocess.Popen.call_args_list[0].args[0]
 
 
 def test_that_pre_commit_autoupdate_hooks_executes_successfully_with_multiple_repos(
@@ -201,12 +256,14 @@ def test_that_pre_commit_autoupdate_hooks_executes_successfully_with_multiple_re
     mock_subprocess: MagicMock,
 ):
     test_repos = ["some-repo-url", "some-other-repo-url"]
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.autoupdate_hooks(repos=test_repos)
 
     assert execute_result.successful
-    assert "--repo some-repo-url" in mock_subprocess.run.call_args_list[0].args[0]
-    assert "--repo some-other-repo-url" in mock_subprocess.run.call_args_list[0].args[0]
+    assert "--repo some-repo-url" in mock_subprocess.Popen.call_args_list[0].args[0]
+    assert (
+        "--repo some-other-repo-url" in mock_subprocess.Popen.call_args_list[0].args[0]
+    )
 
 
 def test_that_pre_commit_autoupdate_hooks_fails_with_repos_containing_non_strings(
@@ -214,7 +271,7 @@ def test_that_pre_commit_autoupdate_hooks_fails_with_repos_containing_non_string
     mock_subprocess: MagicMock,
 ):
     test_repos = [{"something": "something-else"}]
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.autoupdate_hooks(repos=test_repos)
 
     assert not execute_result.successful
@@ -226,11 +283,11 @@ def test_that_pre_commit_autoupdate_hooks_ignores_repos_when_repos_is_a_dict(
 ):
     test_repos = {}
     test_repos_string = "string"
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.autoupdate_hooks(repos=test_repos)
 
     assert execute_result.successful
-    assert "--repo {}" not in mock_subprocess.run.call_args_list[0].args[0]
+    assert "--repo {}" not in mock_subprocess.Popen.call_args_list[0].args[0]
 
 
 def test_that_pre_commit_autoupdate_hooks_converts_repos_when_repos_is_a_string(
@@ -238,11 +295,11 @@ def test_that_pre_commit_autoupdate_hooks_converts_repos_when_repos_is_a_string(
     mock_subprocess: MagicMock,
 ):
     test_repos = "string"
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.autoupdate_hooks(repos=test_repos)
 
     assert execute_result.successful
-    assert "--repo string" in mock_subprocess.run.call_args_list[0].args[0]
+    assert "--repo string" in mock_subprocess.Popen.call_args_list[0].args[0]
 
 
 ##### update #####
@@ -250,7 +307,7 @@ def test_that_pre_commit_update_executes_successfully(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.update()
 
     assert execute_result.successful
@@ -260,7 +317,7 @@ def test_that_pre_commit_update_properly_handles_failed_executions(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=1)
+    mock_subprocess.Popen.return_value.returncode = 1
     execute_result = pre_commit.update()
 
     assert not execute_result.successful
@@ -271,7 +328,7 @@ def test_that_pre_commit_remove_unused_hookss_executes_successfully(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=0)
+    mock_subprocess.Popen.return_value.returncode = 0
     execute_result = pre_commit.remove_unused_hooks()
 
     assert execute_result.successful
@@ -281,7 +338,211 @@ def test_that_pre_commit_remove_unused_hooks_properly_handles_failed_executions(
     pre_commit: PreCommitAbstraction,
     mock_subprocess: MagicMock,
 ):
-    mock_subprocess.run.return_value = CompletedProcess(args=[], returncode=1)
+    mock_subprocess.Popen.return_value.returncode = 1
     execute_result = pre_commit.remove_unused_hooks()
 
     assert not execute_result.successful
+
+
+##### timeouts #####
+def _process_has_exited(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as stat_file:
+            return stat_file.read().split(")")[-1].split()[0] in ("Z", "X")
+    except FileNotFoundError:
+        return True
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="requires process groups")
+def test_that_pre_commit_kills_the_whole_process_group_when_a_command_times_out():
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=1)
+    script = (
+        "import subprocess, sys, time\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+        "print(child.pid, flush=True)\n"
+        "time.sleep(60)\n"
+    )
+
+    start = time.monotonic()
+    execute_result = pre_commit._run([sys.executable, "-c", script])
+
+    assert time.monotonic() - start < 10
+    assert execute_result.timed_out
+    assert not execute_result.successful
+    assert execute_result.timed_out_hook is None
+    grandchild_pid = int(execute_result.output.strip())
+    deadline = time.monotonic() + 5
+    while not _process_has_exited(grandchild_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _process_has_exited(grandchild_pid)
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="requires process groups")
+def test_that_pre_commit_kills_the_whole_process_group_when_interrupted(
+    mocker: MockerFixture, tmp_path
+):
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=60)
+    pid_path = tmp_path / "pid"
+    script = (
+        "import pathlib, subprocess, sys, time\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+        f"pathlib.Path({str(pid_path)!r}).write_text(str(child.pid))\n"
+        "time.sleep(60)\n"
+    )
+    wait = subprocess.Popen.wait
+    interrupted = []
+
+    def interrupt_first_wait(process, timeout=None):
+        if interrupted:
+            return wait(process, timeout)
+        while not pid_path.exists() or not pid_path.read_text():
+            time.sleep(0.05)
+        interrupted.append(True)
+        raise KeyboardInterrupt()
+
+    mocker.patch.object(subprocess.Popen, "wait", interrupt_first_wait)
+
+    with pytest.raises(KeyboardInterrupt):
+        pre_commit._run([sys.executable, "-c", script])
+
+    grandchild_pid = int(pid_path.read_text())
+    deadline = time.monotonic() + 5
+    while not _process_has_exited(grandchild_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _process_has_exited(grandchild_pid)
+
+
+def test_that_pre_commit_does_not_time_out_commands_without_a_timeout():
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=0)
+
+    execute_result = pre_commit._run([sys.executable, "-c", "print('done')"])
+
+    assert execute_result.successful
+    assert execute_result.output == "done\n"
+
+
+def test_that_pre_commit_reports_the_hook_that_exceeds_its_budget():
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=60)
+    script = (
+        "import sys, time\n"
+        "print('quick hook........Passed', flush=True)\n"
+        "sys.stdout.write('\\x1b[1mslow hook\\x1b[0m........')\n"
+        "sys.stdout.flush()\n"
+        "time.sleep(60)\n"
+    )
+
+    start = time.monotonic()
+    execute_result = pre_commit._run(
+        [sys.executable, "-c", script], hook_timeout_seconds=1
+    )
+
+    assert time.monotonic() - start < 10
+    assert execute_result.timed_out
+    assert execute_result.timed_out_hook == "slow hook"
+    assert execute_result.output.startswith("quick hook........Passed\n")
+
+
+def test_that_pre_commit_does_not_count_installing_environments_against_a_hook():
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=60)
+    script = (
+        "import sys, time\n"
+        "print('[INFO] Installing environment for https://github.com/psf/black.', flush=True)\n"
+        "time.sleep(1.5)\n"
+        "sys.stdout.write('black........')\n"
+        "sys.stdout.flush()\n"
+        "time.sleep(0.5)\n"
+        "print('Passed', flush=True)\n"
+    )
+
+    execute_result = pre_commit._run(
+        [sys.executable, "-c", script], hook_timeout_seconds=1
+    )
+
+    assert execute_result.successful
+    assert not execute_result.timed_out
+    assert execute_result.output.endswith("black........Passed\n")
+
+
+def test_that_pre_commit_times_out_the_first_hook_from_when_it_starts():
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=60)
+    script = (
+        "import sys, time\n"
+        "print('[INFO] Installing environment for https://github.com/psf/black.', flush=True)\n"
+        "time.sleep(1.5)\n"
+        "sys.stdout.write('black........')\n"
+        "sys.stdout.flush()\n"
+        "time.sleep(60)\n"
+    )
+
+    start = time.monotonic()
+    execute_result = pre_commit._run(
+        [sys.executable, "-c", script], hook_timeout_seconds=1
+    )
+
+    assert 2.5 <= time.monotonic() - start < 10
+    assert execute_result.timed_out
+    assert execute_result.timed_out_hook == "black"
+
+
+def test_that_pre_commit_does_not_time_out_commands_that_finish_in_time():
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=60)
+
+    execute_result = pre_commit._run(
+        [sys.executable, "-c", "print('done')"], hook_timeout_seconds=30
+    )
+
+    assert execute_result.successful
+    assert not execute_result.timed_out
+    assert execute_result.output == "done\n"
+
+
+def test_that_pre_commit_adds_skipped_hooks_to_those_already_skipped(
+    mocker: MockerFixture,
+):
+    mocker.patch.dict(os.environ, {"SKIP": "flake8"})
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=60)
+
+    execute_result = pre_commit._run(
+        [sys.executable, "-c", "import os; print(os.environ['SKIP'])"],
+        skip_hook_ids=["black", "isort"],
+    )
+
+    assert execute_result.output == "flake8,black,isort\n"
+
+
+##### hook durations #####
+def test_that_pre_commit_times_each_hook_from_its_result_line():
+    pre_commit = PreCommitAbstraction(command_timeout_seconds=60)
+    script = (
+        "import sys, time\n"
+        "for name, seconds in [('quick hook', 0), ('\\x1b[1mslow hook\\x1b[0m', 0.5)]:\n"
+        "    sys.stdout.write(name + '........')\n"
+        "    sys.stdout.flush()\n"
+        "    time.sleep(seconds)\n"
+        "    print('Passed', flush=True)\n"
+        "print('skipped hook....(no files to check)Skipped', flush=True)\n"
+    )
+
+    execute_result = pre_commit._run([sys.executable, "-c", script])
+
+    assert set(execute_result.hook_durations) == {"quick hook", "slow hook"}
+    assert execute_result.hook_durations["slow hook"] >= 0.4
+    assert execute_result.hook_durations["quick hook"] < 0.4
+
+
+def test_that_pre_commit_sums_hook_durations_across_runs(
+    pre_commit: PreCommitAbstraction,
+    mock_subprocess: MagicMock,
+    mocker: MockerFixture,
+):
+    mocker.patch("secureli.abstractions.pre_commit._command_line_limit", return_value=0)
+    mock_subprocess.Popen.side_effect = lambda *args, **kwargs: MagicMock(
+        stdout=io.BytesIO(b"black........Passed\n"), returncode=0
+    )
+
+    execute_result = pre_commit.execute_hooks(
+        hook_id="black", files=["file-0.py", "file-1.py"]
+    )
+
+    assert mock_subprocess.Popen.call_count == 2
+    assert list(execute_result.hook_durations) == ["black"]
@@ -4,7 +4,12 @@ from unittest.mock import MagicMock
 import pytest
 from pytest_mock import MockerFixture
 
-from secureli.abstractions.lexer_guesser import PygmentsLexerGuesser
+from pygments.util import ClassNotFound
+
+from secureli.abstractions.lexer_guesser import (
+    ExtensionLexerGuesser,
+    PygmentsLexerGuesser,
+)
 
 
 @pytest.fixture()
@@ -28,3 +33,70 @@ def test_that_pygments_lexer_guesser_guesses_lexer_with_pygments(
     lexer = pygments_lexer_guesser.guess_lexer(good_file_path, "file_contents")
 
     assert lexer == "RadLang"
+
+
+@pytest.fixture()
+def extension_lexer_guesser(tmp_path: Path) -> ExtensionLexerGuesser:
+    extension_lexer_guesser = ExtensionLexerGuesser()
+    extension_lexer_guesser.cache_path = tmp_path / "lexer-extensions.json"
+    return extension_lexer_guesser
+
+
+@pytest.mark.parametrize(
+    "file_name,lexer",
+    [
+        ("main.py", "Python"),
+        ("index.ts", "TypeScript"),
+        ("types.d.ts", "TypeScript"),
+        ("main.go", "Go"),
+        ("main.tf", "Terraform"),
+    ],
+)
+def test_that_extension_lexer_guesser_decides_unambiguous_extensions_by_name(
+    extension_lexer_guesser: ExtensionLexerGuesser, file_name: str, lexer: str
+):
+    assert extension_lexer_guesser.guess_lexer_from_file_name(Path(file_name)) == lexer
+
+
+@pytest.mark.parametrize("file_name", ["header.h", "CMakeLists.txt"])
+def test_that_extension_lexer_guesser_needs_contents_for_ambiguous_names(
+    extension_lexer_guesser: ExtensionLexerGuesser, file_name: str
+):
+    assert extension_lexer_guesser.guess_lexer_from_file_name(Path(file_name)) is None
+
+
+def test_that_extension_lexer_guesser_raises_for_unknown_extensions(
+    extension_lexer_guesser: ExtensionLexerGuesser,
+):
+    with pytest.raises(ClassNotFound):
+        extension_lexer_guesser.guess_lexer_from_file_name(Path("file.unknownext"))
+
+
+def test_that_extension_lexer_guesser_caches_the_extension_table(
+    extension_lexer_guesser: ExtensionLexerGuesser,
+    mocker: MockerFixture,
+):
+    extension_lexer_guesser.guess_lexer_from_file_name(Path("main.py"))
+    assert extension_lexer_guesser.cache_path.exists()
+
+    cached_lexer_guesser = ExtensionLexerGuesser()
+    cached_lexer_guesser.cache_path = extension_lexer_guesser.cache_path
+    mock_build_table = mocker.spy(cached_lexer_guesser, "_build_table")
+
+    assert cached_lexer_guesser.guess_lexer_from_file_name(Path("main.py")) == "Python"
+    mock_build_table.assert_not_called()
+
+
+def test_that_extension_lexer_guesser_rebuilds_a_table_from_another_pygments(
+    extension_lexer_guesser: ExtensionLexerGuesser,
+    mocker: MockerFixture,
+):
+    extension_lexer_guesser.cache_path.write_text(
+        '{"pygments_version": "0.0", "extensions": {}, "other_file_names": []}'
+    )
+    mock_build_table = mocker.spy(extension_lexer_guesser, "_build_table")
+
+    assert (
+        extension_lexer_guesser.guess_lexer_from_file_name(Path("main.py")) == "Python"
+    )
+    mock_build_table.assert_called_once()
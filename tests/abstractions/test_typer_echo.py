@@ -3,7 +3,7 @@ from unittest.mock import MagicMock, ANY
 import pytest
 from pytest_mock import MockerFixture
 
-from secureli.abstractions.echo import TyperEcho, Color
+from secureli.abstractions.echo import NonInteractiveEcho, TyperEcho, Color
 
 
 @pytest.fixture()
@@ -135,3 +135,18 @@ def test_that_typer_echo_prompts_user_for_confirmation(
     typer_echo.confirm(mock_echo_text)
 
     mock_typer_confirm.assert_called_once()
+
+
+def test_that_non_interactive_echo_answers_confirmations_with_their_default(
+    mock_typer_style: MagicMock,
+    mock_typer_echo: MagicMock,
+    mock_typer_confirm: MagicMock,
+    mock_echo_text: str,
+):
+    non_interactive_echo = NonInteractiveEcho(level="DEBUG")
+
+    assert non_interactive_echo.confirm(mock_echo_text, default_response=True)
+    assert not non_interactive_echo.confirm(mock_echo_text, default_response=False)
+
+    mock_typer_confirm.assert_not_called()
+    assert mock_typer_echo.call_count == 2
@@ -3,8 +3,13 @@ from unittest.mock import MagicMock
 
 import pytest
 
+from secureli.abstractions.echo import Color
 from secureli.abstractions.pre_commit import InstallFailedError
-from secureli.repositories.secureli_config import SecureliConfig, VerifyConfigOutcome
+from secureli.repositories.secureli_config import (
+    LanguageBaseline,
+    SecureliConfig,
+    VerifyConfigOutcome,
+)
 from secureli.services.language_analyzer import AnalyzeResult, SkippedFile
 from secureli.actions.action import Action, ActionDependencies, VerifyOutcome
 from secureli.services.language_support import LanguageMetadata, ValidateConfigResult
@@ -168,6 +173,29 @@ def test_that_initialize_repo_install_flow_warns_about_skipped_files(
     )  # "2 files skipped" + the two files themselves
 
 
+def test_that_initialize_repo_install_flow_reports_sampled_analysis(
+    action: Action,
+    mock_language_analyzer: MagicMock,
+    mock_echo: MagicMock,
+):
+    mock_language_analyzer.analyze.return_value = AnalyzeResult(
+        language_proportions={"RadLang": 0.75, "BadLang": 0.25},
+        skipped_files=[],
+        sampled=True,
+        sample_size=1500,
+        confidence_bounds={"RadLang": (0.72, 0.78), "BadLang": (0.22, 0.28)},
+    )
+
+    action.verify_install(test_folder_path, reset=True, always_yes=True)
+
+    mock_echo.print.assert_any_call(
+        "Detected the following languages (from a sample of 1500 files):"
+    )
+    mock_echo.print.assert_any_call(
+        "- RadLang: 75% (72%-78%)", color=Color.MAGENTA, bold=True
+    )
+
+
 def test_that_initialize_repo_can_be_canceled(
     action: Action,
     mock_echo: MagicMock,
@@ -360,3 +388,100 @@ def test_that_update_secureli_handles_failed_update(
     update_result = action._update_secureli(always_yes=False)
 
     assert update_result.outcome == "update-failed"
+
+
+def test_that_verify_install_analyzes_from_and_saves_the_language_baseline(
+    action: Action,
+    mock_language_analyzer: MagicMock,
+    mock_secureli_config: MagicMock,
+):
+    previous_baseline = LanguageBaseline(
+        commit="abc123", fingerprint="fingerprint", lexer_counts={"RadLang": 2}
+    )
+    new_baseline = LanguageBaseline(
+        commit="def456", fingerprint="fingerprint", lexer_counts={"RadLang": 3}
+    )
+    mock_secureli_config.load.return_value = SecureliConfig(
+        language_baseline=previous_baseline
+    )
+    mock_language_analyzer.analyze.return_value = AnalyzeResult(
+        language_proportions={"RadLang": 1.0},
+        skipped_files=[],
+        baseline=new_baseline,
+    )
+
+    action.verify_install(test_folder_path, reset=False, always_yes=True)
+
+    mock_language_analyzer.analyze.assert_called_once_with(
+        test_folder_path, previous_baseline
+    )
+    saved_config = mock_secureli_config.save.call_args.args[0]
+    assert saved_config.language_baseline == new_baseline
+
+
+def test_that_verify_install_skips_validation_when_fingerprint_is_unchanged(
+    action: Action,
+    mock_secureli_config: MagicMock,
+    mock_language_support: MagicMock,
+    mock_echo: MagicMock,
+):
+    mock_secureli_config.install_fingerprint.return_value = "unchanged"
+    mock_secureli_config.load.return_value = SecureliConfig(
+        languages=["PreviousLang"],
+        version_installed="abc123",
+        install_fingerprint="unchanged",
+    )
+
+    result = action.verify_install(test_folder_path, reset=False, always_yes=True)
+
+    assert result.outcome == VerifyOutcome.UP_TO_DATE
+    mock_language_support.version_for_language.assert_not_called()
+    mock_language_support.validate_config.assert_not_called()
+    mock_secureli_config.save.assert_not_called()
+    mock_echo.print.assert_called_once_with(
+        "seCureLI is installed and up-to-date (languages = ['PreviousLang'])"
+    )
+
+
+def test_that_verify_install_validates_and_records_fingerprint_when_changed(
+    action: Action,
+    mock_secureli_config: MagicMock,
+    mock_language_support: MagicMock,
+):
+    mock_secureli_config.install_fingerprint.return_value = "changed"
+    mock_secureli_config.load.return_value = SecureliConfig(
+        languages=["PreviousLang"],
+        version_installed="abc123",
+        install_fingerprint="unchanged",
+    )
+    mock_language_support.version_for_language.return_value = "abc123"
+
+    result = action.verify_install(test_folder_path, reset=False, always_yes=True)
+
+    assert result.outcome == VerifyOutcome.UP_TO_DATE
+    mock_language_support.validate_config.assert_called_once()
+    saved_config = mock_secureli_config.save.call_args.args[0]
+    assert saved_config.install_fingerprint == "changed"
+
+
+def test_that_verify_install_does_not_record_fingerprint_when_validation_fails(
+    action: Action,
+    mock_secureli_config: MagicMock,
+    mock_language_support: MagicMock,
+    mock_updater: MagicMock,
+):
+    mock_secureli_config.install_fingerprint.return_value = "changed"
+    mock_secureli_config.load.return_value = SecureliConfig(
+        languages=["PreviousLang"], version_installed="abc123"
+    )
+    mock_language_support.version_for_language.return_value = "abc123"
+    mock_language_support.validate_config.return_value = ValidateConfigResult(
+        successful=False, output="Configs don't match"
+    )
+    mock_updater.update.return_value = UpdateResult(
+        successful=True, output="Some output"
+    )
+
+    action.verify_install(test_folder_path, reset=False, always_yes=True)
+
+    mock_secureli_config.save.assert_not_called()
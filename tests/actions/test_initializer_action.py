@@ -1,14 +1,21 @@
+import subprocess
 from pathlib import Path
 from unittest.mock import MagicMock, ANY
 
 import pytest
+from pytest_mock import MockerFixture
+
+from secureli.abstractions.lexer_guesser import ExtensionLexerGuesser
 
 from secureli.actions.action import ActionDependencies
 from secureli.actions.initializer import InitializerAction
+from secureli.repositories.repo_files import RepoFilesRepository
 from secureli.repositories.secureli_config import SecureliConfig
 from secureli.repositories.settings import SecureliFile
+from secureli.services.language_analyzer import LanguageAnalyzerService
 from secureli.services.language_config import LanguageNotSupportedError
 from secureli.services.logging import LogAction
+from secureli.utilities.patterns import IgnoreMatcher
 
 test_folder_path = Path("does-not-matter")
 
@@ -57,15 +64,20 @@ def initializer_action(
     )
 
 
-def test_that_initialize_repo_does_not_load_config_when_resetting(
+def test_that_initialize_repo_reinstalls_when_resetting(
     initializer_action: InitializerAction,
     mock_secureli_config: MagicMock,
+    mock_language_analyzer: MagicMock,
     mock_echo: MagicMock,
     mock_logging_service: MagicMock,
 ):
+    mock_secureli_config.load.return_value = SecureliConfig(
+        languages=["RadLang"], version_installed="abc123"
+    )
+
     initializer_action.initialize_repo(test_folder_path, True, True)
 
-    mock_secureli_config.load.assert_not_called()
+    mock_language_analyzer.analyze.assert_called_once_with(test_folder_path, None)
 
     mock_logging_service.success.assert_called_once_with(LogAction.init)
 
@@ -102,3 +114,49 @@ def test_that_initialize_repo_creates_default_settings_file_if_not_present(
     initializer_action.initialize_repo(test_folder_path, False, False)
 
     mock_settings.save.assert_called_once_with(settings)
+
+
+def git(folder_path: Path, *args: str):
+    subprocess.run(["git", *args], cwd=folder_path, check=True)
+
+
+def test_that_initialize_repo_only_analyzes_changed_files_when_resetting(
+    action_deps: ActionDependencies,
+    mock_secureli_config: MagicMock,
+    mock_logging_service: MagicMock,
+    tmp_path: Path,
+    mocker: MockerFixture,
+):
+    folder_path = tmp_path / "repo"
+    folder_path.mkdir()
+    git(folder_path, "init", "-q")
+    for file_name in ["a.py", "b.py", "c.js"]:
+        (folder_path / file_name).write_text("x = 1\n")
+    git(folder_path, "add", ".")
+    git(folder_path, "-c", "user.name=a", "-c", "user.email=a@b", "commit", "-qm", "a")
+    lexer_guesser = ExtensionLexerGuesser()
+    lexer_guesser.cache_path = tmp_path / "lexer-extensions.json"
+    language_analyzer = LanguageAnalyzerService(
+        repo_files=RepoFilesRepository(
+            max_file_size=100000,
+            ignored_file_extensions=[],
+            ignore_matcher=IgnoreMatcher([]),
+        ),
+        lexer_guesser=lexer_guesser,
+    )
+    mock_secureli_config.load.return_value = SecureliConfig(
+        languages=["Python", "JavaScript"],
+        version_installed="abc123",
+        language_baseline=language_analyzer.analyze(folder_path).baseline,
+    )
+    (folder_path / "d.py").write_text("x = 1\n")
+    action_deps.language_analyzer = language_analyzer
+    mock_guess = mocker.spy(lexer_guesser, "guess_lexer_from_file_name")
+
+    InitializerAction(action_deps, mock_logging_service).initialize_repo(
+        folder_path, True, True
+    )
+
+    assert [call.args[0].name for call in mock_guess.call_args_list] == ["d.py"]
+    saved_config = mock_secureli_config.save.call_args.args[0]
+    assert saved_config.languages == ["Python", "JavaScript"]
@@ -4,9 +4,11 @@ from unittest.mock import MagicMock, patch
 
 import os
 import pytest
+from pytest_mock import MockerFixture
 
 from secureli.actions.action import ActionDependencies
 from secureli.actions.scan import ScanAction
+from secureli.repositories.scan_history import FailureRecord
 from secureli.repositories.secureli_config import SecureliConfig
 from secureli.repositories.settings import (
     SecureliFile,
@@ -19,6 +21,7 @@ from secureli.repositories.settings import (
     RepoFilesSettings,
 )
 from secureli.services.scanner import ScanMode, ScanResult, Failure, OutputParseErrors
+from secureli.services.logging import LogAction
 
 test_folder_path = Path("does-not-matter")
 
@@ -120,16 +123,33 @@ def action_deps(
     )
 
 
+@pytest.fixture()
+def mock_telemetry() -> MagicMock:
+    mock_telemetry = MagicMock()
+    return mock_telemetry
+
+
+@pytest.fixture()
+def mock_history() -> MagicMock:
+    mock_history = MagicMock()
+    mock_history.enabled = False
+    return mock_history
+
+
 @pytest.fixture()
 def scan_action(
     action_deps: ActionDependencies,
     mock_logging_service: MagicMock,
+    mock_telemetry: MagicMock,
+    mock_history: MagicMock,
 ) -> ScanAction:
     return ScanAction(
         action_deps=action_deps,
         echo=action_deps.echo,
         logging=mock_logging_service,
         scanner=action_deps.scanner,
+        telemetry=mock_telemetry,
+        history=mock_history,
     )
 
 
@@ -148,6 +168,120 @@ def test_that_scan_repo_errors_if_not_successful(
     mock_echo.print.assert_called_with("Bad Error")
 
 
+@mock.patch.dict(os.environ, {"API_KEY": "", "API_ENDPOINT": ""}, clear=True)
+def test_that_scan_repo_prints_streamed_output_only_once(
+    scan_action: ScanAction,
+    mock_scanner: MagicMock,
+    mock_echo: MagicMock,
+):
+    def scan_repo(scan_mode, specific_test=None, on_output=None, **kwargs):
+        on_output("first line")
+        on_output("second line")
+        return ScanResult(
+            successful=False, output="first line\nsecond line\n", failures=[]
+        )
+
+    mock_scanner.scan_repo.side_effect = scan_repo
+
+    scan_action.scan_repo(test_folder_path, ScanMode.STAGED_ONLY, False)
+
+    printed = [call.args[0] for call in mock_echo.print.call_args_list]
+    assert printed.count("first line") == 1
+    assert printed.count("second line") == 1
+    assert "first line\nsecond line\n" not in printed
+
+
+@mock.patch.dict(os.environ, {"API_KEY": "", "API_ENDPOINT": ""}, clear=True)
+def test_that_scan_repo_reports_the_hook_that_ran_out_of_time(
+    scan_action: ScanAction,
+    mock_scanner: MagicMock,
+    mock_echo: MagicMock,
+):
+    mock_scanner.scan_repo.return_value = ScanResult(
+        successful=False,
+        output="partial output",
+        failures=[],
+        timed_out=True,
+        timed_out_hook="slow-hook",
+    )
+
+    scan_action.scan_repo(test_folder_path, ScanMode.STAGED_ONLY, False)
+
+    mock_echo.error.assert_called_with(
+        "Scan stopped: the slow-hook hook ran out of time"
+    )
+
+
+def test_that_scan_repo_sends_its_log_entry_in_the_background(
+    scan_action: ScanAction,
+    mock_scanner: MagicMock,
+    mock_logging_service: MagicMock,
+    mock_telemetry: MagicMock,
+):
+    mock_scanner.scan_repo.return_value = ScanResult(
+        successful=False, output="Bad Error", failures=[]
+    )
+
+    scan_action.scan_repo(test_folder_path, ScanMode.STAGED_ONLY, False)
+
+    mock_telemetry.enqueue.assert_called_once_with(
+        mock_logging_service.failure.return_value
+    )
+
+
+def test_that_scan_repo_records_its_failures_in_the_history(
+    scan_action: ScanAction,
+    mock_scanner: MagicMock,
+    mock_history: MagicMock,
+    mocker: MockerFixture,
+):
+    mocker.patch(
+        "secureli.actions.scan.current_branch_name", return_value="feature/fast"
+    )
+    mock_history.enabled = True
+    mock_scanner.scan_repo.return_value = ScanResult(
+        successful=False,
+        failures=[Failure(repo="mock-repo", id="flake8", file="app.py")],
+    )
+
+    scan_action.scan_repo(test_folder_path, ScanMode.STAGED_ONLY, True)
+
+    mock_history.record.assert_called_once_with(
+        successful=False,
+        failures=[FailureRecord(repo="mock-repo", hook_id="flake8", file="app.py")],
+        branch="feature/fast",
+    )
+
+
+def test_that_scan_repo_does_not_record_history_unless_enabled(
+    scan_action: ScanAction,
+    mock_scanner: MagicMock,
+    mock_history: MagicMock,
+):
+    mock_scanner.scan_repo.return_value = ScanResult(successful=True, failures=[])
+
+    scan_action.scan_repo(test_folder_path, ScanMode.STAGED_ONLY, False)
+
+    mock_history.record.assert_not_called()
+
+
+@mock.patch.dict(os.environ, {"API_KEY": "", "API_ENDPOINT": ""}, clear=True)
+def test_that_scan_repo_logs_how_long_each_hook_took(
+    scan_action: ScanAction,
+    mock_scanner: MagicMock,
+    mock_logging_service: MagicMock,
+):
+    mock_scanner.scan_repo.return_value = ScanResult(
+        successful=True, failures=[], hook_durations={"black": 1.5}
+    )
+
+    scan_action.scan_repo(test_folder_path, ScanMode.STAGED_ONLY, False)
+
+    mock_logging_service.success.assert_called_once_with(
+        LogAction.scan, hook_durations={"black": 1.5}
+    )
+
+
 @mock.patch.dict(os.environ, {"API_KEY": "", "API_ENDPOINT": ""}, clear=True)
 def test_that_scan_repo_scans_if_installed(
     scan_action: ScanAction,
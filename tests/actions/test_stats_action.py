@@ -0,0 +1,122 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from secureli.actions.stats import StatsAction
+from secureli.repositories.scan_history import FailureTrend, RunSummary
+from secureli.services.logging import LogAction, LogEntry, LogStatus
+
+
+def _scan_log_entry(hook_durations: dict[str, float]) -> LogEntry:
+    return LogEntry(
+        id="mock-id",
+        username="mock-user",
+        machineid="mock-machine",
+        secureli_version="0.0.0",
+        status=LogStatus.success,
+        action=LogAction.scan,
+        hook_durations=hook_durations,
+    )
+
+
+@pytest.fixture()
+def mock_history() -> MagicMock:
+    mock_history = MagicMock()
+    mock_history.enabled = True
+    return mock_history
+
+
+@pytest.fixture()
+def stats_action(
+    mock_echo: MagicMock, mock_logging_service: MagicMock, mock_history: MagicMock
+) -> StatsAction:
+    return StatsAction(
+        echo=mock_echo, logging=mock_logging_service, history=mock_history
+    )
+
+
+def test_that_hook_duration_stats_report_percentiles_slowest_first(
+    stats_action: StatsAction,
+):
+    log_entries = [
+        _scan_log_entry({"black": float(seconds), "flake8": 0.5})
+        for seconds in range(1, 21)
+    ] + [_scan_log_entry({})]
+
+    hook_stats = stats_action.hook_duration_stats(log_entries)
+
+    assert [(stats.hook, stats.runs) for stats in hook_stats] == [
+        ("black", 20),
+        ("flake8", 20),
+    ]
+    assert hook_stats[0].p50_seconds == 10.0
+    assert hook_stats[0].p95_seconds == 19.0
+    assert hook_stats[1].p50_seconds == hook_stats[1].p95_seconds == 0.5
+
+
+def test_that_print_hook_durations_reads_recent_scans(
+    stats_action: StatsAction,
+    mock_echo: MagicMock,
+    mock_logging_service: MagicMock,
+):
+    mock_logging_service.recent_entries.return_value = [
+        _scan_log_entry({"detect-secrets": 2.0})
+    ]
+
+    stats_action.print_hook_durations(10)
+
+    mock_logging_service.recent_entries.assert_called_once_with(LogAction.scan, 10)
+    printed = [call.args[0] for call in mock_echo.print.call_args_list]
+    assert printed[0].split() == ["Hook", "Runs", "p50", "p95"]
+    assert printed[1].split() == ["detect-secrets", "1", "2.00s", "2.00s"]
+
+
+def test_that_print_hook_durations_explains_when_nothing_was_timed(
+    stats_action: StatsAction,
+    mock_echo: MagicMock,
+    mock_logging_service: MagicMock,
+):
+    mock_logging_service.recent_entries.return_value = []
+
+    stats_action.print_hook_durations(10)
+
+    mock_echo.print.assert_called_once()
+    assert "No hook timings" in mock_echo.print.call_args.args[0]
+
+
+def test_that_print_failure_trends_reads_the_scan_history(
+    stats_action: StatsAction,
+    mock_echo: MagicMock,
+    mock_history: MagicMock,
+):
+    mock_history.run_summary.return_value = RunSummary(runs=12, failed_runs=3)
+    mock_history.failure_trends.return_value = [
+        FailureTrend(
+            hook_id="flake8",
+            file="app.py",
+            failures=4,
+            last_failed_on=date(2026, 10, 17),
+        )
+    ]
+
+    stats_action.print_failure_trends(30, 10)
+
+    mock_history.failure_trends.assert_called_once_with(30, 10)
+    printed = [call.args[0] for call in mock_echo.print.call_args_list]
+    assert printed[0] == "12 scans in the last 30 days, 3 of which failed"
+    assert printed[1].split() == ["Hook", "File", "Failures", "Last", "failed"]
+    assert printed[2].split() == ["flake8", "app.py", "4", "2026-10-17"]
+
+
+def test_that_print_failure_trends_explains_when_history_is_disabled(
+    stats_action: StatsAction,
+    mock_echo: MagicMock,
+    mock_history: MagicMock,
+):
+    mock_history.enabled = False
+
+    stats_action.print_failure_trends(30, 10)
+
+    mock_history.failure_trends.assert_not_called()
+    assert "history: enabled: true" in mock_echo.print.call_args.args[0]
@@ -0,0 +1,149 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from secureli.abstractions.file_watcher import WatchedChanges
+from secureli.actions.action import ActionDependencies
+from secureli.actions.watch import WatchAction
+from secureli.repositories.secureli_config import SecureliConfig
+from secureli.services.scanner import Failure, ScanMode, ScanResult
+
+test_folder_path = Path("does-not-matter")
+
+
+@pytest.fixture()
+def mock_scanner() -> MagicMock:
+    mock_scanner = MagicMock()
+    mock_scanner.scan_edited_files.return_value = ScanResult(
+        successful=True, failures=[]
+    )
+    mock_scanner.scan_repo.return_value = ScanResult(successful=True, failures=[])
+    return mock_scanner
+
+
+@pytest.fixture()
+def mock_file_watcher() -> MagicMock:
+    mock_file_watcher = MagicMock()
+    mock_file_watcher.start.return_value = "inotify"
+    return mock_file_watcher
+
+
+@pytest.fixture()
+def mock_pass_install_verification(
+    mock_secureli_config: MagicMock, mock_language_support: MagicMock
+):
+    mock_secureli_config.load.return_value = SecureliConfig(
+        languages=["RadLang"], version_installed="abc123"
+    )
+    mock_language_support.version_for_language.return_value = "abc123"
+
+
+@pytest.fixture()
+def watch_action(
+    mock_echo: MagicMock,
+    mock_language_analyzer: MagicMock,
+    mock_language_support: MagicMock,
+    mock_scanner: MagicMock,
+    mock_secureli_config: MagicMock,
+    mock_settings_repository: MagicMock,
+    mock_file_watcher: MagicMock,
+) -> WatchAction:
+    action_deps = ActionDependencies(
+        mock_echo,
+        mock_language_analyzer,
+        mock_language_support,
+        mock_scanner,
+        mock_secureli_config,
+        mock_settings_repository,
+        MagicMock(),
+    )
+    return WatchAction(
+        action_deps=action_deps,
+        echo=mock_echo,
+        scanner=mock_scanner,
+        file_watcher=mock_file_watcher,
+        debounce_seconds=0.5,
+    )
+
+
+def test_that_watch_scans_each_batch_of_edited_files_until_interrupted(
+    watch_action: WatchAction,
+    mock_scanner: MagicMock,
+    mock_file_watcher: MagicMock,
+    mock_echo: MagicMock,
+    mock_pass_install_verification,
+):
+    mock_file_watcher.next_changes.side_effect = [
+        WatchedChanges(paths=["a.py", "b.py"]),
+        WatchedChanges(paths=["c.py"]),
+        KeyboardInterrupt(),
+    ]
+
+    watch_action.watch_repo(test_folder_path, always_yes=True, specific_test="black")
+
+    mock_file_watcher.next_changes.assert_called_with(0.5)
+    assert [call.args for call in mock_scanner.scan_edited_files.call_args_list] == [
+        (["a.py", "b.py"], "black"),
+        (["c.py"], "black"),
+    ]
+    mock_file_watcher.stop.assert_called_once()
+    mock_echo.print.assert_called_with("Stopped watching.")
+
+
+def test_that_watch_scans_every_unpassed_file_when_changes_overflow(
+    watch_action: WatchAction,
+    mock_scanner: MagicMock,
+    mock_file_watcher: MagicMock,
+    mock_pass_install_verification,
+):
+    mock_file_watcher.next_changes.side_effect = [
+        WatchedChanges(overflowed=True),
+        KeyboardInterrupt(),
+    ]
+
+    watch_action.watch_repo(test_folder_path, always_yes=True)
+
+    mock_scanner.scan_edited_files.assert_not_called()
+    assert mock_scanner.scan_repo.call_args.args == (ScanMode.ALL_FILES, None)
+
+
+def test_that_watch_reports_failures_and_keeps_watching(
+    watch_action: WatchAction,
+    mock_scanner: MagicMock,
+    mock_file_watcher: MagicMock,
+    mock_echo: MagicMock,
+    mock_pass_install_verification,
+):
+    mock_scanner.scan_edited_files.return_value = ScanResult(
+        successful=False,
+        output="black.....Failed\n",
+        failures=[Failure(repo="some-repo", id="black", file="a.py")],
+    )
+    mock_file_watcher.next_changes.side_effect = [
+        WatchedChanges(paths=["a.py"]),
+        WatchedChanges(paths=["a.py"]),
+        KeyboardInterrupt(),
+    ]
+
+    watch_action.watch_repo(test_folder_path, always_yes=True)
+
+    assert mock_scanner.scan_edited_files.call_count == 2
+    mock_echo.print.assert_any_call("black.....Failed")
+    mock_echo.error.assert_called_with(
+        "Scan detected 1 failure(s). Waiting for further changes..."
+    )
+
+
+def test_that_watch_does_not_start_when_install_is_canceled(
+    watch_action: WatchAction,
+    mock_secureli_config: MagicMock,
+    mock_echo: MagicMock,
+    mock_file_watcher: MagicMock,
+):
+    mock_secureli_config.load.return_value = SecureliConfig()
+    mock_echo.confirm.return_value = False
+
+    watch_action.watch_repo(test_folder_path, always_yes=False)
+
+    mock_file_watcher.start.assert_not_called()
@@ -0,0 +1,101 @@
+import json
+import socket
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+import secureli.client
+
+
+@pytest.fixture()
+def mock_run_locally(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch("secureli.client.run_locally", return_value=0)
+
+
+@pytest.fixture()
+def mock_spawn_daemon(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch("secureli.client.spawn_daemon")
+
+
+def test_that_client_runs_scans_through_the_daemon(
+    mocker: MockerFixture, mock_run_locally: MagicMock
+):
+    mock_request = mocker.patch("secureli.client.request", return_value=4)
+
+    assert secureli.client.main(["scan", "--mode", "all-files"]) == 4
+
+    mock_request.assert_called_once_with(["scan", "--mode", "all-files"])
+    mock_run_locally.assert_not_called()
+
+
+def test_that_client_runs_scans_locally_without_a_daemon(
+    tmp_path, monkeypatch: pytest.MonkeyPatch, mock_run_locally: MagicMock
+):
+    monkeypatch.chdir(tmp_path)
+
+    assert secureli.client.main(["scan"]) == 0
+
+    mock_run_locally.assert_called_once_with(["scan"])
+
+
+def test_that_client_spawns_a_daemon_when_asked(
+    tmp_path,
+    monkeypatch: pytest.MonkeyPatch,
+    mock_run_locally: MagicMock,
+    mock_spawn_daemon: MagicMock,
+):
+    monkeypatch.chdir(tmp_path)
+
+    secureli.client.main(["--spawn", "scan"])
+
+    mock_spawn_daemon.assert_called_once()
+    mock_run_locally.assert_called_once_with(["scan"])
+
+
+def test_that_client_runs_other_commands_locally(
+    mocker: MockerFixture,
+    mock_run_locally: MagicMock,
+    mock_spawn_daemon: MagicMock,
+):
+    mock_request = mocker.patch("secureli.client.request")
+
+    secureli.client.main(["--spawn", "init", "--yes"])
+
+    mock_request.assert_not_called()
+    mock_spawn_daemon.assert_not_called()
+    mock_run_locally.assert_called_once_with(["init", "--yes"])
+
+
+def test_that_client_sends_its_working_directory_and_environment(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GIT_INDEX_FILE", "/repo/.git/index.lock")
+    monkeypatch.setenv("SKIP", "black")
+    monkeypatch.setenv("UNRELATED", "value")
+    (tmp_path / ".secureli").mkdir()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(secureli.client.SOCKET_PATH)
+    server.listen()
+    messages = []
+
+    def serve():
+        connection, _ = server.accept()
+        with connection, connection.makefile("rb") as requests:
+            messages.append(json.loads(requests.readline()))
+            connection.sendall(b'{"exit_code": 0}\n')
+
+    served = threading.Thread(target=serve)
+    served.start()
+    exit_code = secureli.client.request(["scan"])
+    served.join()
+    server.close()
+
+    assert exit_code == 0
+    assert messages[0]["cwd"] == str(tmp_path)
+    assert messages[0]["env"]["GIT_INDEX_FILE"] == "/repo/.git/index.lock"
+    assert messages[0]["env"]["SKIP"] == "black"
+    assert "UNRELATED" not in messages[0]["env"]
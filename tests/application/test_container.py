@@ -2,8 +2,11 @@ import inspect
 
 import pytest
 from dependency_injector.providers import Factory
+from pytest_mock import MockerFixture
 
 from secureli.container import Container
+from secureli.services.git_ignore import GitIgnoreService
+from secureli.services.secureli_ignore import SecureliIgnoreService
 
 
 @pytest.fixture()
@@ -31,3 +34,26 @@ def test_that_container_loads(container: Container):
                     pytest.fail(
                         f"Error resolving {provider.cls.__name__}: args required mismatched provided ({str(e)})"
                     )
+
+
+def test_that_container_reads_ignored_file_patterns_only_when_needed(
+    mocker: MockerFixture,
+):
+    mock_secureli_ignored_file_patterns = mocker.patch.object(
+        SecureliIgnoreService, "ignored_file_patterns", return_value=["^a$"]
+    )
+    mock_git_ignored_file_patterns = mocker.patch.object(
+        GitIgnoreService, "ignored_file_patterns", return_value=["^b$"]
+    )
+    container = Container()
+
+    mock_secureli_ignored_file_patterns.assert_not_called()
+    mock_git_ignored_file_patterns.assert_not_called()
+
+    ignore_matcher = container.ignore_matcher()
+    container.secureli_ignore_matcher()
+    container.ignore_matcher()
+
+    assert sorted(ignore_matcher.patterns) == ["^a$", "^b$"]
+    mock_secureli_ignored_file_patterns.assert_called_once()
+    mock_git_ignored_file_patterns.assert_called_once()
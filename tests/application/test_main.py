@@ -1,10 +1,13 @@
+from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
+import typer
 from pytest_mock import MockerFixture
 
 import secureli.container
 import secureli.main
+from secureli.services.scanner import ScanMode
 
 
 @pytest.fixture()
@@ -15,11 +18,40 @@ def mock_container(mocker: MockerFixture) -> MagicMock:
 
 
 def test_that_setup_wires_up_container(mock_container: MagicMock):
-    secureli.main.setup()
+    secureli.main.setup(MagicMock(), trace=False)
     mock_container.init_resources.assert_called_once()
     mock_container.wire.assert_called_once()
 
 
+def test_that_setup_traces_the_command_when_asked(
+    mock_container: MagicMock, mocker: MockerFixture
+):
+    mock_tracer = mocker.patch("secureli.main.tracer")
+    mock_context = MagicMock(invoked_subcommand="scan")
+
+    secureli.main.setup(mock_context, trace=True)
+
+    mock_tracer.enable.assert_called_once()
+    mock_tracer.span.assert_called_once_with("secureli scan")
+    mock_tracer.write.assert_not_called()
+    write_trace = mock_context.call_on_close.call_args.args[0]
+    write_trace()
+    mock_tracer.span.return_value.__exit__.assert_called_once()
+    mock_tracer.write.assert_called_once_with(secureli.main.trace_path)
+
+
+def test_that_setup_does_not_trace_by_default(
+    mock_container: MagicMock, mocker: MockerFixture
+):
+    mock_tracer = mocker.patch("secureli.main.tracer")
+    mock_context = MagicMock()
+
+    secureli.main.setup(mock_context, trace=False)
+
+    mock_tracer.enable.assert_not_called()
+    mock_context.call_on_close.assert_not_called()
+
+
 def test_that_init_creates_initializer_action_and_executes(mock_container: MagicMock):
     secureli.main.init()
 
@@ -38,7 +70,69 @@ def test_that_scan_is_tbd(mock_container: MagicMock):
     mock_container.scan_action.assert_called_once()
 
 
+def test_that_scan_requires_a_base_ref_for_changed_files(mock_container: MagicMock):
+    with pytest.raises(typer.BadParameter):
+        secureli.main.scan(mode=ScanMode.CHANGED_SINCE, base_ref=None)
+
+    mock_container.scan_action.assert_not_called()
+
+
+def test_that_stats_hooks_creates_stats_action_and_executes(
+    mock_container: MagicMock,
+):
+    secureli.main.stats_hooks(scans=5)
+
+    mock_container.stats_action.return_value.print_hook_durations.assert_called_once_with(
+        5
+    )
+
+
+def test_that_stats_failures_creates_stats_action_and_executes(
+    mock_container: MagicMock,
+):
+    secureli.main.stats_failures(days=7, limit=5)
+
+    mock_container.stats_action.return_value.print_failure_trends.assert_called_once_with(
+        7, 5
+    )
+
+
 def test_that_update_is_tbd(mock_container: MagicMock):
     secureli.main.update()
 
     mock_container.update_action.assert_called_once()
+
+
+def test_that_daemon_serves_until_idle(mock_container: MagicMock):
+    secureli.main.daemon()
+
+    mock_container.daemon_service.return_value.serve.assert_called_once()
+    mock_container.echo.return_value.error.assert_not_called()
+
+
+def test_that_daemon_explains_when_it_could_not_serve(mock_container: MagicMock):
+    mock_container.daemon_service.return_value.serve.return_value = False
+
+    secureli.main.daemon()
+
+    mock_container.echo.return_value.error.assert_called_once()
+
+
+def test_that_daemon_only_runs_the_commands_it_serves(mock_container: MagicMock):
+    commands = {"init": MagicMock(), "scan": MagicMock()}
+
+    assert secureli.main._run_served_command(commands, ["init"]) == 2
+    assert secureli.main._run_served_command(commands, ["scan", "--yes"]) == 0
+
+    commands["init"].main.assert_not_called()
+    commands["scan"].main.assert_called_once_with(
+        args=["--yes"], prog_name="secureli scan", standalone_mode=False
+    )
+
+
+def test_that_watch_creates_watch_action_and_executes(mock_container: MagicMock):
+    secureli.main.watch(yes=True, specific_test="black")
+
+    mock_container.watch_action.return_value.watch_repo.assert_called_once_with(
+        Path("."), True, "black"
+    )
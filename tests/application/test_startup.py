@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+
+def import_secureli(python_args: list[str], setup_code: str = "") -> str:
+    completed_process = subprocess.run(
+        [sys.executable, *python_args, "-c", f"{setup_code}\nimport secureli.main"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    assert completed_process.returncode == 0, completed_process.stderr
+    return completed_process.stderr
+
+
+def test_that_importing_secureli_does_not_import_pkg_resources():
+    import_times = import_secureli(["-X", "importtime"])
+
+    imported_modules = [
+        line.rpartition("|")[2].strip()
+        for line in import_times.splitlines()
+        if line.startswith("import time:")
+    ]
+    assert "secureli.services.logging" in imported_modules
+    assert "pkg_resources" not in imported_modules
+
+
+def test_that_importing_secureli_does_not_run_subprocesses():
+    import_secureli(
+        [],
+        "import subprocess\n"
+        "def fail(*args, **kwargs):\n"
+        "    raise AssertionError(f'subprocess run at import: {args}')\n"
+        "subprocess.Popen.__init__ = fail",
+    )
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+
+from secureli.repositories.analysis_cache import AnalysisCacheRepository
+
+
+@pytest.fixture()
+def analysis_cache_repository(tmp_path: Path) -> AnalysisCacheRepository:
+    analysis_cache_repository = AnalysisCacheRepository(max_entries=3)
+    analysis_cache_repository.cache_path = (
+        tmp_path / ".secureli" / "analysis-cache.json"
+    )
+    return analysis_cache_repository
+
+
+def test_that_analysis_cache_loads_empty_without_a_cache_file(
+    analysis_cache_repository: AnalysisCacheRepository,
+):
+    assert analysis_cache_repository.load("fingerprint") == {}
+
+
+def test_that_analysis_cache_loads_saved_entries(
+    analysis_cache_repository: AnalysisCacheRepository,
+):
+    analysis_cache_repository.save("fingerprint", {"a": "Python", "b": "Go"})
+
+    assert analysis_cache_repository.load("fingerprint") == {"a": "Python", "b": "Go"}
+
+
+def test_that_analysis_cache_is_invalidated_by_another_fingerprint(
+    analysis_cache_repository: AnalysisCacheRepository,
+):
+    analysis_cache_repository.save("fingerprint", {"a": "Python"})
+
+    assert analysis_cache_repository.load("another fingerprint") == {}
+
+
+def test_that_analysis_cache_evicts_least_recently_used_entries(
+    analysis_cache_repository: AnalysisCacheRepository,
+):
+    entries = {"a": "Python", "b": "Go", "c": "Java", "d": "Swift"}
+
+    analysis_cache_repository.save("fingerprint", entries)
+
+    assert list(analysis_cache_repository.load("fingerprint")) == ["b", "c", "d"]
+
+
+def test_that_analysis_cache_ignores_a_corrupt_cache_file(
+    analysis_cache_repository: AnalysisCacheRepository,
+):
+    analysis_cache_repository.cache_path.parent.mkdir()
+    analysis_cache_repository.cache_path.write_text("{not json")
+
+    assert analysis_cache_repository.load("fingerprint") == {}
+
+
+def test_that_analysis_cache_is_disabled_without_any_entries_allowed(
+    analysis_cache_repository: AnalysisCacheRepository,
+):
+    analysis_cache_repository.max_entries = 0
+
+    analysis_cache_repository.save("fingerprint", {"a": "Python"})
+
+    assert not analysis_cache_repository.cache_path.exists()
@@ -0,0 +1,156 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from secureli.repositories.branch_log import BranchLogIndex, BranchLogRepository
+
+
+@pytest.fixture()
+def log_folder_path(tmp_path: Path) -> Path:
+    return tmp_path / ".secureli" / "logs"
+
+
+@pytest.fixture()
+def branch_log_repository(log_folder_path: Path) -> BranchLogRepository:
+    branch_log_repository = BranchLogRepository(
+        segment_max_bytes=1000000,
+        segment_max_age_days=30,
+        max_rotated_segments=2,
+    )
+    branch_log_repository.log_folder_path = log_folder_path
+    return branch_log_repository
+
+
+def entry(
+    number: int, action: str = "SCAN", status: str = "SUCCESS", age_days: float = 0
+) -> str:
+    timestamp = datetime.utcnow() - timedelta(days=age_days, seconds=1000 - number)
+    return json.dumps(
+        {
+            "id": str(number),
+            "timestamp": timestamp.isoformat(),
+            "action": action,
+            "status": status,
+        }
+    )
+
+
+def ids(entries: list[dict]) -> list[str]:
+    return [entry["id"] for entry in entries]
+
+
+def test_that_branch_log_appends_entries_as_lines_under_the_branch(
+    branch_log_repository: BranchLogRepository, log_folder_path: Path
+):
+    branch_log_repository.append("feature/fast", entry(1))
+    branch_log_repository.append("feature/fast", entry(2))
+
+    lines = (log_folder_path / "feature" / "fast").read_text().splitlines()
+
+    assert [json.loads(line)["id"] for line in lines] == ["1", "2"]
+
+
+def test_that_branch_log_starts_a_new_line_after_an_interrupted_append(
+    branch_log_repository: BranchLogRepository, log_folder_path: Path
+):
+    branch_log_repository.append("main", entry(1))
+    with open(log_folder_path / "main", "a") as f:
+        f.write('{"id": "2", "timest')
+
+    branch_log_repository.append("main", entry(3))
+
+    assert ids(branch_log_repository.recent("SCAN", 10)) == ["1", "3"]
+
+
+def test_that_branch_log_rotates_and_compresses_segments_beyond_the_size_limit(
+    branch_log_repository: BranchLogRepository, log_folder_path: Path
+):
+    branch_log_repository.segment_max_bytes = 1
+    branch_log_repository.append("main", entry(1))
+    branch_log_repository.append("main", entry(2, action="INIT", status="FAILURE"))
+
+    index = BranchLogIndex.parse_file(log_folder_path / "main.index.json")
+    (segment,) = index.segments
+    with gzip.open(log_folder_path / segment.file_name, "rt") as f:
+        assert [json.loads(line)["id"] for line in f] == ["1"]
+    assert segment.entry_count == 1
+    assert segment.status_counts == {"SCAN": {"SUCCESS": 1}}
+    assert ids(branch_log_repository.recent("INIT", 10)) == ["2"]
+
+
+def test_that_branch_log_rotates_segments_beyond_the_age_limit(
+    branch_log_repository: BranchLogRepository, log_folder_path: Path
+):
+    branch_log_repository.append("main", entry(1, age_days=31))
+    branch_log_repository.append("main", entry(2))
+    branch_log_repository.append("main", entry(3))
+
+    index = BranchLogIndex.parse_file(log_folder_path / "main.index.json")
+
+    assert [segment.entry_count for segment in index.segments] == [1]
+    assert ids(branch_log_repository.recent("SCAN", 10)) == ["1", "2", "3"]
+
+
+def test_that_branch_log_keeps_only_the_most_recent_rotated_segments(
+    branch_log_repository: BranchLogRepository, log_folder_path: Path
+):
+    branch_log_repository.segment_max_bytes = 1
+    for number in range(5):
+        branch_log_repository.append("main", entry(number))
+
+    assert len(list(log_folder_path.glob("main.*.gz"))) == 2
+    assert ids(branch_log_repository.recent("SCAN", 10)) == ["2", "3", "4"]
+
+
+def test_that_branch_log_skips_segments_without_the_action_or_older_than_needed(
+    branch_log_repository: BranchLogRepository, mocker: MockerFixture
+):
+    branch_log_repository.segment_max_bytes = 1
+    branch_log_repository.max_rotated_segments = 10
+    branch_log_repository.append("main", entry(1, action="INIT"))
+    branch_log_repository.append("main", entry(2))
+    branch_log_repository.append("main", entry(3))
+    branch_log_repository.append("main", entry(4))
+    read_entries = mocker.spy(branch_log_repository, "_read_entries")
+
+    recent_entries = branch_log_repository.recent("SCAN", 2)
+
+    assert ids(recent_entries) == ["3", "4"]
+    assert read_entries.call_count == 2  # The active segment and the newest rotated one
+
+
+def test_that_branch_log_finishes_rotations_that_were_interrupted(
+    branch_log_repository: BranchLogRepository, log_folder_path: Path
+):
+    branch_log_repository.append("main", entry(1))
+    (log_folder_path / "main").rename(log_folder_path / f"main.{1:020d}")
+
+    assert ids(branch_log_repository.recent("SCAN", 10)) == ["1"]
+
+    branch_log_repository.segment_max_bytes = 1
+    branch_log_repository.append("main", entry(2))
+    branch_log_repository.append("main", entry(3))
+
+    index = BranchLogIndex.parse_file(log_folder_path / "main.index.json")
+    assert [segment.entry_count for segment in index.segments] == [1, 1]
+    assert not (log_folder_path / f"main.{1:020d}").exists()
+    assert ids(branch_log_repository.recent("SCAN", 10)) == ["1", "2", "3"]
+
+
+def test_that_branch_log_does_not_fail_when_rotating_fails(
+    branch_log_repository: BranchLogRepository,
+    log_folder_path: Path,
+    mocker: MockerFixture,
+):
+    branch_log_repository.segment_max_bytes = 1
+    branch_log_repository.append("main", entry(1))
+    mocker.patch("secureli.repositories.branch_log.os.replace", side_effect=OSError)
+
+    branch_log_repository.append("main", entry(2))
+
+    assert ids(branch_log_repository.recent("SCAN", 10)) == ["1", "2"]
+    assert not (log_folder_path / "main.index.json").exists()
@@ -1,10 +1,16 @@
+import subprocess
 from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
 from pytest_mock import MockerFixture
 
-from secureli.repositories.repo_files import RepoFilesRepository
+from secureli.repositories.repo_files import (
+    FileSkippedError,
+    RepoFilesRepository,
+    SkipReason,
+)
+from secureli.utilities.patterns import IgnoreMatcher
 
 
 @pytest.fixture()
@@ -26,93 +32,83 @@ def git_a_file_for_some_reason_folder_path() -> MagicMock:
     return mock_folder_path
 
 
-def always_exists_path(path_str: str) -> MagicMock:
-    path = Path(path_str)
-
-    mock_stat = MagicMock()
-    mock_stat.st_size = 1024
-
-    mock_path = MagicMock()
-    mock_path.parts = path.parts
-    mock_path.suffix = path.suffix
-    mock_path.stat.return_value = mock_stat
-    mock_path.is_file.return_value = True
-    mock_path.__str__.return_value = path_str
-    return mock_path
-
-
-def does_not_exist_path(path_str: str) -> MagicMock:
-    mock_path = always_exists_path(path_str)
-    mock_path.exists.return_value = False
-    return mock_path
-
-
 @pytest.fixture()
-def good_folder_path() -> MagicMock:
-    git_folder_path = MagicMock()
-    git_folder_path.exists.return_value = True
-    git_folder_path.is_dir.return_value = True
-    mock_folder_path = MagicMock()
-    mock_folder_path.__truediv__.return_value = git_folder_path
-    mock_folder_path.rglob.return_value = [
-        always_exists_path(".invisible_folder/visible_file.txt"),
-        always_exists_path(".invisible_folder/.invisible_file.txt"),
-        always_exists_path("visible_folder/.invisible_file.txt"),
-        always_exists_path(
-            "visible_folder/visible_file.txt"
-        ),  # The one file we should count!
-    ]
-    return mock_folder_path
+def good_folder_path(tmp_path: Path) -> Path:
+    (tmp_path / ".git").mkdir()
+    for file_path in [
+        ".invisible_folder/visible_file.txt",
+        ".invisible_folder/.invisible_file.txt",
+        "visible_folder/.invisible_file.txt",
+        "visible_folder/visible_file.txt",  # The one file we should count!
+        "visible_folder/no_extension",
+        "visible_folder/movie.mov",
+        "node_modules/package/index.js",
+    ]:
+        (tmp_path / file_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file_path).write_text("sample_data")
+    return tmp_path
 
 
 @pytest.fixture()
-def mock_open_resource(mocker: MockerFixture) -> MagicMock:
-    return mocker.patch("builtins.open", mocker.mock_open(read_data="sample_data"))
+def mock_git_ls_files(mocker: MockerFixture) -> MagicMock:
+    mock_process = MagicMock()
+    mock_process.__enter__.return_value = mock_process
+    mock_process.stdout.read.side_effect = [
+        b".invisible_folder/visible_file.txt\0visible_folder/.invisible_file.txt\0visible_",
+        b"folder/visible_file.txt\0visible_folder/movie.mov\0visible_folder/no_extension\0",
+        b"",
+    ]
+    return mocker.patch(
+        "secureli.repositories.repo_files.subprocess.Popen", return_value=mock_process
+    )
 
 
 @pytest.fixture()
-def mock_open_resource_with_io_error(mocker: MockerFixture) -> MagicMock:
-    mock_open_with_error = mocker.mock_open(read_data="sample_data")
-    mock_open_with_error.side_effect = IOError("Generic I/O error")
-    return mocker.patch("builtins.open", mock_open_with_error)
+def mock_git_unavailable(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch(
+        "secureli.repositories.repo_files.subprocess.Popen",
+        side_effect=FileNotFoundError("git"),
+    )
 
 
 @pytest.fixture()
-def mock_open_resource_with_value_error(mocker: MockerFixture) -> MagicMock:
-    mock_open_with_error = mocker.mock_open(read_data="sample_data")
-    mock_open_with_error.side_effect = ValueError("Generic value error")
-    return mocker.patch("builtins.open", mock_open_with_error)
+def good_file_path(tmp_path: Path) -> Path:
+    good_file_path = tmp_path / "file.txt"
+    good_file_path.write_text("sample_data")
+    return good_file_path
 
 
 @pytest.fixture()
-def good_file_path(mock_open_resource) -> MagicMock:
-    return always_exists_path("folder/file.txt")
+def nonexistent_file_path(tmp_path: Path) -> Path:
+    return tmp_path / "file.txt"
 
 
 @pytest.fixture()
-def nonexistent_file_path(mock_open_resource) -> MagicMock:
-    mock_file_path = always_exists_path("folder/file.txt")
-    mock_file_path.exists.return_value = False
-    return mock_file_path
+def too_big_file_path(tmp_path: Path) -> Path:
+    too_big_file_path = tmp_path / "file.txt"
+    too_big_file_path.write_text("sample_data" * 10000)
+    return too_big_file_path
 
 
 @pytest.fixture()
-def too_big_file_path(mock_open_resource) -> MagicMock:
-    mock_file_path = always_exists_path("folder/file.txt")
-    mock_file_path.stat.return_value.st_size = 100000000
-    return mock_file_path
+def binary_file_path(tmp_path: Path) -> Path:
+    binary_file_path = tmp_path / "file.txt"
+    binary_file_path.write_bytes(b"sample\0data")
+    return binary_file_path
 
 
 @pytest.fixture()
-def io_error_occurs_file_path(mock_open_resource_with_io_error) -> MagicMock:
-    mock_file_path = always_exists_path("folder/file.txt")
-    return mock_file_path
+def undecodable_file_path(tmp_path: Path) -> Path:
+    undecodable_file_path = tmp_path / "file.txt"
+    undecodable_file_path.write_bytes("sample_data_\u00e9".encode("latin-1"))
+    return undecodable_file_path
 
 
 @pytest.fixture()
-def value_error_occurs_file_path(mock_open_resource_with_value_error) -> MagicMock:
-    mock_file_path = always_exists_path("folder/file.txt")
-    return mock_file_path
+def mock_read_with_io_error(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch.object(
+        RepoFilesRepository, "_read_into", side_effect=IOError("Generic I/O error")
+    )
 
 
 @pytest.fixture()
@@ -121,7 +117,7 @@ def repo_files_repository() -> RepoFilesRepository:
     return RepoFilesRepository(
         max_file_size=10000,
         ignored_file_extensions="",
-        ignored_file_patterns=[all_mov_files],
+        ignore_matcher=IgnoreMatcher([all_mov_files]),
     )
 
 
@@ -141,45 +137,256 @@ def test_that_list_repo_files_raises_value_error_if_dot_git_is_a_file_somehow(
 
 
 def test_that_list_repo_files_filters_out_invisible_files_and_folders(
-    repo_files_repository: RepoFilesRepository, good_folder_path: MagicMock
+    repo_files_repository: RepoFilesRepository,
+    good_folder_path: Path,
+    mock_git_ls_files: MagicMock,
+):
+    files = list(repo_files_repository.list_repo_files(good_folder_path))
+
+    assert files == [good_folder_path / "visible_folder/visible_file.txt"]
+
+
+def test_that_list_repo_files_streams_files_from_git(
+    repo_files_repository: RepoFilesRepository,
+    good_folder_path: Path,
+    mock_git_ls_files: MagicMock,
 ):
     files = repo_files_repository.list_repo_files(good_folder_path)
 
-    assert len(files) == 1
-    assert str(files[0]) == "visible_folder/visible_file.txt"
+    mock_git_ls_files.assert_not_called()
+    next(files)
+    args = mock_git_ls_files.call_args.args[0]
+    assert args[:2] == ["git", "ls-files"]
+    assert "--exclude-standard" in args
+
+
+def test_that_list_repo_files_walks_folder_when_git_is_unavailable(
+    repo_files_repository: RepoFilesRepository,
+    good_folder_path: Path,
+    mock_git_unavailable: MagicMock,
+):
+    files = list(repo_files_repository.list_repo_files(good_folder_path))
+
+    assert sorted(files) == [
+        good_folder_path / "node_modules/package/index.js",
+        good_folder_path / "visible_folder/visible_file.txt",
+    ]
+
+
+def test_that_list_repo_files_walk_prunes_ignored_folders(
+    good_folder_path: Path,
+    mock_git_unavailable: MagicMock,
+    mocker: MockerFixture,
+):
+    node_modules = "^(?:.+/)?node_modules(?P<ps_d>/).*$"
+    repo_files_repository = RepoFilesRepository(
+        max_file_size=10000,
+        ignored_file_extensions=[".mov"],
+        ignore_matcher=IgnoreMatcher([node_modules]),
+    )
+    mock_walk = mocker.spy(repo_files_repository.ignore_matcher, "is_directory_ignored")
+
+    files = list(repo_files_repository.list_repo_files(good_folder_path))
+
+    assert files == [good_folder_path / "visible_folder/visible_file.txt"]
+    visited = [call.args[0].name for call in mock_walk.call_args_list]
+    assert "node_modules" in visited
+    assert "package" not in visited
 
 
 def test_that_load_file_loads_data(
-    repo_files_repository: RepoFilesRepository, good_file_path: MagicMock
+    repo_files_repository: RepoFilesRepository, good_file_path: Path
 ):
     data = repo_files_repository.load_file(good_file_path)
 
     assert data == "sample_data"
 
 
+def test_that_load_file_loads_a_bounded_prefix(
+    repo_files_repository: RepoFilesRepository, good_file_path: Path
+):
+    data = repo_files_repository.load_file(good_file_path, 6)
+
+    assert data == "sample"
+
+
+def test_that_load_file_drops_a_character_cut_off_by_the_prefix(
+    repo_files_repository: RepoFilesRepository, good_file_path: Path
+):
+    good_file_path.write_text("a" + "\u00e9" * 10, encoding="utf8")
+
+    # Only 8 bytes are read, the last of which begins a 2-byte character
+    data = repo_files_repository.load_file(good_file_path, 2)
+
+    assert data == "a\u00e9"
+
+
+def test_that_load_file_translates_newlines(
+    repo_files_repository: RepoFilesRepository, good_file_path: Path
+):
+    good_file_path.write_bytes(b"sample\r\ndata\r")
+
+    data = repo_files_repository.load_file(good_file_path)
+
+    assert data == "sample\ndata\n"
+
+
 def test_that_load_file_raises_value_error_for_nonexistent_file(
-    repo_files_repository: RepoFilesRepository, nonexistent_file_path: MagicMock
+    repo_files_repository: RepoFilesRepository, nonexistent_file_path: Path
 ):
-    with pytest.raises(ValueError):
+    with pytest.raises(FileSkippedError) as exc_info:
         repo_files_repository.load_file(nonexistent_file_path)
 
+    assert exc_info.value.reason == SkipReason.MISSING
+
 
 def test_that_load_file_raises_value_error_for_file_that_is_too_big(
-    repo_files_repository: RepoFilesRepository, too_big_file_path: MagicMock
+    repo_files_repository: RepoFilesRepository, too_big_file_path: Path
 ):
-    with pytest.raises(ValueError):
+    with pytest.raises(FileSkippedError) as exc_info:
         repo_files_repository.load_file(too_big_file_path)
 
+    assert exc_info.value.reason == SkipReason.TOO_LARGE
+    assert (
+        str(exc_info.value) == f"File at path {too_big_file_path} was too big to scan"
+    )
+
 
 def test_that_load_file_raises_value_error_for_file_if_io_error_occurs(
-    repo_files_repository: RepoFilesRepository, io_error_occurs_file_path: MagicMock
+    repo_files_repository: RepoFilesRepository,
+    good_file_path: Path,
+    mock_read_with_io_error: MagicMock,
 ):
-    with pytest.raises(ValueError):
-        repo_files_repository.load_file(io_error_occurs_file_path)
+    with pytest.raises(FileSkippedError) as exc_info:
+        repo_files_repository.load_file(good_file_path)
 
+    assert exc_info.value.reason == SkipReason.UNREADABLE
 
-def test_that_load_file_raises_value_error_for_file_if_value_error_occurs(
-    repo_files_repository: RepoFilesRepository, value_error_occurs_file_path: MagicMock
+
+def test_that_load_file_raises_value_error_for_binary_file(
+    repo_files_repository: RepoFilesRepository, binary_file_path: Path
 ):
-    with pytest.raises(ValueError):
-        repo_files_repository.load_file(value_error_occurs_file_path)
+    with pytest.raises(FileSkippedError) as exc_info:
+        repo_files_repository.load_file(binary_file_path)
+
+    assert exc_info.value.reason == SkipReason.BINARY
+
+
+def test_that_load_file_raises_value_error_for_file_that_is_not_utf8(
+    repo_files_repository: RepoFilesRepository, undecodable_file_path: Path
+):
+    with pytest.raises(FileSkippedError) as exc_info:
+        repo_files_repository.load_file(undecodable_file_path)
+
+    assert exc_info.value.reason == SkipReason.UNDECODABLE
+
+
+def test_that_load_file_reads_no_more_than_the_prefix_needs(
+    repo_files_repository: RepoFilesRepository,
+    good_file_path: Path,
+    mocker: MockerFixture,
+):
+    good_file_path.write_text("sample_data" * 900)
+    mock_read_into = mocker.spy(repo_files_repository, "_read_into")
+
+    repo_files_repository.load_file(good_file_path, 6)
+
+    assert len(mock_read_into.call_args.args[1]) == 24
+
+
+def test_that_tracked_blob_ids_omits_modified_and_untracked_files(
+    repo_files_repository: RepoFilesRepository, tmp_path: Path
+):
+    for file_name in ["unchanged.py", "modified.py", "untracked.py"]:
+        (tmp_path / file_name).write_text("print('hello')")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(
+        ["git", "add", "unchanged.py", "modified.py"], cwd=tmp_path, check=True
+    )
+    (tmp_path / "modified.py").write_text("print('goodbye')")
+
+    blob_ids = repo_files_repository.tracked_blob_ids(tmp_path)
+
+    assert list(blob_ids) == [tmp_path / "unchanged.py"]
+    assert len(blob_ids[tmp_path / "unchanged.py"]) == 40
+
+
+def test_that_tracked_files_lists_every_tracked_file(
+    repo_files_repository: RepoFilesRepository, tmp_path: Path
+):
+    for file_name in ["tracked.py", "untracked.py", "image.png"]:
+        (tmp_path / file_name).write_text("print('hello')")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "tracked.py", "image.png"], cwd=tmp_path, check=True)
+
+    tracked_files = repo_files_repository.tracked_files(tmp_path)
+
+    assert tracked_files == [tmp_path / "image.png", tmp_path / "tracked.py"]
+
+
+def test_that_changed_files_lists_files_changed_since_the_base_ref(
+    repo_files_repository: RepoFilesRepository, tmp_path: Path
+):
+    def git(*args: str):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=tmp_path,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    for file_name in ["modified.py", "renamed.py", "deleted.py", "unchanged.py"]:
+        (tmp_path / file_name).write_text(f"# {file_name}")
+    git("init", "-q", "-b", "main")
+    git("add", ".")
+    git("commit", "-q", "-m", "base")
+    git("checkout", "-q", "-b", "feature")
+    (tmp_path / "modified.py").write_text("# changed")
+    (tmp_path / "added.py").write_text("# added")
+    git("mv", "renamed.py", "moved.py")
+    git("rm", "-q", "deleted.py")
+    git("add", ".")
+    git("commit", "-q", "-m", "feature")
+
+    changed_files = repo_files_repository.changed_files(tmp_path, "main")
+
+    assert sorted(changed_files) == [
+        tmp_path / "added.py",
+        tmp_path / "modified.py",
+        tmp_path / "moved.py",
+    ]
+    assert repo_files_repository.changed_files(tmp_path, "main", "main") == []
+    assert repo_files_repository.changed_files(tmp_path, "no-such-ref") is None
+    assert repo_files_repository.head_commit(
+        tmp_path, "feature"
+    ) == repo_files_repository.head_commit(tmp_path)
+    assert repo_files_repository.head_commit(
+        tmp_path, "main"
+    ) != repo_files_repository.head_commit(tmp_path)
+    assert repo_files_repository.head_commit(tmp_path, "no-such-ref") is None
+
+
+def test_that_tracked_files_is_none_outside_a_git_repo(
+    repo_files_repository: RepoFilesRepository,
+    tmp_path: Path,
+    mocker: MockerFixture,
+):
+    mocker.patch(
+        "secureli.repositories.repo_files.subprocess.run",
+        side_effect=FileNotFoundError("git"),
+    )
+
+    assert repo_files_repository.tracked_files(tmp_path) is None
+
+
+def test_that_tracked_blob_ids_is_empty_when_git_is_unavailable(
+    repo_files_repository: RepoFilesRepository,
+    tmp_path: Path,
+    mocker: MockerFixture,
+):
+    mocker.patch(
+        "secureli.repositories.repo_files.subprocess.run",
+        side_effect=FileNotFoundError("git"),
+    )
+
+    assert repo_files_repository.tracked_blob_ids(tmp_path) == {}
@@ -0,0 +1,116 @@
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from secureli.repositories.scan_history import (
+    FailureRecord,
+    RunSummary,
+    ScanHistoryRepository,
+)
+
+
+@pytest.fixture()
+def scan_history_repository(tmp_path: Path) -> ScanHistoryRepository:
+    scan_history_repository = ScanHistoryRepository(enabled=True)
+    scan_history_repository.history_path = tmp_path / ".secureli" / "history.db"
+    return scan_history_repository
+
+
+def failure(hook_id: str, file: str) -> FailureRecord:
+    return FailureRecord(repo="mock-repo", hook_id=hook_id, file=file)
+
+
+def at_day(mocker: MockerFixture, now: float, days_ago: int):
+    mocker.patch(
+        "secureli.repositories.scan_history.time.time",
+        return_value=now - days_ago * 86400,
+    )
+
+
+def test_that_scan_history_reports_nothing_before_anything_is_recorded(
+    scan_history_repository: ScanHistoryRepository,
+):
+    assert scan_history_repository.failure_trends(30, 10) == []
+    assert scan_history_repository.run_summary(30) == RunSummary(runs=0, failed_runs=0)
+    assert not scan_history_repository.history_path.exists()
+
+
+def test_that_scan_history_records_nothing_unless_enabled(
+    scan_history_repository: ScanHistoryRepository,
+):
+    scan_history_repository.enabled = False
+
+    scan_history_repository.record(False, [failure("flake8", "app.py")])
+
+    assert not scan_history_repository.history_path.exists()
+
+
+def test_that_scan_history_reports_the_most_frequent_failures_first(
+    scan_history_repository: ScanHistoryRepository,
+):
+    scan_history_repository.record(
+        False,
+        [failure("flake8", "app.py"), failure("black", "app.py")],
+        branch="main",
+    )
+    scan_history_repository.record(False, [failure("flake8", "app.py")])
+    scan_history_repository.record(True, [])
+
+    trends = scan_history_repository.failure_trends(30, 10)
+
+    assert [(trend.hook_id, trend.file, trend.failures) for trend in trends] == [
+        ("flake8", "app.py", 2),
+        ("black", "app.py", 1),
+    ]
+    assert trends[0].last_failed_on == datetime.now(timezone.utc).date()
+    assert scan_history_repository.run_summary(30) == RunSummary(runs=3, failed_runs=2)
+    assert len(scan_history_repository.failure_trends(30, 1)) == 1
+
+
+def test_that_scan_history_only_reports_on_the_days_asked_for(
+    scan_history_repository: ScanHistoryRepository, mocker: MockerFixture
+):
+    now = time.time()
+    at_day(mocker, now, 40)
+    scan_history_repository.record(False, [failure("flake8", "old.py")])
+    at_day(mocker, now, 5)
+    scan_history_repository.record(False, [failure("flake8", "new.py")])
+    at_day(mocker, now, 0)
+
+    trends = scan_history_repository.failure_trends(30, 10)
+
+    assert [trend.file for trend in trends] == ["new.py"]
+    assert scan_history_repository.run_summary(30).runs == 1
+    assert scan_history_repository.run_summary(60).runs == 2
+
+
+def test_that_scan_history_stores_hooks_and_files_once(
+    scan_history_repository: ScanHistoryRepository,
+):
+    for _ in range(3):
+        scan_history_repository.record(
+            False, [failure("flake8", "app.py"), failure("flake8", "lib.py")]
+        )
+
+    with sqlite3.connect(scan_history_repository.history_path) as connection:
+        counts = [
+            connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ["runs", "hooks", "files", "failures", "daily_failures"]
+        ]
+
+    assert counts == [3, 1, 2, 6, 2]
+
+
+def test_that_scan_history_does_not_fail_the_scan_when_it_cannot_record(
+    scan_history_repository: ScanHistoryRepository,
+):
+    scan_history_repository.history_path.parent.mkdir(parents=True)
+    scan_history_repository.history_path.write_text("not a database")
+
+    scan_history_repository.record(False, [failure("flake8", "app.py")])
+
+    assert scan_history_repository.failure_trends(30, 10) == []
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from secureli.repositories.scan_ledger import ScanLedgerRepository
+
+
+@pytest.fixture()
+def scan_ledger_repository(tmp_path: Path) -> ScanLedgerRepository:
+    scan_ledger_repository = ScanLedgerRepository(max_entries=3)
+    scan_ledger_repository.ledger_path = tmp_path / ".secureli" / "scan-ledger.json"
+    return scan_ledger_repository
+
+
+def test_that_scan_ledger_loads_empty_without_a_ledger_file(
+    scan_ledger_repository: ScanLedgerRepository,
+):
+    assert scan_ledger_repository.load("config-version") == {}
+
+
+def test_that_scan_ledger_loads_saved_passes(
+    scan_ledger_repository: ScanLedgerRepository,
+):
+    passes = {"blob:a": {"black", "check-yaml"}, "blob:b": set(), "blob:c": {"black"}}
+
+    scan_ledger_repository.save("config-version", passes)
+
+    assert scan_ledger_repository.load("config-version") == passes
+
+
+def test_that_scan_ledger_is_invalidated_by_another_config_version(
+    scan_ledger_repository: ScanLedgerRepository,
+):
+    scan_ledger_repository.save("config-version", {"blob:a": {"black"}})
+
+    assert scan_ledger_repository.load("another-config-version") == {}
+
+
+def test_that_scan_ledger_evicts_least_recently_used_entries(
+    scan_ledger_repository: ScanLedgerRepository,
+):
+    passes = {key: {"black"} for key in ["blob:a", "blob:b", "blob:c", "blob:d"]}
+
+    scan_ledger_repository.save("config-version", passes)
+
+    assert list(scan_ledger_repository.load("config-version")) == [
+        "blob:b",
+        "blob:c",
+        "blob:d",
+    ]
+
+
+def test_that_scan_ledger_ignores_a_corrupt_ledger_file(
+    scan_ledger_repository: ScanLedgerRepository,
+):
+    scan_ledger_repository.ledger_path.parent.mkdir(parents=True)
+    scan_ledger_repository.ledger_path.write_text("{not json")
+
+    assert scan_ledger_repository.load("config-version") == {}
+
+
+def test_that_scan_ledger_does_nothing_when_disabled(tmp_path: Path):
+    scan_ledger_repository = ScanLedgerRepository(max_entries=0)
+    scan_ledger_repository.ledger_path = tmp_path / ".secureli" / "scan-ledger.json"
+
+    scan_ledger_repository.save("config-version", {"blob:a": {"black"}})
+
+    assert not scan_ledger_repository.ledger_path.exists()
+    assert scan_ledger_repository.load("config-version") == {}
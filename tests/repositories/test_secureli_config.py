@@ -157,3 +157,36 @@ def test_that_update_returns_empty_config_if_missing_config_file(
     result = secureli_config.update()
 
     assert result == SecureliConfig()
+
+
+def test_that_install_fingerprint_changes_when_config_files_change(
+    tmp_path, monkeypatch, secureli_config: SecureliConfigRepository
+):
+    monkeypatch.chdir(tmp_path)
+    config = SecureliConfig(languages=["RadLang"], version_installed="abc123")
+    missing_fingerprint = secureli_config.install_fingerprint(config)
+
+    (tmp_path / ".pre-commit-config.yaml").write_text("repos: []\n")
+    created_fingerprint = secureli_config.install_fingerprint(config)
+
+    (tmp_path / ".pre-commit-config.yaml").write_text("repos: [changed]\n")
+    modified_fingerprint = secureli_config.install_fingerprint(config)
+
+    assert missing_fingerprint != created_fingerprint
+    assert created_fingerprint != modified_fingerprint
+    assert modified_fingerprint == secureli_config.install_fingerprint(config)
+
+
+def test_that_install_fingerprint_changes_with_configured_languages(
+    tmp_path, monkeypatch, secureli_config: SecureliConfigRepository
+):
+    monkeypatch.chdir(tmp_path)
+
+    fingerprint = secureli_config.install_fingerprint(
+        SecureliConfig(languages=["RadLang"], version_installed="abc123")
+    )
+    other_fingerprint = secureli_config.install_fingerprint(
+        SecureliConfig(languages=["CoolLang"], version_installed="abc123")
+    )
+
+    assert fingerprint != other_fingerprint
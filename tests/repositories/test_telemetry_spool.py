@@ -0,0 +1,87 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from secureli.repositories.telemetry_spool import TelemetrySpoolRepository
+
+
+@pytest.fixture()
+def telemetry_spool_repository(tmp_path: Path) -> TelemetrySpoolRepository:
+    telemetry_spool_repository = TelemetrySpoolRepository(max_entries=3)
+    telemetry_spool_repository.spool_path = tmp_path / ".secureli" / "telemetry"
+    return telemetry_spool_repository
+
+
+def test_that_telemetry_spool_claims_nothing_without_a_spool(
+    telemetry_spool_repository: TelemetrySpoolRepository,
+):
+    assert telemetry_spool_repository.claim(10) == []
+
+
+def test_that_telemetry_spool_claims_entries_oldest_first(
+    telemetry_spool_repository: TelemetrySpoolRepository,
+):
+    for data in ["first", "second", "third"]:
+        telemetry_spool_repository.add(data)
+
+    claimed_entries = telemetry_spool_repository.claim(2)
+
+    assert [entry.data for entry in claimed_entries] == ["first", "second"]
+    assert [entry.data for entry in telemetry_spool_repository.claim(2)] == ["third"]
+    assert telemetry_spool_repository.claim(2) == []
+
+
+def test_that_telemetry_spool_removes_sent_entries_and_keeps_released_ones(
+    telemetry_spool_repository: TelemetrySpoolRepository,
+):
+    telemetry_spool_repository.add("sent")
+    telemetry_spool_repository.add("unsent")
+    sent_entry, unsent_entry = telemetry_spool_repository.claim(2)
+
+    telemetry_spool_repository.remove([sent_entry])
+    telemetry_spool_repository.release([unsent_entry])
+
+    assert [entry.data for entry in telemetry_spool_repository.claim(2)] == ["unsent"]
+
+
+def test_that_telemetry_spool_discards_the_oldest_entries_beyond_its_cap(
+    telemetry_spool_repository: TelemetrySpoolRepository,
+):
+    for index in range(5):
+        telemetry_spool_repository.add(f"entry-{index}")
+
+    claimed_entries = telemetry_spool_repository.claim(10)
+
+    assert [entry.data for entry in claimed_entries] == [
+        "entry-2",
+        "entry-3",
+        "entry-4",
+    ]
+
+
+def test_that_telemetry_spool_reclaims_entries_whose_sender_died(
+    telemetry_spool_repository: TelemetrySpoolRepository,
+):
+    telemetry_spool_repository.add("orphaned")
+    telemetry_spool_repository.add("interrupted")
+    orphaned_entry, interrupted_entry = telemetry_spool_repository.claim(2)
+    stale_time = time.time() - telemetry_spool_repository.stale_claim_seconds - 1
+    os.utime(orphaned_entry.path, (stale_time, stale_time))
+    temp_path = interrupted_entry.path.with_suffix(".tmp")
+    interrupted_entry.path.rename(temp_path)
+    os.utime(temp_path, (stale_time, stale_time))
+
+    assert [entry.data for entry in telemetry_spool_repository.claim(2)] == ["orphaned"]
+    assert not temp_path.exists()
+
+
+def test_that_telemetry_spool_is_disabled_without_room_for_entries(
+    telemetry_spool_repository: TelemetrySpoolRepository,
+):
+    telemetry_spool_repository.max_entries = 0
+
+    telemetry_spool_repository.add("entry")
+
+    assert not telemetry_spool_repository.spool_path.exists()
@@ -30,3 +30,26 @@ def test_that_read_resource_raises_exception_when_file_not_found(
 ):
     with pytest.raises(ValueError):
         read_resource("invalid.txt")
+
+
+def test_that_resources_fingerprint_is_stable_and_covers_every_template():
+    fingerprint = secureli.resources.resources_fingerprint()
+
+    assert fingerprint == secureli.resources.resources_fingerprint()
+    assert "python-pre-commit.yaml" in fingerprint
+    assert "configs/" in fingerprint
+
+
+def test_that_resources_fingerprint_walks_the_resource_files_once(
+    mocker: MockerFixture,
+):
+    secureli.resources.resources_fingerprint.cache_clear()
+    mock_walk = mocker.patch(
+        "secureli.resources.read_resource.os.walk", return_value=iter([])
+    )
+
+    secureli.resources.resources_fingerprint()
+    secureli.resources.resources_fingerprint()
+
+    mock_walk.assert_called_once()
+    secureli.resources.resources_fingerprint.cache_clear()
@@ -0,0 +1,171 @@
+import json
+import os
+import socket
+import subprocess
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from secureli.services.daemon import DaemonService
+
+
+@pytest.fixture()
+def daemon_service(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> DaemonService:
+    monkeypatch.chdir(tmp_path)
+    return DaemonService(idle_timeout_seconds=0.5)
+
+
+def request(args: list[str], **message) -> list[dict]:
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(".secureli/daemon.sock")
+    with connection:
+        message = {"args": args, **message}
+        connection.sendall(json.dumps(message).encode("utf8") + b"\n")
+        with connection.makefile("r", encoding="utf8") as replies:
+            return [json.loads(reply) for reply in replies]
+
+
+def start(daemon_service: DaemonService, run_command, reload=None) -> threading.Thread:
+    served = threading.Thread(
+        target=daemon_service.serve, args=(run_command, reload or MagicMock())
+    )
+    served.start()
+    while not Path(".secureli/daemon.sock").exists():
+        served.join(0.01)
+    return served
+
+
+def test_that_daemon_service_streams_output_and_the_exit_code(
+    daemon_service: DaemonService,
+):
+    def run_command(args: list[str]) -> int:
+        print(f"running {' '.join(args)}")
+        return 3
+
+    served = start(daemon_service, run_command)
+    replies = request(["scan", "--mode", "all-files"])
+    served.join()
+
+    assert replies == [
+        {"output": "running scan --mode all-files"},
+        {"output": "\n"},
+        {"exit_code": 3},
+    ]
+    assert not Path(".secureli/daemon.sock").exists()
+
+
+def test_that_daemon_service_reports_commands_that_raise(
+    daemon_service: DaemonService,
+):
+    def run_command(args: list[str]) -> int:
+        raise ValueError("Broken")
+
+    served = start(daemon_service, run_command)
+    replies = request(["scan"])
+    served.join()
+
+    assert "ValueError: Broken" in "".join(reply.get("output", "") for reply in replies)
+    assert replies[-1] == {"exit_code": 1}
+
+
+def test_that_daemon_service_runs_commands_in_the_clients_environment(
+    daemon_service: DaemonService,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setenv("GIT_DIR", "daemon/.git")
+    client_path = tmp_path / "client"
+    client_path.mkdir()
+    seen = {}
+
+    def run_command(args: list[str]) -> int:
+        seen["cwd"] = os.getcwd()
+        seen["env"] = {
+            name: os.environ.get(name)
+            for name in ["GIT_INDEX_FILE", "GIT_DIR", "SKIP", "API_KEY", "HOME"]
+        }
+        return 0
+
+    served = start(daemon_service, run_command)
+    request(
+        ["scan"],
+        cwd=str(client_path),
+        env={
+            "GIT_INDEX_FILE": "/elsewhere/.git/index.lock",
+            "SKIP": "black",
+            "API_KEY": "client-api-key",
+            "HOME": "/not/sent/by/clients",
+        },
+    )
+    served.join()
+
+    assert seen["cwd"] == str(client_path)
+    assert seen["env"] == {
+        "GIT_INDEX_FILE": "/elsewhere/.git/index.lock",
+        "GIT_DIR": None,
+        "SKIP": "black",
+        "API_KEY": "client-api-key",
+        "HOME": os.environ.get("HOME"),
+    }
+    assert os.getcwd() == str(tmp_path)
+    assert "GIT_INDEX_FILE" not in os.environ
+    assert os.environ["GIT_DIR"] == "daemon/.git"
+
+
+def test_that_daemon_service_reloads_when_a_watched_file_changes(
+    daemon_service: DaemonService,
+):
+    mock_reload = MagicMock()
+    served = start(daemon_service, lambda args: 0, mock_reload)
+
+    request(["scan"])
+    Path(".secureli.yaml").write_text("echo:\n  level: DEBUG\n")
+    request(["scan"])
+    request(["scan"])
+    served.join()
+
+    mock_reload.assert_called_once()
+
+
+def test_that_daemon_service_reloads_when_a_worktree_switches_branch(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    def git(*args: str):
+        subprocess.run(["git", *args], check=True, capture_output=True)
+
+    monkeypatch.chdir(tmp_path)
+    git("init", "-q", "-b", "main", "repo")
+    monkeypatch.chdir(tmp_path / "repo")
+    git(
+        "-c",
+        "user.name=a",
+        "-c",
+        "user.email=a@b.c",
+        "commit",
+        "-q",
+        "--allow-empty",
+        "-m",
+        "first",
+    )
+    git("worktree", "add", "-q", "-b", "feature", str(tmp_path / "worktree"))
+    monkeypatch.chdir(tmp_path / "worktree")
+    mock_reload = MagicMock()
+    served = start(DaemonService(idle_timeout_seconds=0.5), lambda args: 0, mock_reload)
+
+    request(["scan"])
+    git("checkout", "-q", "-b", "other")
+    request(["scan"])
+    served.join()
+
+    mock_reload.assert_called_once()
+
+
+def test_that_daemon_service_does_not_serve_alongside_another_daemon(
+    daemon_service: DaemonService,
+):
+    served = start(daemon_service, lambda args: 0)
+
+    assert not DaemonService(idle_timeout_seconds=0.5).serve(MagicMock(), MagicMock())
+    served.join()
@@ -1,9 +1,20 @@
+import subprocess
 from pathlib import Path
+from typing import Optional
 from unittest.mock import MagicMock
 
 import pytest
+from pytest_mock import MockerFixture
 
-from secureli.services.language_analyzer import LanguageAnalyzerService
+from secureli.abstractions.lexer_guesser import ExtensionLexerGuesser, LexerGuesser
+from secureli.repositories.analysis_cache import AnalysisCacheRepository
+from secureli.repositories.repo_files import (
+    FileSkippedError,
+    RepoFilesRepository,
+    SkipReason,
+)
+from secureli.services.language_analyzer import LanguageAnalyzerService, SkippedFile
+from secureli.utilities.patterns import IgnoreMatcher
 
 
 @pytest.fixture()
@@ -15,6 +26,7 @@ def mock_repo_files() -> MagicMock:
         Path("file3.txt"),
     ]
     mock_repo_files.load_file.return_value = "file_contents"
+    mock_repo_files.head_commit.return_value = None
     return mock_repo_files
 
 
@@ -27,12 +39,15 @@ def mock_repo_files_value_error() -> MagicMock:
         Path("file3.txt"),
     ]
     mock_repo_files.load_file.side_effect = ValueError("test exception")
+    mock_repo_files.head_commit.return_value = None
     return mock_repo_files
 
 
 @pytest.fixture()
 def mock_lexer_guesser_bad_lang() -> MagicMock:
     mock_lexer_guesser = MagicMock()
+    mock_lexer_guesser.content_sample_size = None
+    mock_lexer_guesser.guess_lexer_from_file_name.return_value = None
     mock_lexer_guesser.guess_lexer.return_value = "BadLang"
     return mock_lexer_guesser
 
@@ -40,6 +55,8 @@ def mock_lexer_guesser_bad_lang() -> MagicMock:
 @pytest.fixture()
 def mock_lexer_guesser_python() -> MagicMock:
     mock_lexer_guesser = MagicMock()
+    mock_lexer_guesser.content_sample_size = None
+    mock_lexer_guesser.guess_lexer_from_file_name.return_value = None
     mock_lexer_guesser.guess_lexer.return_value = "Python"
     return mock_lexer_guesser
 
@@ -107,3 +124,314 @@ def test_that_language_analyzer_displays_warnings(
     analyze_result = language_analyzer_with_warnings.analyze(folder_path)
 
     assert len(analyze_result.skipped_files) == 3
+
+
+def test_that_language_analyzer_does_not_load_files_decided_by_name(
+    language_analyzer_python: LanguageAnalyzerService,
+    mock_repo_files: MagicMock,
+    mock_lexer_guesser_python: MagicMock,
+    folder_path: MagicMock,
+):
+    mock_lexer_guesser_python.guess_lexer_from_file_name.return_value = "Python"
+
+    analyze_result = language_analyzer_python.analyze(folder_path)
+
+    assert analyze_result.language_proportions == {"Python": 1.0}
+    mock_repo_files.load_file.assert_not_called()
+    mock_lexer_guesser_python.guess_lexer.assert_not_called()
+
+
+def test_that_language_analyzer_loads_only_the_sample_the_guesser_needs(
+    language_analyzer_python: LanguageAnalyzerService,
+    mock_repo_files: MagicMock,
+    mock_lexer_guesser_python: MagicMock,
+    folder_path: MagicMock,
+):
+    mock_lexer_guesser_python.content_sample_size = 4096
+
+    language_analyzer_python.analyze(folder_path)
+
+    mock_repo_files.load_file.assert_called_with(Path("file3.txt"), 4096)
+
+
+def test_that_language_analyzer_skips_files_no_lexer_could_match_by_name(
+    language_analyzer_python: LanguageAnalyzerService,
+    mock_repo_files: MagicMock,
+    mock_lexer_guesser_python: MagicMock,
+    folder_path: MagicMock,
+):
+    mock_lexer_guesser_python.guess_lexer_from_file_name.side_effect = ValueError(
+        "no lexer for filename"
+    )
+
+    analyze_result = language_analyzer_python.analyze(folder_path)
+
+    assert len(analyze_result.skipped_files) == 3
+    assert analyze_result.skipped_files[0].reason == SkipReason.UNRECOGNIZED
+    mock_repo_files.load_file.assert_not_called()
+
+
+def test_that_language_analyzer_reports_why_files_were_skipped(
+    language_analyzer_python: LanguageAnalyzerService,
+    mock_repo_files: MagicMock,
+    folder_path: MagicMock,
+):
+    mock_repo_files.load_file.side_effect = FileSkippedError(
+        SkipReason.BINARY, "File at path file1.txt is a binary file"
+    )
+
+    analyze_result = language_analyzer_python.analyze(folder_path)
+
+    assert analyze_result.skipped_files[0] == SkippedFile(
+        file_path=Path("file1.txt"),
+        error_message="File at path file1.txt is a binary file",
+        reason=SkipReason.BINARY,
+    )
+
+
+class FakeRepoFiles:
+    """A picklable stand-in for RepoFilesRepository, for use across processes"""
+
+    def list_repo_files(self, folder_path: Path):
+        return (Path(f"file{i}.{['py', 'js', 'txt'][i % 3]}") for i in range(999))
+
+    def load_file(self, file_path: Path, max_chars: Optional[int] = None) -> str:
+        if file_path.suffix == ".txt":
+            raise ValueError(f"File at path {file_path} was too big to scan")
+        return "file_contents"
+
+    def head_commit(self, folder_path: Path) -> Optional[str]:
+        return None
+
+
+class FakeLexerGuesser(LexerGuesser):
+    """A picklable stand-in for LexerGuesser, for use across processes"""
+
+    def guess_lexer(self, file_path: Path, file_contents: str) -> str:
+        return {".py": "Python", ".js": "JavaScript"}[file_path.suffix]
+
+
+def test_that_language_analyzer_parallel_results_match_serial_results(
+    folder_path: MagicMock,
+):
+    serial_result = LanguageAnalyzerService(
+        repo_files=FakeRepoFiles(), lexer_guesser=FakeLexerGuesser(), workers=1
+    ).analyze(folder_path)
+    parallel_result = LanguageAnalyzerService(
+        repo_files=FakeRepoFiles(), lexer_guesser=FakeLexerGuesser(), workers=3
+    ).analyze(folder_path)
+
+    assert parallel_result == serial_result
+    assert parallel_result.language_proportions == {"Python": 0.5, "JavaScript": 0.5}
+    assert len(parallel_result.skipped_files) == 333
+
+
+class FakeLargeRepoFiles(FakeRepoFiles):
+    """A picklable stand-in for a large repository, three quarters Python"""
+
+    def list_repo_files(self, folder_path: Path):
+        return (
+            Path(f"dir{i % 10}/file{i}.{'js' if i % 4 == 0 else 'py'}")
+            for i in range(20000)
+        )
+
+
+def test_that_language_analyzer_does_not_sample_below_the_threshold(
+    folder_path: MagicMock,
+):
+    analyze_result = LanguageAnalyzerService(
+        repo_files=FakeRepoFiles(),
+        lexer_guesser=FakeLexerGuesser(),
+        sample_threshold=1000,
+    ).analyze(folder_path)
+
+    assert not analyze_result.sampled
+    assert analyze_result.sample_size is None
+
+
+def test_that_language_analyzer_samples_large_repositories_and_stops_early(
+    folder_path: MagicMock,
+):
+    analyze_result = LanguageAnalyzerService(
+        repo_files=FakeLargeRepoFiles(),
+        lexer_guesser=FakeLexerGuesser(),
+        sample_threshold=1000,
+    ).analyze(folder_path)
+
+    assert analyze_result.sampled
+    assert 1000 <= analyze_result.sample_size < 20000
+    assert list(analyze_result.language_proportions) == ["Python", "JavaScript"]
+    assert analyze_result.language_proportions["Python"] == pytest.approx(
+        0.75, abs=0.02
+    )
+    for language, proportion in analyze_result.language_proportions.items():
+        lower, upper = analyze_result.confidence_bounds[language]
+        assert lower < proportion < upper
+
+
+def test_that_language_analyzer_sample_order_is_proportional_by_stratum(
+    language_analyzer_python: LanguageAnalyzerService,
+):
+    file_paths = [Path(f"big/file{i}.py") for i in range(900)] + [
+        Path(f"small/file{i}.py") for i in range(100)
+    ]
+
+    sample = language_analyzer_python._stratified_order(file_paths)[:100]
+
+    assert sorted(sample) != sample
+    assert 9 <= len([p for p in sample if p.parent == Path("small")]) <= 11
+
+
+class FakeTrackedRepoFiles(FakeRepoFiles):
+    """A picklable stand-in for a repository whose files are all tracked by git"""
+
+    max_file_size = 100000
+
+    def tracked_blob_ids(self, folder_path: Path) -> dict[Path, str]:
+        return {
+            file_path: f"{index:040x}"
+            for index, file_path in enumerate(self.list_repo_files(folder_path))
+        }
+
+
+def test_that_language_analyzer_only_guesses_files_missing_from_the_cache(
+    folder_path: MagicMock, tmp_path: Path, mocker: MockerFixture
+):
+    analysis_cache = AnalysisCacheRepository(max_entries=10000)
+    analysis_cache.cache_path = tmp_path / "analysis-cache.json"
+    lexer_guesser = FakeLexerGuesser()
+    language_analyzer = LanguageAnalyzerService(
+        repo_files=FakeTrackedRepoFiles(),
+        lexer_guesser=lexer_guesser,
+        analysis_cache=analysis_cache,
+    )
+    first_result = language_analyzer.analyze(folder_path)
+    mock_guess_lexer = mocker.spy(lexer_guesser, "guess_lexer")
+
+    second_result = language_analyzer.analyze(folder_path)
+
+    assert second_result == first_result
+    assert mock_guess_lexer.call_count == 0
+    assert len(second_result.skipped_files) == 333
+
+
+def test_that_language_analyzer_parallel_results_match_with_a_cache(
+    folder_path: MagicMock, tmp_path: Path
+):
+    analysis_cache = AnalysisCacheRepository(max_entries=10000)
+    analysis_cache.cache_path = tmp_path / "analysis-cache.json"
+    serial_result = LanguageAnalyzerService(
+        repo_files=FakeTrackedRepoFiles(), lexer_guesser=FakeLexerGuesser()
+    ).analyze(folder_path)
+    analysis_cache.save(
+        f"{FakeLexerGuesser().fingerprint()}:100000",
+        {f"blob:{0:040x}:file0.py": "Python"},
+    )
+
+    parallel_result = LanguageAnalyzerService(
+        repo_files=FakeTrackedRepoFiles(),
+        lexer_guesser=FakeLexerGuesser(),
+        workers=3,
+        analysis_cache=analysis_cache,
+    ).analyze(folder_path)
+
+    assert parallel_result == serial_result
+    assert len(analysis_cache.load(f"{FakeLexerGuesser().fingerprint()}:100000")) == 666
+
+
+def git(folder_path: Path, *args: str):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=folder_path,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+@pytest.fixture()
+def git_language_analyzer(tmp_path: Path) -> LanguageAnalyzerService:
+    lexer_guesser = ExtensionLexerGuesser()
+    lexer_guesser.cache_path = tmp_path / "lexer-extensions.json"
+    return LanguageAnalyzerService(
+        repo_files=RepoFilesRepository(
+            max_file_size=100000,
+            ignored_file_extensions=[],
+            ignore_matcher=IgnoreMatcher([]),
+        ),
+        lexer_guesser=lexer_guesser,
+    )
+
+
+@pytest.fixture()
+def git_folder_path(tmp_path: Path) -> Path:
+    git_folder_path = tmp_path / "repo"
+    git_folder_path.mkdir()
+    git(git_folder_path, "init", "-q")
+    for file_name, contents in [
+        ("a.py", "import os\n"),
+        ("b.py", "import sys\n"),
+        ("c.js", "let c = 1;\n"),
+    ]:
+        (git_folder_path / file_name).write_text(contents)
+    git(git_folder_path, "add", ".")
+    git(git_folder_path, "commit", "-q", "-m", "initial")
+    return git_folder_path
+
+
+def test_that_language_analyzer_records_a_baseline_of_committed_files(
+    git_language_analyzer: LanguageAnalyzerService, git_folder_path: Path
+):
+    (git_folder_path / "d.py").write_text("import re\n")
+    (git_folder_path / "c.js").unlink()
+
+    analyze_result = git_language_analyzer.analyze(git_folder_path)
+
+    assert analyze_result.language_proportions == {"Python": 1.0}
+    assert analyze_result.baseline.lexer_counts == {"Python": 2, "JavaScript": 1}
+
+
+def test_that_language_analyzer_applies_changes_since_the_baseline(
+    git_language_analyzer: LanguageAnalyzerService,
+    git_folder_path: Path,
+    mocker: MockerFixture,
+):
+    baseline = git_language_analyzer.analyze(git_folder_path).baseline
+    git(git_folder_path, "mv", "b.py", "b.js")
+    (git_folder_path / "b.js").write_text("let b = 1;\n")
+    git(git_folder_path, "rm", "-q", "c.js")
+    (git_folder_path / "e.go").write_text("package main\n")
+    git(git_folder_path, "add", ".")
+    git(git_folder_path, "commit", "-q", "-m", "changes")
+    (git_folder_path / "a.py").unlink()
+    (git_folder_path / "f.py").write_text("import io\n")
+    expected_result = git_language_analyzer.analyze(git_folder_path)
+    mock_list_repo_files = mocker.spy(
+        git_language_analyzer.repo_files, "list_repo_files"
+    )
+
+    analyze_result = git_language_analyzer.analyze(git_folder_path, baseline)
+
+    mock_list_repo_files.assert_not_called()
+    assert analyze_result == expected_result
+    assert analyze_result.baseline.lexer_counts == {
+        "Python": 1,
+        "JavaScript": 1,
+        "Go": 1,
+    }
+
+
+def test_that_language_analyzer_analyzes_everything_for_another_fingerprint(
+    git_language_analyzer: LanguageAnalyzerService,
+    git_folder_path: Path,
+    mocker: MockerFixture,
+):
+    baseline = git_language_analyzer.analyze(git_folder_path).baseline
+    baseline.fingerprint = "another fingerprint"
+    mock_list_repo_files = mocker.spy(
+        git_language_analyzer.repo_files, "list_repo_files"
+    )
+
+    analyze_result = git_language_analyzer.analyze(git_folder_path, baseline)
+
+    mock_list_repo_files.assert_called_once()
+    assert analyze_result.baseline.fingerprint != "another fingerprint"
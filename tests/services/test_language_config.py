@@ -7,6 +7,7 @@ from secureli.services.language_config import (
     LanguageNotSupportedError,
 )
 
+from secureli.utilities.patterns import IgnoreMatcher
 from secureli.repositories.settings import (
     PreCommitSettings,
     PreCommitRepo,
@@ -47,7 +48,7 @@ def language_config_service(
     return LanguageConfigService(
         command_timeout_seconds=300,
         data_loader=mock_data_loader,
-        ignored_file_patterns=[],
+        ignore_matcher=IgnoreMatcher([]),
         pre_commit_settings=settings_dict,
     )
 
@@ -83,10 +84,12 @@ def test_that_language_config_service_templates_are_loaded_with_global_exclude_i
     mock_data_loader: MagicMock,
 ):
     mock_data_loader.return_value = "yaml: data"
-    language_config_service.ignored_file_patterns = [
-        "mock_pattern1",
-        "mock_pattern2",
-    ]
+    language_config_service.ignore_matcher = IgnoreMatcher(
+        [
+            "mock_pattern1",
+            "mock_pattern2",
+        ]
+    )
     result = language_config_service.get_language_config("Python")
 
     assert "exclude: ^(mock_pattern1|mock_pattern2)" in result.config_data
@@ -98,7 +101,7 @@ def test_that_language_config_service_templates_are_loaded_without_exclude(
     mock_open: MagicMock,
 ):
     mock_data_loader.return_value = "yaml: data"
-    language_config_service.ignored_file_patterns = []
+    language_config_service.ignore_matcher = IgnoreMatcher([])
     result = language_config_service.get_language_config("Python")
 
     assert "exclude:" not in result.config_data
@@ -409,7 +412,7 @@ def test_that_language_config_service_templates_are_loaded_with_global_exclude_i
     mock_open: MagicMock,
 ):
     mock_data_loader.return_value = "yaml: data"
-    language_config_service.ignored_file_patterns = ["mock_pattern"]
+    language_config_service.ignore_matcher = IgnoreMatcher(["mock_pattern"])
     result = language_config_service.get_language_config("Python")
 
     assert "exclude: mock_pattern" in result.config_data
@@ -516,3 +516,61 @@ def test_that_language_support_handles_malformed_config_and_does_not_write(
 
     mock_pre_commit_hook.install.assert_called_once()
     assert metadata.security_hook_id == "baddie-finder"
+
+
+@pytest.fixture()
+def mock_python_language_config(mock_language_config_service: MagicMock) -> MagicMock:
+    mock_language_config_service.fingerprint.return_value = "settings-fingerprint"
+    mock_language_config_service.get_language_config.return_value = LanguagePreCommitResult(
+        language="Python",
+        version="abc123",
+        linter_config=LoadLinterConfigsResult(successful=False, linter_data=list()),
+        config_data="""
+            repos:
+            -   repo: http://sample-repo.com/baddie-finder
+                hooks:
+                -    id: baddie-finder
+            """,
+    )
+    return mock_language_config_service
+
+
+def test_that_language_support_builds_each_config_once_per_invocation(
+    language_support_service: LanguageSupportService,
+    mock_python_language_config: MagicMock,
+):
+    version = language_support_service.version_for_language(["Python"])
+    configuration = language_support_service.get_configuration(["Python"])
+    configuration.repos.clear()
+    language_support_service.secret_detection_hook_id(["Python"])
+
+    # Once for Python and once for the base configuration
+    assert mock_python_language_config.get_language_config.call_count == 2
+    assert language_support_service.version_for_language(["Python"]) == version
+    assert language_support_service.get_configuration(["Python"]).repos
+    assert language_support_service.config_build_cache.misses == 1
+    assert language_support_service.config_build_cache.hits == 4
+
+
+def test_that_language_support_rebuilds_config_for_other_settings(
+    language_support_service: LanguageSupportService,
+    mock_python_language_config: MagicMock,
+):
+    language_support_service.version_for_language(["Python"])
+    mock_python_language_config.fingerprint.return_value = "other-fingerprint"
+    language_support_service.version_for_language(["Python"])
+    language_support_service.version_for_language(["Python", "JavaScript"])
+
+    assert language_support_service.config_build_cache.misses == 3
+
+
+def test_that_language_support_reuses_config_when_applying_support(
+    language_support_service: LanguageSupportService,
+    mock_python_language_config: MagicMock,
+    mock_open: MagicMock,
+):
+    language_support_service.version_for_language(["Python"])
+    language_support_service.apply_support(["Python"])
+
+    assert language_support_service.config_build_cache.misses == 1
+    assert language_support_service.config_build_cache.hits == 2
@@ -4,41 +4,24 @@ from unittest.mock import MagicMock
 import pytest
 from pytest_mock import MockerFixture
 
+from secureli.repositories.branch_log import BranchLogRepository
 from secureli.repositories.secureli_config import SecureliConfig
-from secureli.services.logging import LoggingService, LogAction
+from secureli.services.logging import (
+    LogAction,
+    LogEntry,
+    LoggingService,
+    LogStatus,
+    log_environment,
+)
 from secureli.services.language_support import HookConfiguration
+from secureli.utilities.tracing import TraceSummary
 
 
 @pytest.fixture()
-def mock_path(mocker: MockerFixture) -> MagicMock:
-    mock_file_path = MagicMock()
-    mock_file_path.return_value = Path(".secureli/logs/fancy-branch")
+def mock_branch_logs() -> MagicMock:
+    mock_branch_logs = MagicMock()
 
-    mock_path_instance = MagicMock()
-    mock_path_instance.__truediv__.return_value = mock_file_path
-
-    mock_path_class = mocker.patch("secureli.services.logging.Path")
-    mock_path_class.return_value = mock_path_instance
-
-    return mock_file_path
-
-
-@pytest.fixture()
-def mock_open(mocker: MockerFixture) -> MagicMock:
-    mock_open = mocker.mock_open()
-
-    mocker.patch("builtins.open", mock_open)
-
-    return mock_open
-
-
-@pytest.fixture()
-def mock_open(mocker: MockerFixture) -> MagicMock:
-    mock_open = mocker.mock_open()
-
-    mocker.patch("builtins.open", mock_open)
-
-    return mock_open
+    return mock_branch_logs
 
 
 @pytest.fixture()
@@ -50,18 +33,21 @@ def mock_language_support() -> MagicMock:
 
 @pytest.fixture()
 def logging_service(
-    mock_language_support: MagicMock, mock_secureli_config: MagicMock
+    mock_language_support: MagicMock,
+    mock_secureli_config: MagicMock,
+    mock_branch_logs: MagicMock,
 ) -> LoggingService:
     return LoggingService(
         language_support=mock_language_support,
         secureli_config=mock_secureli_config,
+        branch_logs=mock_branch_logs,
     )
 
 
-def test_that_logging_service_success_creates_logs_folder_if_not_exists(
+def test_that_logging_service_success_appends_to_the_branch_log(
     logging_service: LoggingService,
-    mock_path: MagicMock,
-    mock_open: MagicMock,
+    mock_branch_logs: MagicMock,
+    mocker: MockerFixture,
     mock_secureli_config: MagicMock,
     mock_language_support: MagicMock,
 ):
@@ -69,30 +55,33 @@ def test_that_logging_service_success_creates_logs_folder_if_not_exists(
         languages=["RadLang"], version_installed="abc123"
     )
     mock_language_support.get_configuration.return_value = HookConfiguration(repos=[])
-    logging_service.success(LogAction.init)
+    mocker.patch(
+        "secureli.services.logging.current_branch_name", return_value="feature/fast"
+    )
+    log_entry = logging_service.success(LogAction.init)
 
-    mock_path.parent.mkdir.assert_called_once()
+    mock_branch_logs.append.assert_called_once_with(
+        "feature/fast", log_entry.json(exclude_none=True)
+    )
 
 
-def test_that_logging_service_failure_creates_logs_folder_if_not_exists(
+def test_that_logging_service_failure_appends_to_the_branch_log(
     logging_service: LoggingService,
-    mock_path: MagicMock,
-    mock_open: MagicMock,
+    mock_branch_logs: MagicMock,
     mock_secureli_config: MagicMock,
 ):
     mock_secureli_config.load.return_value = SecureliConfig(
         languages=None, version_installed=None
     )
 
-    logging_service.failure(LogAction.init, "Horrible Failure", None, None)
+    log_entry = logging_service.failure(LogAction.init, "Horrible Failure", None, None)
 
-    mock_path.parent.mkdir.assert_called_once()
+    mock_branch_logs.append.assert_called_once()
+    assert LogEntry.parse_raw(mock_branch_logs.append.call_args.args[1]) == log_entry
 
 
 def test_that_logging_service_success_logs_none_for_hook_config_if_not_initialized(
     logging_service: LoggingService,
-    mock_path: MagicMock,
-    mock_open: MagicMock,
     mock_secureli_config: MagicMock,
 ):
     # Uninitialized configuration
@@ -103,3 +92,83 @@ def test_that_logging_service_success_logs_none_for_hook_config_if_not_initializ
     log_entry = logging_service.success(LogAction.build)
 
     assert log_entry.hook_config is None
+
+
+def test_that_log_entries_determine_the_environment_once_and_ids_every_time(
+    mocker: MockerFixture,
+):
+    mock_git_user_email = mocker.patch(
+        "secureli.services.logging.git_user_email",
+        return_value="great.engineer@slalom.com",
+    )
+    log_environment.cache_clear()
+
+    first_log_entry = LogEntry(status=LogStatus.success, action=LogAction.scan)
+    second_log_entry = LogEntry(status=LogStatus.success, action=LogAction.scan)
+    log_environment.cache_clear()
+
+    mock_git_user_email.assert_called_once()
+    assert second_log_entry.username == "great.engineer@slalom.com"
+    assert first_log_entry.id != second_log_entry.id
+    assert first_log_entry.timestamp <= second_log_entry.timestamp
+
+
+def test_that_logging_service_reads_back_recent_entries_for_an_action(
+    mock_language_support: MagicMock,
+    mock_secureli_config: MagicMock,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    mocker: MockerFixture,
+):
+    monkeypatch.chdir(tmp_path)
+    logging_service = LoggingService(
+        language_support=mock_language_support,
+        secureli_config=mock_secureli_config,
+        branch_logs=BranchLogRepository(
+            segment_max_bytes=1000000,
+            segment_max_age_days=30,
+            max_rotated_segments=20,
+        ),
+    )
+    mocker.patch(
+        "secureli.services.logging.current_branch_name", return_value="feature/fast"
+    )
+    mock_secureli_config.load.return_value = SecureliConfig(
+        languages=None, version_installed=None
+    )
+    first_scan = logging_service.success(LogAction.scan, hook_durations={"black": 1.5})
+    logging_service.success(LogAction.build)
+    second_scan = logging_service.failure(
+        LogAction.scan, "Failed", 1, None, hook_durations={"black": 2.5}
+    )
+    with open(tmp_path / ".secureli" / "logs" / "feature" / "fast", "a") as f:
+        f.write("not a log entry\n")
+
+    log_entries = logging_service.recent_entries(LogAction.scan, 10)
+    last_entry = logging_service.recent_entries(LogAction.scan, 1)
+
+    assert [log_entry.id for log_entry in log_entries] == [
+        first_scan.id,
+        second_scan.id,
+    ]
+    assert log_entries[1].hook_durations == {"black": 2.5}
+    assert [log_entry.id for log_entry in last_entry] == [second_scan.id]
+
+
+def test_that_logging_service_summarizes_the_trace_when_tracing(
+    logging_service: LoggingService,
+    mock_secureli_config: MagicMock,
+    mocker: MockerFixture,
+):
+    mock_secureli_config.load.return_value = SecureliConfig(
+        languages=None, version_installed=None
+    )
+    mock_tracer = mocker.patch("secureli.services.logging.tracer")
+    mock_tracer.summary.return_value = TraceSummary(
+        span_seconds={"ScannerService.scan_repo": 1.5},
+        counters={"subprocesses_spawned": 2},
+    )
+
+    log_entry = logging_service.success(LogAction.scan)
+
+    assert log_entry.trace.counters == {"subprocesses_spawned": 2}
@@ -1,9 +1,22 @@
+import subprocess
+import threading
+import time
 from unittest.mock import MagicMock
 
 import pytest
 
+from pathlib import Path
+
 from secureli.abstractions.pre_commit import ExecuteResult
-from secureli.services.scanner import ScannerService, ScanMode, OutputParseErrors
+from secureli.repositories.repo_files import RepoFilesRepository
+from secureli.repositories.scan_ledger import ScanLedgerRepository
+from secureli.utilities.patterns import IgnoreMatcher
+from secureli.services.scanner import (
+    ScannerService,
+    ScanMode,
+    ScanOutputParser,
+    OutputParseErrors,
+)
 from pytest_mock import MockerFixture
 
 
@@ -175,3 +188,659 @@ def test_that_scanner_service_handles_error_in_missing_repo(
     scan_result = scanner_service.scan_repo(ScanMode.ALL_FILES)
 
     assert scan_result.failures[1].repo == OutputParseErrors.REPO_NOT_FOUND
+
+
+def test_that_scan_output_parser_reports_each_failure_once_its_output_ends(
+    mock_scan_output_double_failure: str,
+):
+    parser = ScanOutputParser(
+        {
+            "repos": [
+                {
+                    "repo": "https://github.com/pre-commit/pre-commit-hooks",
+                    "hooks": [{"id": "trailing-whitespace"}],
+                },
+                {"repo": "https://github.com/psf/black", "hooks": [{"id": "black"}]},
+            ]
+        }
+    )
+    failures_by_line = [
+        parser.feed(line) for line in mock_scan_output_double_failure.split("\n")
+    ]
+    final_failures = parser.finish()
+
+    completing_lines = [
+        (line.strip(), failures)
+        for line, failures in zip(
+            mock_scan_output_double_failure.split("\n"), failures_by_line
+        )
+        if failures
+    ]
+    assert len(completing_lines) == 1
+    assert completing_lines[0][0].startswith("fix end of files")
+    assert completing_lines[0][1][0].id == "trailing-whitespace"
+    assert completing_lines[0][1][0].file == "tests/services/test_scanner_service.py"
+    assert [failure.id for failure in final_failures] == ["black"]
+    assert final_failures[0].repo == "https://github.com/psf/black"
+
+
+def test_that_scanner_service_streams_output_and_parses_failures(
+    scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    mock_scan_output_single_failure: str,
+    mock_config_all_repos: MagicMock,
+):
+    def execute_hooks(
+        all_files, hook_id=None, on_output=None, files=None, skip_hook_ids=None
+    ):
+        for line in mock_scan_output_single_failure.splitlines(keepends=True):
+            on_output(line)
+        return ExecuteResult(successful=False, output=mock_scan_output_single_failure)
+
+    mock_pre_commit.execute_hooks.side_effect = execute_hooks
+    streamed_lines = []
+
+    scan_result = scanner_service.scan_repo(
+        ScanMode.ALL_FILES, on_output=streamed_lines.append
+    )
+
+    assert streamed_lines == mock_scan_output_single_failure.splitlines()
+    assert [failure.id for failure in scan_result.failures] == ["trailing-whitespace"]
+    assert scan_result.output == mock_scan_output_single_failure
+
+
+def test_that_scanner_service_reports_timeouts(
+    scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    mock_scan_output_no_failure: str,
+    mock_config_all_repos: MagicMock,
+):
+    mock_pre_commit.execute_hooks.return_value = ExecuteResult(
+        successful=False,
+        output=mock_scan_output_no_failure,
+        timed_out=True,
+        timed_out_hook="slow-hook",
+    )
+    scan_result = scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    assert scan_result.timed_out
+    assert scan_result.timed_out_hook == "slow-hook"
+
+
+@pytest.fixture()
+def mock_config_mixed_hooks(mocker: MockerFixture) -> MagicMock:
+    mock_data = r"""
+    repos:
+    - hooks:
+      - id: check-yaml
+      - id: check-json
+      - id: trailing-whitespace
+      - id: check-toml
+      - id: check-xml
+      repo: https://github.com/pre-commit/pre-commit-hooks
+      rev: v4.3.0
+    - hooks:
+      - id: serial-linter
+        require_serial: true
+      repo: https://example.com/serial-linter
+      rev: v1.0.0
+    """
+    mock_open = mocker.mock_open(read_data=mock_data)
+    mocker.patch("builtins.open", mock_open)
+    return mock_open
+
+
+@pytest.fixture()
+def parallel_scanner_service(mock_pre_commit: MagicMock) -> ScannerService:
+    return ScannerService(
+        mock_pre_commit, hook_workers=4, serial_hook_ids=["trailing-whitespace"]
+    )
+
+
+def test_that_parallel_scans_merge_hook_output_in_configured_order(
+    parallel_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    mock_config_mixed_hooks: MagicMock,
+):
+    # Hooks listed earlier take longer, so they finish last
+    delays = {"check-yaml": 0.2, "check-json": 0.1}
+
+    def execute_hooks(all_files, hook_id=None, on_output=None, files=None):
+        time.sleep(delays.get(hook_id, 0))
+        if hook_id == "check-toml":
+            output = f"{hook_id}.....Failed\n- hook id: {hook_id}\n\nbad.toml\n\n"
+            return ExecuteResult(successful=False, output=output)
+        return ExecuteResult(successful=True, output=f"{hook_id}.....Passed\n")
+
+    mock_pre_commit.execute_hooks.side_effect = execute_hooks
+    streamed_lines = []
+
+    scan_result = parallel_scanner_service.scan_repo(
+        ScanMode.ALL_FILES, on_output=streamed_lines.append
+    )
+
+    hook_lines = [line for line in streamed_lines if "....." in line]
+    assert hook_lines == [
+        "check-yaml.....Passed",
+        "check-json.....Passed",
+        "trailing-whitespace.....Passed",
+        "check-toml.....Failed",
+        "check-xml.....Passed",
+        "serial-linter.....Passed",
+    ]
+    assert scan_result.output.splitlines() == streamed_lines
+    assert not scan_result.successful
+    assert [(failure.id, failure.file) for failure in scan_result.failures] == [
+        ("check-toml", "bad.toml")
+    ]
+
+
+def test_that_parallel_scans_leave_out_hooks_of_other_stages(
+    parallel_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    mocker: MockerFixture,
+):
+    mock_data = """
+    default_stages: [pre-commit, push]
+    repos:
+    - hooks:
+      - id: check-yaml
+      - id: push-only
+        stages: [push]
+      - id: manual-only
+        stages: [manual]
+      - id: legacy-commit
+        stages: [commit]
+      - id: manifest-push-only
+      repo: https://github.com/pre-commit/pre-commit-hooks
+      rev: v4.3.0
+    """
+    mocker.patch("builtins.open", mocker.mock_open(read_data=mock_data))
+
+    def execute_hooks(all_files, hook_id=None, on_output=None, files=None):
+        if hook_id == "manifest-push-only":
+            output = f"No hook with id `{hook_id}` in stage `pre-commit`\n"
+            return ExecuteResult(successful=False, output=output)
+        return ExecuteResult(successful=True, output=f"{hook_id}.....Passed\n")
+
+    mock_pre_commit.execute_hooks.side_effect = execute_hooks
+
+    scan_result = parallel_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    assert scan_result.successful
+    assert scan_result.output == "check-yaml.....Passed\nlegacy-commit.....Passed\n"
+    assert sorted(
+        call.kwargs["hook_id"] for call in mock_pre_commit.execute_hooks.call_args_list
+    ) == ["check-yaml", "legacy-commit", "manifest-push-only"]
+
+
+def test_that_parallel_scans_run_serial_hooks_on_their_own(
+    parallel_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    mock_config_mixed_hooks: MagicMock,
+):
+    running = set()
+    overlaps = {}
+    lock = threading.Lock()
+
+    def execute_hooks(all_files, hook_id=None, on_output=None, files=None):
+        with lock:
+            running.add(hook_id)
+            overlaps.setdefault(hook_id, set()).update(running)
+        time.sleep(0.05)
+        with lock:
+            running.discard(hook_id)
+            overlaps[hook_id].update(running)
+        return ExecuteResult(successful=True, output=f"{hook_id}.....Passed\n")
+
+    mock_pre_commit.execute_hooks.side_effect = execute_hooks
+
+    scan_result = parallel_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    assert scan_result.successful
+    assert overlaps["trailing-whitespace"] == {"trailing-whitespace"}
+    assert overlaps["serial-linter"] == {"serial-linter"}
+    assert overlaps["check-yaml"] <= {"check-yaml", "check-json"}
+    assert overlaps["check-toml"] <= {"check-toml", "check-xml"}
+    assert mock_pre_commit.execute_hooks.call_count == 6
+
+
+def test_that_parallel_scans_run_staged_files_in_a_single_pre_commit_run(
+    parallel_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    mock_scan_output_no_failure: str,
+    mock_config_mixed_hooks: MagicMock,
+):
+    mock_pre_commit.execute_hooks.return_value = ExecuteResult(
+        successful=True, output=mock_scan_output_no_failure
+    )
+
+    parallel_scanner_service.scan_repo(ScanMode.STAGED_ONLY)
+
+    mock_pre_commit.execute_hooks.assert_called_once_with(
+        False, hook_id=None, files=None, skip_hook_ids=None
+    )
+
+
+def test_that_shard_files_balances_shards_by_file_size(
+    scanner_service: ScannerService, tmp_path: Path
+):
+    sizes = {"a.txt": 600, "b.txt": 500, "c.txt": 400, "d.txt": 300, "e.txt": 200}
+    for file_name, size in sizes.items():
+        (tmp_path / file_name).write_bytes(b"x" * size)
+
+    shards = scanner_service._shard_files(
+        [str(tmp_path / file_name) for file_name in sizes], 2
+    )
+
+    shard_sizes = [sum(sizes[Path(file).name] for file in shard) for shard in shards]
+    assert sorted(shard_sizes) == [900, 1100]
+    assert sorted(file for shard in shards for file in shard) == [
+        str(tmp_path / file_name) for file_name in sizes
+    ]
+
+
+def test_that_shard_files_omits_empty_shards(scanner_service: ScannerService):
+    shards = scanner_service._shard_files(["missing.txt"], 4)
+
+    assert shards == [["missing.txt"]]
+
+
+def test_that_sharded_scans_merge_and_deduplicate_failures(
+    mock_pre_commit: MagicMock,
+    mock_config_all_repos: MagicMock,
+):
+    mock_repo_files = MagicMock()
+    mock_repo_files.tracked_files.return_value = [Path("a.py"), Path("b.py")]
+    scanner_service = ScannerService(mock_pre_commit, repo_files=mock_repo_files)
+
+    def execute_hooks(all_files, hook_id=None, on_output=None, files=None):
+        output = (
+            "black.....Failed\n- hook id: black\n\nreformatted setup.cfg\n\n"
+            f"trim trailing whitespace.....Failed\n- hook id: trailing-whitespace\n"
+            f"\nFixing {files[0]}\n"
+        )
+        return ExecuteResult(successful=False, output=output)
+
+    mock_pre_commit.execute_hooks.side_effect = execute_hooks
+
+    scan_result = scanner_service.scan_repo(ScanMode.ALL_FILES, jobs=2)
+
+    assert sorted(
+        call.kwargs["files"] for call in mock_pre_commit.execute_hooks.call_args_list
+    ) == [["a.py"], ["b.py"]]
+    assert sorted((failure.id, failure.file) for failure in scan_result.failures) == [
+        ("black", "setup.cfg"),
+        ("trailing-whitespace", "a.py"),
+        ("trailing-whitespace", "b.py"),
+    ]
+    assert not scan_result.successful
+
+
+def test_that_sharded_scans_sum_each_hooks_durations(
+    mock_pre_commit: MagicMock,
+    mock_config_all_repos: MagicMock,
+):
+    mock_repo_files = MagicMock()
+    mock_repo_files.tracked_files.return_value = [Path("a.py"), Path("b.py")]
+    scanner_service = ScannerService(mock_pre_commit, repo_files=mock_repo_files)
+    mock_pre_commit.execute_hooks.side_effect = lambda *args, **kwargs: ExecuteResult(
+        successful=True,
+        output="",
+        hook_durations={"black": 1.5, "flake8": 0.25},
+    )
+
+    scan_result = scanner_service.scan_repo(ScanMode.ALL_FILES, jobs=2)
+
+    assert scan_result.hook_durations == {"black": 3.0, "flake8": 0.5}
+
+
+@pytest.fixture()
+def ledger_folder_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".pre-commit-config.yaml").write_text(
+        "repos:\n"
+        "- repo: https://github.com/psf/black\n"
+        "  rev: 22.10.0\n"
+        "  hooks:\n"
+        "  - id: black\n"
+    )
+    for file_name in ["a.py", "b.py", "c.py"]:
+        (tmp_path / file_name).write_text(f"{file_name[0]} = 1\n")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+    return tmp_path
+
+
+@pytest.fixture()
+def ledger_scanner_service(
+    mock_pre_commit: MagicMock, ledger_folder_path: Path
+) -> ScannerService:
+    mock_pre_commit.execute_hooks.return_value = ExecuteResult(
+        successful=True, output="black.....Passed\n"
+    )
+    return ScannerService(
+        mock_pre_commit,
+        repo_files=RepoFilesRepository(
+            max_file_size=100000,
+            ignored_file_extensions=[],
+            ignore_matcher=IgnoreMatcher([]),
+        ),
+        scan_ledger=ScanLedgerRepository(max_entries=100),
+    )
+
+
+def scanned_files(mock_pre_commit: MagicMock) -> list[str]:
+    return sorted(mock_pre_commit.execute_hooks.call_args.kwargs["files"])
+
+
+def test_that_ledger_scans_skip_files_that_already_passed(
+    ledger_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    ledger_folder_path: Path,
+):
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+    assert scanned_files(mock_pre_commit) == [
+        ".pre-commit-config.yaml",
+        "a.py",
+        "b.py",
+        "c.py",
+    ]
+
+    mock_pre_commit.execute_hooks.reset_mock()
+    scan_result = ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    mock_pre_commit.execute_hooks.assert_not_called()
+    assert scan_result.successful
+    assert scan_result.output == (
+        "No files have changed since they last passed every hook\n"
+    )
+
+    (ledger_folder_path / "b.py").write_text("b = 2\n")
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    assert scanned_files(mock_pre_commit) == ["b.py"]
+
+
+def test_that_ledger_scans_record_no_passes_for_hooks_that_failed(
+    ledger_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+):
+    mock_pre_commit.execute_hooks.return_value = ExecuteResult(
+        successful=False,
+        output="black.....Failed\n- hook id: black\n\nwould reformat a.py\n",
+    )
+    scan_result = ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+    assert [(failure.id, failure.file) for failure in scan_result.failures] == [
+        ("black", "a.py")
+    ]
+
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    assert len(scanned_files(mock_pre_commit)) == 4
+
+
+def test_that_ledger_scans_withhold_other_hooks_passes_from_files_named_by_failures(
+    ledger_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    ledger_folder_path: Path,
+):
+    (ledger_folder_path / ".pre-commit-config.yaml").write_text(
+        "repos:\n"
+        "- repo: https://github.com/psf/black\n"
+        "  rev: 22.10.0\n"
+        "  hooks:\n"
+        "  - id: black\n"
+        "- repo: https://github.com/pycqa/flake8\n"
+        "  rev: 6.0.0\n"
+        "  hooks:\n"
+        "  - id: flake8\n"
+    )
+    mock_pre_commit.execute_hooks.return_value = ExecuteResult(
+        successful=False,
+        output=(
+            "black.....Failed\n- hook id: black\n\nwould reformat a.py\n"
+            "flake8.....Passed\n"
+        ),
+    )
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES, specific_test="flake8")
+
+    assert scanned_files(mock_pre_commit) == ["a.py"]
+
+
+def test_that_ledger_scans_record_nothing_for_hooks_failing_without_files(
+    ledger_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+):
+    mock_pre_commit.execute_hooks.return_value = ExecuteResult(
+        successful=False,
+        output="black.....Failed\n- hook id: black\n\nerror: cannot format\n",
+    )
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    assert len(scanned_files(mock_pre_commit)) == 4
+
+
+def test_that_ledger_scans_record_nothing_when_pre_commit_errors(
+    ledger_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+):
+    mock_pre_commit.execute_hooks.return_value = ExecuteResult(
+        successful=False,
+        output="An unexpected error has occurred: CalledProcessError\n",
+    )
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    mock_pre_commit.execute_hooks.reset_mock()
+    scan_result = ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    assert len(scanned_files(mock_pre_commit)) == 4
+    assert not scan_result.successful
+
+
+def test_that_ledger_scans_record_nothing_for_hooks_without_a_result(
+    ledger_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    ledger_folder_path: Path,
+):
+    (ledger_folder_path / ".pre-commit-config.yaml").write_text(
+        "repos:\n"
+        "- repo: https://github.com/psf/black\n"
+        "  rev: 22.10.0\n"
+        "  hooks:\n"
+        "  - id: black\n"
+        "  - id: black-jupyter\n"
+    )
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    mock_pre_commit.execute_hooks.reset_mock()
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES, specific_test="black")
+
+    assert len(scanned_files(mock_pre_commit)) == 4
+
+
+def test_that_ledger_scans_only_expect_hooks_of_the_stage_scanned(
+    ledger_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    ledger_folder_path: Path,
+):
+    (ledger_folder_path / ".pre-commit-config.yaml").write_text(
+        "repos:\n"
+        "- repo: https://github.com/psf/black\n"
+        "  rev: 22.10.0\n"
+        "  hooks:\n"
+        "  - id: black\n"
+        "  - id: black-jupyter\n"
+        "    stages: [push]\n"
+    )
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    mock_pre_commit.execute_hooks.reset_mock()
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    mock_pre_commit.execute_hooks.assert_not_called()
+
+
+def test_that_ledger_scans_rescan_everything_when_the_config_changes(
+    ledger_scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    ledger_folder_path: Path,
+):
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+    config_path = ledger_folder_path / ".pre-commit-config.yaml"
+    config_path.write_text(config_path.read_text().replace("22.10.0", "23.1.0"))
+
+    ledger_scanner_service.scan_repo(ScanMode.ALL_FILES)
+
+    assert len(scanned_files(mock_pre_commit)) == 4
+
+
+def test_that_changed_since_scans_hand_the_changed_files_to_pre_commit(
+    mock_pre_commit: MagicMock,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docs").mkdir()
+    for file_name in [".pre-commit-config.yaml", "a.py", "docs/b.md"]:
+        (tmp_path / file_name).write_text("")
+    mock_repo_files = MagicMock()
+    mock_repo_files.head_commit.return_value = "mock-commit"
+    mock_repo_files.changed_files.return_value = [
+        Path("a.py"),
+        Path("docs/b.md"),
+        Path("only-in-feature.py"),
+    ]
+    scanner_service = ScannerService(mock_pre_commit, repo_files=mock_repo_files)
+
+    scanner_service.scan_repo(
+        ScanMode.CHANGED_SINCE, base_ref="origin/main", head_ref="feature"
+    )
+
+    mock_repo_files.changed_files.assert_called_once_with(
+        Path("."), "origin/main", "feature"
+    )
+    mock_pre_commit.execute_hooks.assert_called_once_with(
+        False, hook_id=None, files=["a.py", "docs/b.md"], skip_hook_ids=None
+    )
+
+
+def test_that_changed_since_scans_refuse_a_head_ref_that_is_not_checked_out(
+    mock_pre_commit: MagicMock,
+):
+    mock_repo_files = MagicMock()
+    mock_repo_files.head_commit.side_effect = lambda folder_path, ref="HEAD": ref
+    scanner_service = ScannerService(mock_pre_commit, repo_files=mock_repo_files)
+
+    scan_result = scanner_service.scan_repo(
+        ScanMode.CHANGED_SINCE, base_ref="origin/main", head_ref="feature"
+    )
+
+    assert not scan_result.successful
+    assert scan_result.output == (
+        "Could not scan the changes in feature, as it is not checked out. "
+        "Check it out to scan them.\n"
+    )
+    mock_repo_files.changed_files.assert_not_called()
+    mock_pre_commit.execute_hooks.assert_not_called()
+
+
+def test_that_changed_since_scans_pass_without_changed_files(
+    mock_pre_commit: MagicMock,
+):
+    mock_repo_files = MagicMock()
+    mock_repo_files.changed_files.return_value = []
+    scanner_service = ScannerService(mock_pre_commit, repo_files=mock_repo_files)
+
+    scan_result = scanner_service.scan_repo(
+        ScanMode.CHANGED_SINCE, base_ref="origin/main"
+    )
+
+    assert scan_result.successful
+    assert scan_result.output == "No files have changed since origin/main\n"
+    mock_pre_commit.execute_hooks.assert_not_called()
+
+
+def test_that_changed_since_scans_fail_when_changes_cannot_be_listed(
+    mock_pre_commit: MagicMock,
+):
+    mock_repo_files = MagicMock()
+    mock_repo_files.changed_files.return_value = None
+    scanner_service = ScannerService(mock_pre_commit, repo_files=mock_repo_files)
+
+    scan_result = scanner_service.scan_repo(ScanMode.CHANGED_SINCE, base_ref="nope")
+
+    assert not scan_result.successful
+    assert scan_result.output == "Could not list the files changed since nope\n"
+    mock_pre_commit.execute_hooks.assert_not_called()
+
+
+@pytest.fixture()
+def edited_folder_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".pre-commit-config.yaml").write_text(
+        "exclude: ^vendor/\n"
+        "repos:\n"
+        "- repo: https://github.com/pre-commit/pre-commit-hooks\n"
+        "  rev: v4.3.0\n"
+        "  hooks:\n"
+        "  - id: trailing-whitespace\n"
+        "  - id: check-yaml\n"
+        "    files: \\.ya?ml$\n"
+        "- repo: https://github.com/psf/black\n"
+        "  rev: 22.10.0\n"
+        "  hooks:\n"
+        "  - id: black\n"
+        "    files: \\.py$\n"
+        "    exclude: ^migrations/\n"
+    )
+    for file_name in ["a.py", "migrations/b.py", "vendor/c.yaml"]:
+        (tmp_path / file_name).parent.mkdir(exist_ok=True)
+        (tmp_path / file_name).write_text("x = 1\n")
+    return tmp_path
+
+
+def test_that_edited_file_scans_skip_hooks_that_match_no_edited_files(
+    scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    edited_folder_path: Path,
+):
+    scanner_service.scan_edited_files(["a.py", "vendor/c.yaml", "a.py", "deleted.py"])
+
+    mock_pre_commit.execute_hooks.assert_called_once_with(
+        False,
+        hook_id=None,
+        files=["a.py", "vendor/c.yaml"],
+        skip_hook_ids=["check-yaml"],
+    )
+
+
+def test_that_edited_file_scans_respect_hook_excludes(
+    scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    edited_folder_path: Path,
+):
+    scanner_service.scan_edited_files(["migrations/b.py"])
+
+    assert mock_pre_commit.execute_hooks.call_args.kwargs["skip_hook_ids"] == [
+        "check-yaml",
+        "black",
+    ]
+
+
+def test_that_edited_file_scans_pass_without_relevant_hooks(
+    scanner_service: ScannerService,
+    mock_pre_commit: MagicMock,
+    edited_folder_path: Path,
+):
+    scan_result = scanner_service.scan_edited_files(
+        ["a.py"], specific_test="check-yaml"
+    )
+
+    assert scan_result.successful
+    assert scan_result.output == "No hooks apply to the edited files\n"
+    mock_pre_commit.execute_hooks.assert_not_called()
@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from secureli.repositories.telemetry_spool import TelemetrySpoolRepository
+from secureli.services.logging import LogAction, LogEntry, LogStatus
+from secureli.services.telemetry import TelemetryService
+
+
+class StandInServer(ThreadingHTTPServer):
+    """A local stand-in for the instrumentation backend, recording what it receives"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.entries: list[dict] = []
+        self.api_keys: list[str] = []
+        self.content_types: list[str] = []
+        self.statuses: list[int] = []
+        self.delay_seconds = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/log"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.server.delay_seconds)
+        status = self.server.statuses.pop(0) if self.server.statuses else 202
+        if status == 202:
+            self.server.entries.append(json.loads(body))
+            self.server.api_keys.append(self.headers["Api-Key"])
+            self.server.content_types.append(self.headers["Content-Type"])
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def stand_in_server() -> Iterator[StandInServer]:
+    stand_in_server = StandInServer()
+    thread = threading.Thread(target=stand_in_server.serve_forever, daemon=True)
+    thread.start()
+    yield stand_in_server
+    stand_in_server.shutdown()
+    stand_in_server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_process_wide_state():
+    yield
+    if TelemetryService._flusher is not None:
+        TelemetryService._flusher.join()
+    TelemetryService._pending = False
+    TelemetryService._stopping.clear()
+    TelemetryService._waits_at_exit = False
+
+
+@pytest.fixture()
+def mock_atexit(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch("secureli.services.telemetry.atexit")
+
+
+@pytest.fixture()
+def telemetry_spool(tmp_path: Path) -> TelemetrySpoolRepository:
+    telemetry_spool = TelemetrySpoolRepository(max_entries=100)
+    telemetry_spool.spool_path = tmp_path / ".secureli" / "telemetry"
+    return telemetry_spool
+
+
+@pytest.fixture()
+def telemetry_service(
+    telemetry_spool: TelemetrySpoolRepository,
+    stand_in_server: StandInServer,
+    monkeypatch: pytest.MonkeyPatch,
+    mock_atexit: MagicMock,
+) -> TelemetryService:
+    monkeypatch.setenv("API_ENDPOINT", stand_in_server.url)
+    monkeypatch.setenv("API_KEY", "mock-api-key")
+    return TelemetryService(
+        spool=telemetry_spool,
+        batch_size=2,
+        max_retries=2,
+        request_timeout_seconds=5,
+        exit_budget_seconds=5,
+    )
+
+
+def _log_entry(id: str) -> LogEntry:
+    return LogEntry(
+        id=id,
+        username="mock-user",
+        machineid="mock-machine",
+        secureli_version="0.0.0",
+        status=LogStatus.success,
+        action=LogAction.scan,
+    )
+
+
+def test_that_telemetry_service_sends_each_spooled_entry_as_the_backend_expects(
+    telemetry_service: TelemetryService,
+    telemetry_spool: TelemetrySpoolRepository,
+    stand_in_server: StandInServer,
+):
+    for id in ["first", "second"]:
+        telemetry_spool.add(_log_entry(id).json(exclude_none=True))
+
+    telemetry_service.enqueue(_log_entry("third"))
+    telemetry_service.wait_for_flush()
+
+    assert [entry["id"] for entry in stand_in_server.entries] == [
+        "first",
+        "second",
+        "third",
+    ]
+    assert stand_in_server.api_keys == ["mock-api-key"] * 3
+    assert stand_in_server.content_types == [None] * 3
+    assert telemetry_spool.claim(10) == []
+
+
+def test_that_telemetry_service_sends_from_one_thread_per_process(
+    telemetry_service: TelemetryService,
+    telemetry_spool: TelemetrySpoolRepository,
+    stand_in_server: StandInServer,
+    mock_atexit: MagicMock,
+):
+    stand_in_server.delay_seconds = 0.2
+    other_telemetry_service = TelemetryService(
+        spool=telemetry_spool,
+        batch_size=2,
+        max_retries=2,
+        request_timeout_seconds=5,
+        exit_budget_seconds=5,
+    )
+
+    telemetry_service.enqueue(_log_entry("first"))
+    flusher = TelemetryService._flusher
+    other_telemetry_service.enqueue(_log_entry("second"))
+
+    assert TelemetryService._flusher is flusher
+    mock_atexit.register.assert_called_once_with(TelemetryService.wait_for_flush)
+    TelemetryService.wait_for_flush()
+    assert [entry["id"] for entry in stand_in_server.entries] == ["first", "second"]
+
+
+def test_that_telemetry_service_retries_server_errors(
+    telemetry_service: TelemetryService,
+    stand_in_server: StandInServer,
+):
+    stand_in_server.statuses = [503]
+    telemetry_service.spool.add(_log_entry("retried").json())
+
+    assert telemetry_service.flush() == 1
+    assert [entry["id"] for entry in stand_in_server.entries] == ["retried"]
+
+
+def test_that_telemetry_service_does_not_retry_errors_the_entry_may_have_been_logged_in(
+    telemetry_service: TelemetryService,
+    telemetry_spool: TelemetrySpoolRepository,
+    stand_in_server: StandInServer,
+):
+    stand_in_server.statuses = [500, 202]
+    telemetry_spool.add(_log_entry("unsent").json())
+
+    assert telemetry_service.flush() == 0
+    assert stand_in_server.statuses == [202]
+
+
+def test_that_telemetry_service_keeps_entries_it_could_not_send(
+    telemetry_service: TelemetryService,
+    telemetry_spool: TelemetrySpoolRepository,
+    stand_in_server: StandInServer,
+):
+    stand_in_server.statuses = [503, 503, 503]
+    telemetry_spool.add(_log_entry("unsent").json())
+
+    assert telemetry_service.flush() == 0
+    assert [json.loads(entry.data)["id"] for entry in telemetry_spool.claim(10)] == [
+        "unsent"
+    ]
+
+
+def test_that_telemetry_service_waits_no_longer_than_its_exit_budget(
+    telemetry_service: TelemetryService,
+    telemetry_spool: TelemetrySpoolRepository,
+    stand_in_server: StandInServer,
+):
+    stand_in_server.delay_seconds = 2
+    telemetry_service.exit_budget_seconds = 0.2
+
+    start = time.monotonic()
+    telemetry_service.enqueue(_log_entry("slow"))
+    flusher = TelemetryService._flusher
+    telemetry_service.wait_for_flush()
+
+    assert time.monotonic() - start < 1
+    flusher.join()
+    assert [entry["id"] for entry in stand_in_server.entries] == ["slow"]
+
+
+def test_that_telemetry_service_does_nothing_without_a_backend(
+    telemetry_spool: TelemetrySpoolRepository,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.delenv("API_ENDPOINT", raising=False)
+    monkeypatch.setenv("API_KEY", "mock-api-key")
+    telemetry_service = TelemetryService(
+        spool=telemetry_spool,
+        batch_size=2,
+        max_retries=0,
+        request_timeout_seconds=5,
+        exit_budget_seconds=5,
+    )
+
+    telemetry_service.enqueue(_log_entry("unsent"))
+    telemetry_service.wait_for_flush()
+
+    assert TelemetryService._flusher is None
+    assert telemetry_spool.claim(10) == []
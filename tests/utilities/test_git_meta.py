@@ -1,10 +1,16 @@
+from pathlib import Path
 from subprocess import CompletedProcess
 from unittest.mock import MagicMock
 
 import pytest
 from pytest_mock import MockerFixture
 
-from secureli.utilities.git_meta import git_user_email, origin_url, current_branch_name
+from secureli.utilities.git_meta import (
+    git_dir,
+    git_user_email,
+    origin_url,
+    current_branch_name,
+)
 
 
 @pytest.fixture()
@@ -50,6 +56,26 @@ def test_git_user_email_loads_user_email_via_git_subprocess(mock_subprocess: Mag
     assert result == "great.engineer@slalom.com"  # note: without trailing newline
 
 
+def test_git_dir_finds_git_folder_via_git_subprocess(mock_subprocess: MagicMock):
+    mock_subprocess.run.return_value = CompletedProcess(
+        args=[], returncode=0, stdout="/repo/.git/worktrees/feature\n".encode("utf8")
+    )
+
+    result = git_dir()
+
+    assert result == Path("/repo/.git/worktrees/feature")
+
+
+def test_git_dir_falls_back_to_dot_git_if_git_fails(mock_subprocess: MagicMock):
+    mock_subprocess.run.return_value = CompletedProcess(
+        args=[], returncode=128, stdout=b""
+    )
+
+    result = git_dir()
+
+    assert result == Path(".git")
+
+
 def test_origin_url_parses_config_to_get_origin_url(mock_configparser: MagicMock):
     result = origin_url()
 
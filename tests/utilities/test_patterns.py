@@ -1,4 +1,11 @@
-from secureli.utilities.patterns import combine_patterns
+import re
+from pathlib import Path
+
+from secureli.utilities.patterns import (
+    IgnoreMatcher,
+    combine_patterns,
+    git_wild_match_patterns,
+)
 
 
 def test_that_combine_patterns_returns_none_for_empty_list():
@@ -21,3 +28,58 @@ def test_that_combine_patterns_addresses_duplicate_capture_group_issue():
     pattern2 = "*\\.txt(?:(?P<ps_d>/).*)?$"
     result = combine_patterns([pattern1, pattern2])
     assert result == "^(*\\.py(?:(?P<ps_d0>/).*)?$|*\\.txt(?:(?P<ps_d1>/).*)?$)$"
+
+
+def test_that_git_wild_match_patterns_skips_comments_and_negations():
+    result = git_wild_match_patterns(["*.py", "# comment", "", "!keep.py"])
+    assert result == ["^(?:.+/)?[^/]*\\.py(?:(?P<ps_d>/).*)?$"]
+
+
+def test_that_ignore_matcher_without_patterns_ignores_nothing():
+    ignore_matcher = IgnoreMatcher([])
+
+    assert ignore_matcher.combined_pattern is None
+    assert not ignore_matcher.is_ignored("src/main.py")
+    assert not ignore_matcher.is_directory_ignored("src")
+
+
+def test_that_ignore_matcher_matches_files_against_combined_patterns():
+    ignore_matcher = IgnoreMatcher(git_wild_match_patterns(["*.log", "build/"]))
+
+    assert ignore_matcher.is_ignored("logs/output.log")
+    assert ignore_matcher.is_ignored(Path("src/build/output.js"))
+    assert not ignore_matcher.is_ignored("src/main.py")
+
+
+def test_that_ignore_matcher_identifies_ignored_directories():
+    ignore_matcher = IgnoreMatcher(git_wild_match_patterns(["node_modules/"]))
+
+    assert ignore_matcher.is_directory_ignored("web/node_modules")
+    assert ignore_matcher.is_directory_ignored(Path("node_modules/"))
+    assert not ignore_matcher.is_directory_ignored("web/src")
+
+
+def test_that_ignore_matcher_agrees_with_combined_pattern():
+    lines = ["*.log", "build/", "/root.txt", "docs/*.md", "**/tmp", "*.py[cod]", "x/**"]
+    patterns = git_wild_match_patterns(lines)
+    ignore_matcher = IgnoreMatcher(patterns)
+    paths = [
+        "app.log",
+        "src/app.log",
+        "build/out.js",
+        "src/build/out.js",
+        "build",
+        "root.txt",
+        "src/root.txt",
+        "docs/readme.md",
+        "docs/nested/readme.md",
+        "a/tmp/file.txt",
+        "module.pyc",
+        "module.py",
+        "x/y/z.txt",
+        "src/x/y.txt",
+    ]
+
+    for path in paths:
+        expected = bool(re.findall(combine_patterns(patterns), path))
+        assert ignore_matcher.is_ignored(path) == expected, path
@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from secureli.utilities.tracing import Tracer, counted, traced, tracer
+
+
+@pytest.fixture()
+def enabled_tracer() -> Tracer:
+    enabled_tracer = Tracer()
+    enabled_tracer.enable()
+    return enabled_tracer
+
+
+def test_that_a_disabled_tracer_records_nothing():
+    disabled_tracer = Tracer()
+
+    with disabled_tracer.span("phase"):
+        disabled_tracer.count("files_listed")
+
+    assert disabled_tracer.summary() is None
+    assert disabled_tracer._events == []
+
+
+def test_that_spans_nest_within_their_parents(enabled_tracer: Tracer):
+    with enabled_tracer.span("outer"):
+        with enabled_tracer.span("inner", hook="black"):
+            pass
+
+    inner, outer = enabled_tracer._events
+    assert (inner["name"], inner["ph"], inner["args"]) == (
+        "inner",
+        "X",
+        {"hook": "black"},
+    )
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert set(enabled_tracer.summary().span_seconds) == {"outer", "inner"}
+
+
+def test_that_spans_are_recorded_when_their_phase_fails(enabled_tracer: Tracer):
+    with pytest.raises(ValueError):
+        with enabled_tracer.span("failing phase"):
+            raise ValueError("No supported languages found")
+
+    assert "failing phase" in enabled_tracer.summary().span_seconds
+
+
+def test_that_counters_record_running_totals(enabled_tracer: Tracer):
+    enabled_tracer.count("files_listed", 10)
+    enabled_tracer.count("files_listed", 5)
+    enabled_tracer.count("config_builds")
+
+    assert enabled_tracer.summary().counters == {
+        "files_listed": 15,
+        "config_builds": 1,
+    }
+    assert [event["args"] for event in enabled_tracer._events] == [
+        {"files_listed": 10},
+        {"files_listed": 15},
+        {"config_builds": 1},
+    ]
+
+
+def test_that_traces_are_written_as_chrome_trace_events(
+    enabled_tracer: Tracer, tmp_path: Path
+):
+    trace_path = tmp_path / ".secureli" / "trace.json"
+    with enabled_tracer.span("phase"):
+        enabled_tracer.count("subprocesses_spawned")
+
+    enabled_tracer.write(trace_path)
+
+    with open(trace_path) as f:
+        trace = json.load(f)
+    assert [event["ph"] for event in trace["traceEvents"]] == ["C", "X"]
+    assert list(trace_path.parent.iterdir()) == [trace_path]
+
+
+def test_that_traced_functions_and_counted_items_use_the_shared_tracer():
+    @traced("double")
+    def double(value: int) -> int:
+        return value * 2
+
+    tracer.enable()
+    try:
+        assert double(2) == 4
+        assert list(counted("items", iter([1, 2, 3]))) == [1, 2, 3]
+        summary = tracer.summary()
+    finally:
+        tracer.enabled = False
+
+    assert list(summary.span_seconds) == ["double"]
+    assert summary.counters == {"items": 3}